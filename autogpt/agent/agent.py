@@ -4,9 +4,15 @@ from autogpt.app import execute_command, get_command
 from autogpt.config import Config
 from autogpt.json_utils.json_fix_llm import fix_json_using_multiple_techniques
 from autogpt.json_utils.utilities import LLM_DEFAULT_RESPONSE_FORMAT, validate_json
-from autogpt.llm import chat_with_ai, create_chat_completion, create_chat_message
+from autogpt.llm import (
+    ContextBuilder,
+    chat_with_ai,
+    create_chat_completion,
+    create_chat_message,
+)
 from autogpt.llm.token_counter import count_string_tokens
 from autogpt.logs import logger, print_assistant_thoughts
+from autogpt.memory_management.summary_memory import RunningSummary
 from autogpt.speech import say_text
 from autogpt.spinner import Spinner
 from autogpt.utils import clean_input
@@ -57,11 +63,13 @@ class Agent:
         cfg = Config()
         self.ai_name = ai_name
         self.memory = memory
-        self.summary_memory = (
-            "我被生成完毕."  # Initial memory necessary to avoid hilucination
+        self.running_summary = RunningSummary(
+            "我被生成完毕.",  # Initial memory necessary to avoid hilucination
+            mode=cfg.summary_memory_mode,
         )
         self.last_memory_index = 0
         self.full_message_history = full_message_history
+        self.context_builder = ContextBuilder()
         self.next_action_count = next_action_count
         self.command_registry = command_registry
         self.config = config
@@ -238,7 +246,7 @@ class Agent:
                     str(command_result), cfg.fast_llm_model
                 )
                 memory_tlength = count_string_tokens(
-                    str(self.summary_memory), cfg.fast_llm_model
+                    str(self.running_summary.summary), cfg.fast_llm_model
                 )
                 if result_tlength + memory_tlength + 600 > cfg.fast_token_limit:
                     result = f"Failure: command {command_name} returned too much output. \
@@ -1,10 +1,15 @@
 """File operations for AutoGPT"""
 from __future__ import annotations
 
+import codecs
 import hashlib
+import json
 import os
 import os.path
-from typing import Dict, Generator, Literal, Tuple
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Generator, Iterable, Literal, Tuple
 
 import charset_normalizer
 import requests
@@ -13,6 +18,7 @@ from requests.adapters import HTTPAdapter, Retry
 
 from autogpt.commands.command import command
 from autogpt.config import Config
+from autogpt.llm.llm_utils import batched
 from autogpt.logs import logger
 from autogpt.spinner import Spinner
 from autogpt.utils import readable_file_size
@@ -21,6 +27,22 @@ CFG = Config()
 
 Operation = Literal["write", "append", "delete"]
 
+ENCODING_SAMPLE_SIZE = 64 * 1024
+READ_BLOCK_SIZE = 1024 * 1024
+INGEST_BATCH_SIZE = 100
+COMPACTION_MIN_OPERATIONS = 1000
+
+DOWNLOAD_SEGMENTS = 4
+DOWNLOAD_SEGMENT_MIN_SIZE = 1024 * 1024
+DOWNLOAD_MIN_BUFFER_SIZE = 64 * 1024
+DOWNLOAD_MAX_BUFFER_SIZE = 1024 * 1024
+DOWNLOAD_PROGRESS_INTERVAL = 0.1
+
+download_session: requests.Session | None = None
+
+# The md5 state, size and modification time of the files written or appended to
+file_hashes: Dict[str, Tuple[object, int, int]] = {}
+
 
 def text_checksum(text: str) -> str:
     """Get the hex checksum for the given text."""
@@ -34,7 +56,16 @@ def operations_from_log(log_path: str) -> Generator[Tuple[Operation, str, str |
     except FileNotFoundError:
         return
 
-    for line in log:
+    yield from parse_operations(log)
+
+    log.close()
+
+
+def parse_operations(
+    lines: Iterable[str],
+) -> Generator[Tuple[Operation, str, str | None]]:
+    """Parse lines of the file operations log into tuples of the log entries"""
+    for line in lines:
         line = line.replace("File Operation Logger", "").strip()
         if not line:
             continue
@@ -49,7 +80,79 @@ def operations_from_log(log_path: str) -> Generator[Tuple[Operation, str, str |
         elif operation == "delete":
             yield (operation, tail.strip(), None)
 
-    log.close()
+
+class FileOperationsState:
+    """The files of a file operations log and their checksums.
+
+    The log is replayed once, then only the operations appended to it since are
+    read, so checking the state does not get slower as the log grows. The log is
+    compacted to the operations the state depends on once most of it is outdated.
+    """
+
+    def __init__(self, log_path: str) -> None:
+        self.log_path = log_path
+        self.files: Dict[str, str | None] = {}
+        self.operations = 0
+        self._offset = 0
+        self._inode = None
+
+    def refresh(self) -> Dict[str, str | None]:
+        """Apply the operations appended to the log since the last refresh.
+
+        Returns:
+            A dictionary mapping file paths to their checksums.
+        """
+        try:
+            stat = os.stat(self.log_path)
+        except FileNotFoundError:
+            stat = None
+        if stat is None or stat.st_ino != self._inode or stat.st_size < self._offset:
+            # The log was replaced, replay it from the start
+            self.files = {}
+            self.operations = 0
+            self._offset = 0
+            self._inode = stat and stat.st_ino
+        if stat is None or stat.st_size == self._offset:
+            return self.files
+
+        with open(self.log_path, "rb") as log:
+            log.seek(self._offset)
+            tail = log.read(stat.st_size - self._offset)
+        # A line without its newline is still being written
+        tail = tail[: tail.rfind(b"\n") + 1]
+        self._offset += len(tail)
+        for operation, path, checksum in parse_operations(
+            tail.decode("utf-8").splitlines()
+        ):
+            self.operations += 1
+            if operation in ("write", "append"):
+                self.files[path] = checksum
+            elif operation == "delete":
+                self.files.pop(path, None)
+        return self.files
+
+    def compact(self) -> None:
+        """Rewrite the log with one write operation per file of the state."""
+        self.refresh()
+        lines = ["File Operation Logger\n"]
+        for path, checksum in self.files.items():
+            line = f"write: {path}"
+            if checksum is not None:
+                line += f" #{checksum}"
+            lines.append(f"{line}\n")
+
+        tmp_path = f"{self.log_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+        os.replace(tmp_path, self.log_path)
+        logger.debug(
+            f"Compacted the file operations log from {self.operations} operations"
+            f" to {len(self.files)}"
+        )
+        self.refresh()
+
+
+operations_state: FileOperationsState | None = None
 
 
 def file_operations_state(log_path: str) -> Dict:
@@ -57,22 +160,20 @@ def file_operations_state(log_path: str) -> Dict:
 
     Parses a log file at CFG.file_logger_path to construct a dictionary that maps
     each file path written or appended to its checksum. Deleted files are removed
-    from the dictionary.
+    from the dictionary. The log is parsed once, later calls only parse the
+    operations appended since, and the returned dictionary must not be modified.
 
     Returns:
         A dictionary mapping file paths to their checksums.
 
     Raises:
-        FileNotFoundError: If CFG.file_logger_path is not found.
         ValueError: If the log file content is not in the expected format.
     """
-    state = {}
-    for operation, path, checksum in operations_from_log(log_path):
-        if operation in ("write", "append"):
-            state[path] = checksum
-        elif operation == "delete":
-            del state[path]
-    return state
+    global operations_state
+
+    if operations_state is None or operations_state.log_path != log_path:
+        operations_state = FileOperationsState(log_path)
+    return operations_state.refresh()
 
 
 def is_duplicate_operation(
@@ -110,6 +211,13 @@ def log_operation(operation: str, filename: str, checksum: str | None = None) ->
     logger.debug(f"Logging file operation: {log_entry}")
     append_to_file(CFG.file_logger_path, f"{log_entry}\n", should_log=False)
 
+    state = file_operations_state(CFG.file_logger_path)
+    if (
+        operations_state.operations >= COMPACTION_MIN_OPERATIONS
+        and operations_state.operations > 2 * len(state)
+    ):
+        operations_state.compact()
+
 
 def split_file(
     content: str, max_length: int = 4000, overlap: int = 0
@@ -125,15 +233,45 @@ def split_file(
         default is no overlap
     :return: A generator yielding chunks of text
     """
-    start = 0
-    content_length = len(content)
+    yield from split_stream([content], max_length=max_length, overlap=overlap)
+
+
+def split_stream(
+    blocks: Iterable[str], max_length: int = 4000, overlap: int = 0
+) -> Generator[str, None, None]:
+    """
+    Split a text read in blocks into the same chunks as split_file, keeping only
+    about one chunk of it in memory.
 
-    while start < content_length:
-        end = start + max_length
-        if end + overlap < content_length:
-            chunk = content[start : end + overlap - 1]
+    :param blocks: The consecutive blocks of the text to be split into chunks
+    :param max_length: The maximum length of each chunk,
+        default is 4000 (about 1k token)
+    :param overlap: The number of overlapping characters between chunks,
+        default is no overlap
+    :return: A generator yielding chunks of text
+    """
+    blocks = iter(blocks)
+    buffer = ""
+    start = 0
+    exhausted = False
+
+    while True:
+        # A chunk is cut short only if the text goes on after it
+        while not exhausted and len(buffer) - start <= max_length + overlap:
+            block = next(blocks, None)
+            if block is None:
+                exhausted = True
+            else:
+                buffer = buffer[start:] + block
+                start = 0
+
+        remaining = len(buffer) - start
+        if remaining <= 0:
+            break
+        if remaining > max_length + overlap:
+            chunk = buffer[start : start + max_length + overlap - 1]
         else:
-            chunk = content[start:content_length]
+            chunk = buffer[start:]
 
             # Account for the case where the last chunk is shorter than the overlap, so it has already been consumed
             if len(chunk) <= overlap:
@@ -143,6 +281,70 @@ def split_file(
         start += max_length - overlap
 
 
+def detect_encoding(filename: str) -> str:
+    """
+    Detect the encoding of a file from its first ENCODING_SAMPLE_SIZE bytes.
+
+    A sample that is valid UTF-8 is read as UTF-8, since an ASCII sample says
+    nothing about the non-ASCII characters further in the file.
+
+    :param filename: The name of the file
+    :return: The name of the codec to decode the file with
+    """
+    with open(filename, "rb") as f:
+        sample = f.read(ENCODING_SAMPLE_SIZE)
+    try:
+        # The sample may end in the middle of a character
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+    except UnicodeDecodeError:
+        pass
+    else:
+        return "utf_8_sig" if sample.startswith(codecs.BOM_UTF8) else "utf-8"
+
+    charset_match = charset_normalizer.from_bytes(sample).best()
+    if charset_match is None:
+        return "utf-8"
+    if charset_match.encoding == "utf_8" and charset_match.bom:
+        return "utf_8_sig"
+    return charset_match.encoding
+
+
+def read_blocks(
+    filename: str, block_size: int = READ_BLOCK_SIZE
+) -> Generator[str, None, None]:
+    """
+    Read and decode a file one block at a time.
+
+    :param filename: The name of the file to read
+    :param block_size: The number of characters of each block
+    :return: A generator yielding the decoded blocks of the file
+    """
+    encoding = detect_encoding(filename)
+    logger.debug(f"Read file '{filename}' with encoding '{encoding}'")
+    with open(filename, "r", encoding=encoding, errors="replace", newline="") as f:
+        while block := f.read(block_size):
+            yield block
+
+
+def count_chunks(length: int, max_length: int = 4000, overlap: int = 0) -> int:
+    """
+    Count the chunks split_file splits a text of a given length into.
+
+    :param length: The length of the text
+    :param max_length: The maximum length of each chunk
+    :param overlap: The number of overlapping characters between chunks
+    :return: The number of chunks
+    """
+    num_chunks = 0
+    start = 0
+    while start < length:
+        if start + max_length + overlap >= length and length - start <= overlap:
+            break
+        num_chunks += 1
+        start += max_length - overlap
+    return num_chunks
+
+
 @command("read_file", "Read file", '"filename": "<filename>"')
 def read_file(filename: str) -> str:
     """Read a file and return the contents
@@ -154,10 +356,7 @@ def read_file(filename: str) -> str:
         str: The contents of the file
     """
     try:
-        charset_match = charset_normalizer.from_path(filename).best()
-        encoding = charset_match.encoding
-        logger.debug(f"Read file '{filename}' with encoding '{encoding}'")
-        return str(charset_match)
+        return "".join(read_blocks(filename))
     except Exception as err:
         return f"错误: {err}"
 
@@ -170,27 +369,28 @@ def ingest_file(
     maximum length and overlap, and adding the chunks to the memory storage.
 
     :param filename: The name of the file to ingest
-    :param memory: An object with an add() method to store the chunks in memory
+    :param memory: An object with an add_many() method to store the chunks in memory
     :param max_length: The maximum length of each chunk, default is 4000
     :param overlap: The number of overlapping characters between chunks, default is 200
     """
     try:
         logger.info(f"操作文件中 {filename}")
-        content = read_file(filename)
-        content_length = len(content)
+        # Read the file twice instead of holding it in memory: once to count the
+        #  chunks, once to add them
+        content_length = sum(len(block) for block in read_blocks(filename))
         logger.info(f"文件长度: {content_length} 字符")
 
-        chunks = list(split_file(content, max_length=max_length, overlap=overlap))
-
-        num_chunks = len(chunks)
-        for i, chunk in enumerate(chunks):
-            logger.info(f"注入块 {i + 1} / {num_chunks} 到记忆中")
-            memory_to_add = (
-                f"文件名: {filename}\n" f"内容块#{i + 1}/{num_chunks}: {chunk}"
+        num_chunks = count_chunks(content_length, max_length, overlap)
+        logger.info(f"注入 {num_chunks} 块到记忆中")
+        chunks = split_stream(read_blocks(filename), max_length, overlap)
+        for batch in batched(enumerate(chunks), INGEST_BATCH_SIZE):
+            memory.add_many(
+                [
+                    f"文件名: {filename}\n" f"内容块#{i + 1}/{num_chunks}: {chunk}"
+                    for i, chunk in batch
+                ]
             )
 
-            memory.add(memory_to_add)
-
         logger.info(f"注入完成 {num_chunks} 块 from {filename}.")
     except Exception as err:
         logger.info(f"注入文件出现错误 '{filename}': {err}")
@@ -215,12 +415,46 @@ def write_to_file(filename: str, text: str) -> str:
         os.makedirs(directory, exist_ok=True)
         with open(filename, "w", encoding="utf-8") as f:
             f.write(text)
+        remember_checksum(filename, hashlib.md5(text.encode("utf-8")))
         log_operation("write", filename, checksum)
         return "文件写入成功."
     except Exception as err:
         return f"错误: {err}"
 
 
+def remember_checksum(filename: str, digest) -> None:
+    """Remember the md5 state of a file's content, to update it on append."""
+    stat = os.stat(filename)
+    file_hashes[os.path.abspath(filename)] = (digest, stat.st_size, stat.st_mtime_ns)
+
+
+def appended_checksum(filename: str, text: str, stat: os.stat_result | None) -> str:
+    """Get the checksum of a file after text was appended to it.
+
+    Only the appended text is hashed if the file was not modified since its
+    checksum was last computed, otherwise the whole file is read.
+
+    Args:
+        filename: The name of the file appended to
+        text: The appended text
+        stat: The stat of the file before the append, None if it did not exist
+
+    Returns:
+        The checksum of the content of the file
+    """
+    cached = file_hashes.get(os.path.abspath(filename))
+    if stat is None:
+        digest = hashlib.md5(text.encode("utf-8"))
+    elif cached is not None and cached[1:] == (stat.st_size, stat.st_mtime_ns):
+        digest = cached[0]
+        digest.update(text.encode("utf-8"))
+    else:
+        with open(filename, "r", encoding="utf-8") as f:
+            digest = hashlib.md5(f.read().encode("utf-8"))
+    remember_checksum(filename, digest)
+    return digest.hexdigest()
+
+
 @command(
     "append_to_file", "Append to file", '"filename": "<filename>", "text": "<text>"'
 )
@@ -238,12 +472,12 @@ def append_to_file(filename: str, text: str, should_log: bool = True) -> str:
     try:
         directory = os.path.dirname(filename)
         os.makedirs(directory, exist_ok=True)
+        stat = os.stat(filename) if should_log and os.path.exists(filename) else None
         with open(filename, "a", encoding="utf-8") as f:
             f.write(text)
 
         if should_log:
-            with open(filename, "r", encoding="utf-8") as f:
-                checksum = text_checksum(f.read())
+            checksum = appended_checksum(filename, text, stat)
             log_operation("append", filename, checksum=checksum)
 
         return "文本追加成功."
@@ -265,6 +499,7 @@ def delete_file(filename: str) -> str:
         return "错误: 文件已经删除."
     try:
         os.remove(filename)
+        file_hashes.pop(os.path.abspath(filename), None)
         log_operation("delete", filename)
         return "文件删除成功."
     except Exception as err:
@@ -313,31 +548,206 @@ def download_file(url, filename):
         os.makedirs(directory, exist_ok=True)
         message = f"{Fore.YELLOW}Downloading file from {Back.LIGHTBLUE_EX}{url}{Back.RESET}{Fore.RESET}"
         with Spinner(message) as spinner:
-            session = requests.Session()
-            retry = Retry(total=3, backoff_factor=1, status_forcelist=[502, 503, 504])
-            adapter = HTTPAdapter(max_retries=retry)
-            session.mount("http://", adapter)
-            session.mount("https://", adapter)
-
-            total_size = 0
-            downloaded_size = 0
-
-            with session.get(url, allow_redirects=True, stream=True) as r:
-                r.raise_for_status()
-                total_size = int(r.headers.get("Content-Length", 0))
-                downloaded_size = 0
-
-                with open(filename, "wb") as f:
-                    for chunk in r.iter_content(chunk_size=8192):
-                        f.write(chunk)
-                        downloaded_size += len(chunk)
-
-                        # Update the progress message
-                        progress = f"{readable_file_size(downloaded_size)} / {readable_file_size(total_size)}"
-                        spinner.update_message(f"{message} {progress}")
-
-            return f'文件下载到本地成功，文件名: "{filename}"! (Size: {readable_file_size(downloaded_size)})'
+            session = get_download_session()
+            with session.head(url, allow_redirects=True) as r:
+                # Lengths and ranges refer to the encoded body, if the server
+                #  encodes it despite the Accept-Encoding of the session
+                ranges = (
+                    r.ok
+                    and r.headers.get("Accept-Ranges") == "bytes"
+                    and not is_content_encoded(r)
+                )
+                total_size = int(r.headers.get("Content-Length", 0)) if r.ok else 0
+                etag = r.headers.get("ETag")
+
+            part_path = f"{filename}.part"
+            if ranges and total_size > 0:
+                progress = DownloadProgress(spinner, message, total_size)
+                download_segments(url, part_path, total_size, etag, progress)
+            else:
+                try:
+                    progress = download_whole(url, part_path, spinner, message)
+                except Exception:
+                    if os.path.exists(part_path):
+                        os.remove(part_path)
+                    raise
+            os.replace(part_path, filename)
+
+            return f'文件下载到本地成功，文件名: "{filename}"! (Size: {readable_file_size(progress.downloaded_size)})'
     except requests.HTTPError as err:
         return f"文件下载过程中遇到HTTP错误: {err}"
     except Exception as err:
         return f"错误: {err}"
+
+
+def download_whole(
+    url: str, part_path: str, spinner: Spinner, message: str
+) -> DownloadProgress:
+    """
+    Download a file in a single request, for servers that do not serve ranges.
+
+    :param url: The URL of the file
+    :param part_path: The file to write the content to
+    :param spinner: The spinner showing the progress
+    :param message: The message of the spinner
+    :return: The progress of the download
+    """
+    with get_download_session().get(url, allow_redirects=True, stream=True) as r:
+        r.raise_for_status()
+        # The length of an encoded body is not the length of the decoded content
+        total_size = (
+            0 if is_content_encoded(r) else int(r.headers.get("Content-Length", 0))
+        )
+        progress = DownloadProgress(spinner, message, total_size)
+        with open(part_path, "wb") as f:
+            for chunk in r.iter_content(download_buffer_size(total_size)):
+                f.write(chunk)
+                progress.add(len(chunk))
+        if total_size and progress.downloaded_size != total_size:
+            raise requests.ConnectionError(
+                "Connection closed before the end of the file"
+            )
+    return progress
+
+
+def is_content_encoded(response: requests.Response) -> bool:
+    """Whether the body of a response is compressed with a Content-Encoding"""
+    return response.headers.get("Content-Encoding", "identity") != "identity"
+
+
+def get_download_session() -> requests.Session:
+    """Get the session shared by the downloads, which keeps connections alive
+
+    The session asks for unencoded bodies, so that Content-Length and the byte
+    ranges match the bytes of the file.
+    """
+    global download_session
+
+    if download_session is None:
+        download_session = requests.Session()
+        download_session.headers["Accept-Encoding"] = "identity"
+        retry = Retry(total=3, backoff_factor=1, status_forcelist=[502, 503, 504])
+        adapter = HTTPAdapter(max_retries=retry, pool_maxsize=DOWNLOAD_SEGMENTS)
+        download_session.mount("http://", adapter)
+        download_session.mount("https://", adapter)
+    return download_session
+
+
+def download_buffer_size(total_size: int) -> int:
+    """Read about a hundredth of the file at a time, within reasonable bounds"""
+    return min(
+        max(total_size // 100, DOWNLOAD_MIN_BUFFER_SIZE), DOWNLOAD_MAX_BUFFER_SIZE
+    )
+
+
+class DownloadProgress:
+    """The size downloaded so far, shown by the spinner a few times per second"""
+
+    def __init__(self, spinner: Spinner, message: str, total_size: int) -> None:
+        self.spinner = spinner
+        self.message = message
+        self.total_size = total_size
+        self.downloaded_size = 0
+        self._lock = threading.Lock()
+        self._last_update = 0.0
+
+    def add(self, size: int) -> bool:
+        """Count downloaded bytes, returns whether the progress was shown"""
+        with self._lock:
+            self.downloaded_size += size
+            now = time.monotonic()
+            if now - self._last_update < DOWNLOAD_PROGRESS_INTERVAL:
+                return False
+            self._last_update = now
+        progress = f"{readable_file_size(self.downloaded_size)} / {readable_file_size(self.total_size)}"
+        self.spinner.update_message(f"{self.message} {progress}", delay=0)
+        return True
+
+
+def download_segments(
+    url: str,
+    part_path: str,
+    total_size: int,
+    etag: str | None,
+    progress: DownloadProgress,
+) -> None:
+    """Download a file in segments in parallel with range requests
+
+    The segments are written in place in the partial file, and the position of
+    every segment is saved next to it, so an interrupted download resumes where it
+    stopped if the file did not change on the server.
+
+    Args:
+        url (str): URL of the file to download
+        part_path (str): The partial file to download to
+        total_size (int): The size of the file
+        etag (str | None): The ETag of the file, if the server sent one
+        progress (DownloadProgress): The download progress
+    """
+    state_path = f"{part_path}.json"
+    state = None
+    if os.path.exists(part_path) and os.path.exists(state_path):
+        with open(state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if (state["url"], state["size"], state["etag"]) != (url, total_size, etag):
+            state = None
+    if state is None:
+        num_segments = max(
+            1, min(DOWNLOAD_SEGMENTS, total_size // DOWNLOAD_SEGMENT_MIN_SIZE)
+        )
+        segment_size = -(-total_size // num_segments)
+        # The first byte, last byte and next byte to download of every segment
+        segments = [
+            [start, min(start + segment_size, total_size) - 1, start]
+            for start in range(0, total_size, segment_size)
+        ]
+        state = {"url": url, "size": total_size, "etag": etag, "segments": segments}
+        with open(part_path, "wb") as f:
+            f.truncate(total_size)
+    else:
+        progress.add(sum(position - start for start, _, position in state["segments"]))
+
+    lock = threading.Lock()
+
+    def save_state():
+        with lock:
+            with open(state_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+
+    def download_segment(segment):
+        _, end, position = segment
+        if position > end:
+            return
+        headers = {"Range": f"bytes={position}-{end}"}
+        with get_download_session().get(url, headers=headers, stream=True) as r:
+            r.raise_for_status()
+            if r.status_code != 206:
+                raise requests.HTTPError(
+                    "The server ignored the range request", response=r
+                )
+            with open(part_path, "r+b") as f:
+                f.seek(position)
+                for chunk in r.iter_content(download_buffer_size(total_size)):
+                    f.write(chunk)
+                    segment[2] += len(chunk)
+                    if progress.add(len(chunk)):
+                        f.flush()
+                        save_state()
+        if segment[2] <= end:
+            raise requests.ConnectionError(
+                f"Connection closed {end + 1 - segment[2]} bytes before the end"
+            )
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(state["segments"])) as executor:
+            for future in [
+                executor.submit(download_segment, segment)
+                for segment in state["segments"]
+            ]:
+                future.result()
+    except BaseException:
+        save_state()
+        raise
+
+    if os.path.exists(state_path):
+        os.remove(state_path)
@@ -1,18 +1,38 @@
 """Browse a webpage and summarize it using the LLM model"""
 from __future__ import annotations
 
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Iterator
+from urllib.parse import urlparse
+
 import requests
-from bs4 import BeautifulSoup
 from requests import Response
+from requests.compat import urljoin
 
+from autogpt.commands.command import command
 from autogpt.config import Config
-from autogpt.processing.html import extract_hyperlinks, format_hyperlinks
+from autogpt.processing.html import extract_page, format_hyperlinks
+from autogpt.url_utils.http_cache import CachingAdapter, HttpCache, text_hash
 from autogpt.url_utils.validators import validate_url
 
 CFG = Config()
 
 session = requests.Session()
 session.headers.update({"User-Agent": CFG.user_agent})
+session.mount("http://", CachingAdapter())
+session.mount("https://", CachingAdapter())
+
+# The result of scrape_urls goes into the context, keep it short
+BATCH_SCRAPE_MAX_URLS = 10
+BATCH_SCRAPE_EXTRACT_LENGTH = 500
+BATCH_SCRAPE_LINKS = 5
+
+host_semaphores: dict[str, threading.BoundedSemaphore] = {}
+host_semaphores_lock = threading.Lock()
 
 
 @validate_url
@@ -65,16 +85,7 @@ def scrape_text(url: str) -> str:
     if not response:
         return "Error: Could not get response"
 
-    soup = BeautifulSoup(response.text, "html.parser")
-
-    for script in soup(["script", "style"]):
-        script.extract()
-
-    text = soup.get_text()
-    lines = (line.strip() for line in text.splitlines())
-    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-    text = "\n".join(chunk for chunk in chunks if chunk)
-
+    text, _ = extract_response(url, response.text)
     return text
 
 
@@ -92,14 +103,142 @@ def scrape_links(url: str) -> str | list[str]:
         return error_message
     if not response:
         return "Error: Could not get response"
-    soup = BeautifulSoup(response.text, "html.parser")
+    _, hyperlinks = extract_response(url, response.text)
+    return format_hyperlinks(hyperlinks)
 
-    for script in soup(["script", "style"]):
-        script.extract()
 
-    hyperlinks = extract_hyperlinks(soup, url)
+@command(
+    "scrape_urls",
+    "同时抓取多个网页的文本",
+    '"urls": "<list_of_urls>"',
+)
+def scrape_urls(urls: str | list[str]) -> str:
+    """Fetch several webpages concurrently and extract the start of their text
 
-    return format_hyperlinks(hyperlinks)
+    At most BATCH_SCRAPE_MAX_WORKERS pages are fetched at a time, and at most
+    BATCH_SCRAPE_MAX_CONNECTIONS_PER_HOST from the same host.
+
+    Args:
+        urls (str | list[str]): The URLs, as a list or separated by commas or spaces
+
+    Returns:
+        str: The extract of every page, or the error fetching it, in order
+    """
+    if isinstance(urls, str):
+        urls = re.split(r"[\s,]+", urls)
+    urls = list(dict.fromkeys(url.strip() for url in urls if url.strip()))
+    if not urls:
+        return "Error: No URLs to scrape"
+    skipped = len(urls) - BATCH_SCRAPE_MAX_URLS
+
+    with ThreadPoolExecutor(max_workers=CFG.batch_scrape_max_workers) as executor:
+        extracts = list(executor.map(scrape_extract, urls[:BATCH_SCRAPE_MAX_URLS]))
+
+    result = "\n\n".join(extracts)
+    if skipped > 0:
+        result += (
+            f"\n\nSkipped the last {skipped} URLs, scrape at most"
+            f" {BATCH_SCRAPE_MAX_URLS} at once"
+        )
+    return result
+
+
+def scrape_extract(url: str) -> str:
+    """Fetch a page and format the start of its text and its first links
+
+    Args:
+        url (str): The URL of the page
+
+    Returns:
+        str: The extract of the page, or the error fetching it
+    """
+    try:
+        html = fetch_page(url)
+    except (ValueError, requests.exceptions.RequestException) as e:
+        return f"URL: {url}\nError: {e}"
+
+    text, hyperlinks = extract_response(url, html)
+    if len(text) > BATCH_SCRAPE_EXTRACT_LENGTH:
+        text = text[:BATCH_SCRAPE_EXTRACT_LENGTH] + "..."
+    links = format_hyperlinks(hyperlinks[:BATCH_SCRAPE_LINKS])
+    return f"URL: {url}\nText: {text}\nLinks: {links}"
+
+
+@validate_url
+def fetch_page(url: str) -> str:
+    """Fetch a page within the limits of scrape_urls
+
+    The body is read up to BATCH_SCRAPE_MAX_SIZE_KB, and the page must arrive within
+    BATCH_SCRAPE_TIMEOUT seconds. Complete pages are stored in the HTTP cache.
+
+    Args:
+        url (str): The URL of the page
+
+    Returns:
+        str: The HTML of the page, truncated to the size limit
+
+    Raises:
+        ValueError: If the URL is invalid
+        requests.exceptions.RequestException: If the HTTP request fails
+    """
+    timeout = CFG.batch_scrape_timeout
+    max_size = CFG.batch_scrape_max_size_kb * 1024
+    deadline = time.monotonic() + timeout
+    with host_connection(urlparse(url).netloc):
+        with session.get(url, timeout=timeout, stream=True) as response:
+            response.raise_for_status()
+            content = bytearray()
+            for chunk in response.iter_content(64 * 1024):
+                content += chunk
+                if len(content) > max_size:
+                    break
+                if time.monotonic() > deadline:
+                    raise requests.exceptions.Timeout(
+                        f"The page took more than {timeout} seconds"
+                    )
+
+    html = content[:max_size].decode(response.encoding or "utf-8", errors="replace")
+    complete = len(content) <= max_size
+    if complete and not getattr(response, "from_cache", False):
+        HttpCache().put(
+            url, response.status_code, response.headers, bytes(content), text_hash(html)
+        )
+    return html
+
+
+@contextmanager
+def host_connection(host: str) -> Iterator[None]:
+    """Wait for one of the BATCH_SCRAPE_MAX_CONNECTIONS_PER_HOST slots of a host"""
+    with host_semaphores_lock:
+        if host not in host_semaphores:
+            host_semaphores[host] = threading.BoundedSemaphore(
+                CFG.batch_scrape_max_connections_per_host
+            )
+        semaphore = host_semaphores[host]
+    with semaphore:
+        yield
+
+
+def extract_response(url: str, html: str) -> tuple[str, list[tuple[str, str]]]:
+    """Extract the text and hyperlinks of a page, once per page content
+
+    Args:
+        url (str): The URL of the page, to resolve the hyperlinks
+        html (str): The HTML of the page
+
+    Returns:
+        tuple[str, list[tuple[str, str]]]: The text and hyperlinks of the page
+    """
+    cache = HttpCache()
+    key = text_hash(html)
+    extract = cache.get_extract(key)
+    if extract is None:
+        # Keep the hyperlinks unresolved, the same page can be at several URLs
+        extract = extract_page(html, "")
+        cache.put_extract(key, *extract)
+
+    text, hyperlinks = extract
+    return text, [(link_text, urljoin(url, link)) for link_text, link in hyperlinks]
 
 
 def create_message(chunk, question):
@@ -1,11 +1,16 @@
 """Selenium web scraping module."""
 from __future__ import annotations
 
+import atexit
 import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
 from sys import platform
+from typing import Iterator
 
-from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.chrome.options import Options as ChromeOptions
@@ -21,12 +26,132 @@ from webdriver_manager.firefox import GeckoDriverManager
 import autogpt.processing.text as summary
 from autogpt.commands.command import command
 from autogpt.config import Config
-from autogpt.processing.html import extract_hyperlinks, format_hyperlinks
+from autogpt.processing.html import extract_page, format_hyperlinks
+from autogpt.singleton import Singleton
 from autogpt.url_utils.validators import validate_url
 
 FILE_DIR = Path(__file__).parent.parent
 CFG = Config()
 
+# The Chrome debugging port of the first browser of the pool, the others count up
+REMOTE_DEBUGGING_PORT = 9222
+
+
+@dataclass
+class PooledBrowser:
+    """A browser of the pool, with the number of pages it has browsed"""
+
+    driver: WebDriver
+    pages: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class BrowserPool(metaclass=Singleton):
+    """Browsers kept running between the browse_website commands
+
+    The pool has SELENIUM_POOL_SIZE slots, a command waits for a free one. A slot
+    starts its browser when it is first needed and keeps it for the next commands,
+    with its cookies, storage and extra tabs cleared. Browsers that stopped
+    responding are replaced, and browsers are restarted after
+    SELENIUM_PAGES_PER_BROWSER pages and closed after SELENIUM_POOL_IDLE_TIMEOUT
+    seconds without use.
+    """
+
+    def __init__(self) -> None:
+        self._condition = threading.Condition()
+        self._slots: list[PooledBrowser | None] = [None] * max(
+            CFG.selenium_pool_size, 1
+        )
+        self._free = list(range(len(self._slots)))
+        self._closed = False
+        self._reaper = None
+        atexit.register(self.close)
+
+    @contextmanager
+    def browser(self) -> Iterator[WebDriver]:
+        """Borrow a browser of the pool
+
+        The browser is reset when it is returned, whether the caller succeeded or
+        raised, so that no page state leaks to the next caller. It is closed instead
+        of returned to the pool if a WebDriverException was raised while it was
+        borrowed, if it served its maximum number of pages or if it cannot be reset.
+
+        Yields:
+            WebDriver: A browser on a blank page
+        """
+        slot = self._acquire()
+        try:
+            browser = self._slots[slot]
+            if browser is not None and not is_alive(browser.driver):
+                self._discard(slot)
+            if self._slots[slot] is None:
+                self._slots[slot] = PooledBrowser(create_browser(slot))
+            browser = self._slots[slot]
+
+            crashed = False
+            try:
+                yield browser.driver
+            except WebDriverException:
+                crashed = True
+                raise
+            finally:
+                browser.pages += 1
+                browser.last_used = time.monotonic()
+                if (
+                    crashed
+                    or browser.pages >= CFG.selenium_pages_per_browser
+                    or not reset_browser(browser.driver)
+                ):
+                    self._discard(slot)
+        finally:
+            self._release(slot)
+
+    def close(self) -> None:
+        """Close all the browsers of the pool"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+            for slot in range(len(self._slots)):
+                self._discard(slot)
+
+    def _acquire(self) -> int:
+        with self._condition:
+            while not self._free:
+                self._condition.wait()
+            if self._reaper is None:
+                self._reaper = threading.Thread(
+                    target=self._close_idle_browsers, name="browser-pool", daemon=True
+                )
+                self._reaper.start()
+            return self._free.pop()
+
+    def _release(self, slot: int) -> None:
+        with self._condition:
+            self._free.append(slot)
+            self._condition.notify_all()
+
+    def _discard(self, slot: int) -> None:
+        browser = self._slots[slot]
+        self._slots[slot] = None
+        if browser is not None:
+            close_browser(browser.driver)
+
+    def _close_idle_browsers(self) -> None:
+        with self._condition:
+            while not self._closed:
+                timeout = None
+                for slot in self._free:
+                    browser = self._slots[slot]
+                    if browser is None:
+                        continue
+                    idle = time.monotonic() - browser.last_used
+                    if idle >= CFG.selenium_pool_idle_timeout:
+                        self._discard(slot)
+                    else:
+                        remaining = CFG.selenium_pool_idle_timeout - idle
+                        timeout = min(timeout or remaining, remaining)
+                self._condition.wait(timeout)
+
 
 @command(
     "browse_website",
@@ -45,32 +170,31 @@ def browse_website(url: str, question: str) -> tuple[str, WebDriver]:
         Tuple[str, WebDriver]: The answer and links to the user and the webdriver
     """
     try:
-        driver, text = scrape_text_with_selenium(url)
+        with BrowserPool().browser() as driver:
+            text, hyperlinks = scrape_page_with_selenium(driver, url)
+            add_header(driver)
+            summary_text = summary.summarize_text(url, text, question, driver)
+            links = format_hyperlinks(hyperlinks)
     except WebDriverException as e:
         # These errors are often quite long and include lots of context.
         # Just grab the first line.
         msg = e.msg.split("\n")[0]
         return f"Error: {msg}", None
 
-    add_header(driver)
-    summary_text = summary.summarize_text(url, text, question, driver)
-    links = scrape_links_with_selenium(driver, url)
-
     # Limit links to 5
     if len(links) > 5:
         links = links[:5]
-    close_browser(driver)
     return f"从网页中获取的回答: {summary_text} \n \n 链接: {links}", driver
 
 
-def scrape_text_with_selenium(url: str) -> tuple[WebDriver, str]:
-    """Scrape text from a website using selenium
+def create_browser(slot: int = 0) -> WebDriver:
+    """Start the browser set by USE_WEB_BROWSER
 
     Args:
-        url (str): The url of the website to scrape
+        slot (int): The slot of the browser in the pool, which sets its debugging port
 
     Returns:
-        Tuple[WebDriver, str]: The webdriver and the text scraped from the website
+        WebDriver: The webdriver of the browser
     """
     logging.getLogger("selenium").setLevel(logging.CRITICAL)
 
@@ -99,7 +223,9 @@ def scrape_text_with_selenium(url: str) -> tuple[WebDriver, str]:
     else:
         if platform == "linux" or platform == "linux2":
             options.add_argument("--disable-dev-shm-usage")
-            options.add_argument("--remote-debugging-port=9222")
+            options.add_argument(
+                f"--remote-debugging-port={REMOTE_DEBUGGING_PORT + slot}"
+            )
 
         options.add_argument("--no-sandbox")
         if CFG.selenium_headless:
@@ -114,6 +240,73 @@ def scrape_text_with_selenium(url: str) -> tuple[WebDriver, str]:
             else ChromeDriverManager().install(),
             options=options,
         )
+    return driver
+
+
+def is_alive(driver: WebDriver) -> bool:
+    """Check that a browser still responds
+
+    Args:
+        driver (WebDriver): The webdriver of the browser
+
+    Returns:
+        bool: Whether the browser responded
+    """
+    try:
+        driver.window_handles
+        return True
+    except Exception:
+        return False
+
+
+def reset_browser(driver: WebDriver) -> bool:
+    """Clear what a page left in the browser, so the next one starts clean
+
+    The extra tabs are closed, and the storage of the page and the cookies cleared,
+    before going to a blank page.
+
+    Args:
+        driver (WebDriver): The webdriver of the browser
+
+    Returns:
+        bool: Whether the browser could be reset
+    """
+    try:
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        try:
+            driver.execute_script(
+                "window.localStorage.clear(); window.sessionStorage.clear();"
+            )
+        except WebDriverException:
+            # Pages without storage, like about:blank
+            pass
+        if isinstance(driver, webdriver.Chrome):
+            # delete_all_cookies only deletes the cookies of the current domain
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        driver.delete_all_cookies()
+        driver.get("about:blank")
+        return True
+    except Exception:
+        return False
+
+
+def scrape_page_with_selenium(
+    driver: WebDriver, url: str
+) -> tuple[str, list[tuple[str, str]]]:
+    """Load a website and extract its text and hyperlinks from one parse of its DOM
+
+    Args:
+        driver (WebDriver): The webdriver to use to scrape the website
+        url (str): The url of the website to scrape
+
+    Returns:
+        tuple[str, list[tuple[str, str]]]: The text scraped from the website and its
+            hyperlinks
+    """
     driver.get(url)
 
     WebDriverWait(driver, 10).until(
@@ -121,17 +314,22 @@ def scrape_text_with_selenium(url: str) -> tuple[WebDriver, str]:
     )
 
     # Get the HTML content directly from the browser's DOM
-    page_source = driver.execute_script("return document.body.outerHTML;")
-    soup = BeautifulSoup(page_source, "html.parser")
+    page_source = driver.execute_script("return document.documentElement.outerHTML;")
+    return extract_page(page_source, url)
 
-    for script in soup(["script", "style"]):
-        script.extract()
 
-    text = soup.get_text()
-    lines = (line.strip() for line in text.splitlines())
-    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-    text = "\n".join(chunk for chunk in chunks if chunk)
-    return driver, text
+def scrape_text_with_selenium(driver: WebDriver, url: str) -> str:
+    """Scrape text from a website using selenium
+
+    Args:
+        driver (WebDriver): The webdriver to use to scrape the website
+        url (str): The url of the website to scrape
+
+    Returns:
+        str: The text scraped from the website
+    """
+    text, _ = scrape_page_with_selenium(driver, url)
+    return text
 
 
 def scrape_links_with_selenium(driver: WebDriver, url: str) -> list[str]:
@@ -143,13 +341,7 @@ def scrape_links_with_selenium(driver: WebDriver, url: str) -> list[str]:
     Returns:
         List[str]: The links scraped from the website
     """
-    page_source = driver.page_source
-    soup = BeautifulSoup(page_source, "html.parser")
-
-    for script in soup(["script", "style"]):
-        script.extract()
-
-    hyperlinks = extract_hyperlinks(soup, url)
+    _, hyperlinks = extract_page(driver.page_source, url)
 
     return format_hyperlinks(hyperlinks)
 
@@ -42,17 +42,38 @@ class Config(metaclass=Singleton):
         self.smart_llm_model = os.getenv("SMART_LLM_MODEL", "gpt-4")
         self.fast_token_limit = int(os.getenv("FAST_TOKEN_LIMIT", 4000))
         self.smart_token_limit = int(os.getenv("SMART_TOKEN_LIMIT", 8000))
+        self.summary_memory_mode = os.getenv("SUMMARY_MEMORY_MODE", "strict")
         self.embedding_model = os.getenv("EMBEDDING_MODEL", "text-embedding-ada-002")
         self.embedding_tokenizer = os.getenv("EMBEDDING_TOKENIZER", "cl100k_base")
         self.embedding_token_limit = int(os.getenv("EMBEDDING_TOKEN_LIMIT", 8191))
+        self.embedding_cache = os.getenv("EMBEDDING_CACHE", "True") == "True"
+        self.embedding_cache_path = os.getenv("EMBEDDING_CACHE_PATH")
+        self.embedding_cache_max_entries = int(
+            os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", 20000)
+        )
         self.browse_chunk_max_length = int(os.getenv("BROWSE_CHUNK_MAX_LENGTH", 3000))
         self.browse_spacy_language_model = os.getenv(
             "BROWSE_SPACY_LANGUAGE_MODEL", "en_core_web_sm"
         )
+        self.browse_sentence_splitter = os.getenv("BROWSE_SENTENCE_SPLITTER", "spacy")
+        self.browse_memory_background = (
+            os.getenv("BROWSE_MEMORY_BACKGROUND", "False") == "True"
+        )
+        self.browse_summary_cache = os.getenv("BROWSE_SUMMARY_CACHE", "True") == "True"
+        self.browse_summary_cache_max_entries = int(
+            os.getenv("BROWSE_SUMMARY_CACHE_MAX_ENTRIES", 1000)
+        )
+        self.browse_summary_max_workers = int(
+            os.getenv("BROWSE_SUMMARY_MAX_WORKERS", 4)
+        )
 
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
         self.temperature = float(os.getenv("TEMPERATURE", "0"))
+        self.openai_max_connections = int(os.getenv("OPENAI_MAX_CONNECTIONS", 10))
         self.use_azure = os.getenv("USE_AZURE") == "True"
+        self.azure_embedding_max_batch_inputs = int(
+            os.getenv("AZURE_EMBEDDING_MAX_BATCH_INPUTS", 1)
+        )
         self.execute_local_commands = (
             os.getenv("EXECUTE_LOCAL_COMMANDS", "False") == "True"
         )
@@ -121,6 +142,25 @@ class Config(metaclass=Singleton):
         # Selenium browser settings
         self.selenium_web_browser = os.getenv("USE_WEB_BROWSER", "chrome")
         self.selenium_headless = os.getenv("HEADLESS_BROWSER", "True") == "True"
+        self.selenium_pool_size = int(os.getenv("SELENIUM_POOL_SIZE", 1))
+        self.selenium_pool_idle_timeout = float(
+            os.getenv("SELENIUM_POOL_IDLE_TIMEOUT", 300)
+        )
+        self.selenium_pages_per_browser = int(
+            os.getenv("SELENIUM_PAGES_PER_BROWSER", 50)
+        )
+
+        self.http_cache = os.getenv("HTTP_CACHE", "True") == "True"
+        self.http_cache_path = os.getenv("HTTP_CACHE_PATH")
+        self.http_cache_max_size_mb = int(os.getenv("HTTP_CACHE_MAX_SIZE_MB", 100))
+        self.http_cache_ttl = float(os.getenv("HTTP_CACHE_TTL", 86400))
+
+        self.batch_scrape_max_workers = int(os.getenv("BATCH_SCRAPE_MAX_WORKERS", 8))
+        self.batch_scrape_max_connections_per_host = int(
+            os.getenv("BATCH_SCRAPE_MAX_CONNECTIONS_PER_HOST", 2)
+        )
+        self.batch_scrape_timeout = float(os.getenv("BATCH_SCRAPE_TIMEOUT", 15))
+        self.batch_scrape_max_size_kb = int(os.getenv("BATCH_SCRAPE_MAX_SIZE_KB", 2048))
 
         # User agent header to use when making HTTP requests
         # Some websites might just completely deny request with an error code if
@@ -136,6 +176,12 @@ class Config(metaclass=Singleton):
         self.redis_password = os.getenv("REDIS_PASSWORD", "")
         self.wipe_redis_on_start = os.getenv("WIPE_REDIS_ON_START", "True") == "True"
         self.memory_index = os.getenv("MEMORY_INDEX", "auto-gpt")
+        self.local_cache_read_only = (
+            os.getenv("LOCAL_CACHE_READ_ONLY", "False") == "True"
+        )
+        self.local_cache_index = os.getenv("LOCAL_CACHE_INDEX", "brute_force")
+        self.local_cache_ivf_nlist = int(os.getenv("LOCAL_CACHE_IVF_NLIST", 0))
+        self.local_cache_ivf_nprobe = int(os.getenv("LOCAL_CACHE_IVF_NPROBE", 8))
         # Note that indexes must be created on db 0 in redis, this is not configurable.
 
         self.memory_backend = os.getenv("MEMORY_BACKEND", "local")
@@ -8,18 +8,26 @@ from autogpt.llm.base import (
     Message,
     ModelInfo,
 )
-from autogpt.llm.chat import chat_with_ai, create_chat_message, generate_context
+from autogpt.llm.chat import (
+    ContextBuilder,
+    chat_with_ai,
+    create_chat_message,
+    generate_context,
+)
+from autogpt.llm.embedding_cache import EmbeddingCache
 from autogpt.llm.llm_utils import (
     call_ai_function,
     chunked_tokens,
     create_chat_completion,
     get_ada_embedding,
+    get_ada_embeddings,
 )
 from autogpt.llm.modelsinfo import COSTS
 from autogpt.llm.token_counter import count_message_tokens, count_string_tokens
 
 __all__ = [
     "ApiManager",
+    "EmbeddingCache",
     "Message",
     "ModelInfo",
     "ChatModelInfo",
@@ -27,12 +35,14 @@ __all__ = [
     "LLMResponse",
     "ChatModelResponse",
     "EmbeddingModelResponse",
+    "ContextBuilder",
     "create_chat_message",
     "generate_context",
     "chat_with_ai",
     "call_ai_function",
     "create_chat_completion",
     "get_ada_embedding",
+    "get_ada_embeddings",
     "chunked_tokens",
     "COSTS",
     "count_message_tokens",
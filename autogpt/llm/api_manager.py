@@ -1,9 +1,11 @@
 from __future__ import annotations
 
-import openai
+import threading
+import time
 
 from autogpt.config import Config
 from autogpt.llm.modelsinfo import COSTS
+from autogpt.llm.providers.openai import OpenAIClient
 from autogpt.logs import logger
 from autogpt.singleton import Singleton
 
@@ -14,12 +16,15 @@ class ApiManager(metaclass=Singleton):
         self.total_completion_tokens = 0
         self.total_cost = 0
         self.total_budget = 0
+        self.rate_limited_until = 0.0
+        self._lock = threading.Lock()
 
     def reset(self):
         self.total_prompt_tokens = 0
         self.total_completion_tokens = 0
         self.total_cost = 0
         self.total_budget = 0.0
+        self.rate_limited_until = 0.0
 
     def create_chat_completion(
         self,
@@ -39,26 +44,57 @@ class ApiManager(metaclass=Singleton):
         Returns:
         str: The AI's response.
         """
+        response = OpenAIClient().create_chat_completion(
+            **self._chat_completion_kwargs(
+                messages, model, temperature, max_tokens, deployment_id
+            )
+        )
+        return self._handle_chat_completion(response, model)
+
+    async def acreate_chat_completion(
+        self,
+        messages: list,  # type: ignore
+        model: str | None = None,
+        temperature: float = None,
+        max_tokens: int | None = None,
+        deployment_id=None,
+    ) -> str:
+        """
+        Create a chat completion and update the cost, without blocking the event loop.
+        Args:
+        messages (list): The list of messages to send to the API.
+        model (str): The model to use for the API call.
+        temperature (float): The temperature to use for the API call.
+        max_tokens (int): The maximum number of tokens for the API call.
+        Returns:
+        str: The AI's response.
+        """
+        response = await OpenAIClient().acreate_chat_completion(
+            **self._chat_completion_kwargs(
+                messages, model, temperature, max_tokens, deployment_id
+            )
+        )
+        return self._handle_chat_completion(response, model)
+
+    @staticmethod
+    def _chat_completion_kwargs(
+        messages, model, temperature, max_tokens, deployment_id
+    ) -> dict:
         cfg = Config()
         if temperature is None:
             temperature = cfg.temperature
+        kwargs = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "api_key": cfg.openai_api_key,
+        }
         if deployment_id is not None:
-            response = openai.ChatCompletion.create(
-                deployment_id=deployment_id,
-                model=model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
-                api_key=cfg.openai_api_key,
-            )
-        else:
-            response = openai.ChatCompletion.create(
-                model=model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
-                api_key=cfg.openai_api_key,
-            )
+            kwargs["deployment_id"] = deployment_id
+        return kwargs
+
+    def _handle_chat_completion(self, response, model):
         logger.debug(f"Response: {response}")
         prompt_tokens = response.usage.prompt_tokens
         completion_tokens = response.usage.completion_tokens
@@ -74,14 +110,33 @@ class ApiManager(metaclass=Singleton):
         completion_tokens (int): The number of tokens used in the completion.
         model (str): The model used for the API call.
         """
-        self.total_prompt_tokens += prompt_tokens
-        self.total_completion_tokens += completion_tokens
-        self.total_cost += (
-            prompt_tokens * COSTS[model]["prompt"]
-            + completion_tokens * COSTS[model]["completion"]
-        ) / 1000
+        with self._lock:
+            self.total_prompt_tokens += prompt_tokens
+            self.total_completion_tokens += completion_tokens
+            self.total_cost += (
+                prompt_tokens * COSTS[model]["prompt"]
+                + completion_tokens * COSTS[model]["completion"]
+            ) / 1000
         logger.debug(f"Total running cost: ${self.total_cost:.3f}")
 
+    def back_off(self, seconds: float) -> None:
+        """
+        Delay the next requests of every caller after a rate limit error.
+
+        Args:
+        seconds (float): How long to wait before sending another request.
+        """
+        with self._lock:
+            self.rate_limited_until = max(
+                self.rate_limited_until, time.monotonic() + seconds
+            )
+
+    def wait_for_rate_limit(self) -> None:
+        """Sleep until the delay set by the last rate limit error is over."""
+        delay = self.rate_limited_until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
     def set_total_budget(self, total_budget):
         """
         Sets the total user-defined budget for API calls.
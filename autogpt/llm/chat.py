@@ -1,5 +1,7 @@
 import time
+from bisect import bisect_left
 from random import shuffle
+from typing import List
 
 from openai.error import RateLimitError
 
@@ -12,10 +14,7 @@ from autogpt.logs import logger
 from autogpt.memory_management.store_memory import (
     save_memory_trimmed_from_context_window,
 )
-from autogpt.memory_management.summary_memory import (
-    get_newly_trimmed_messages,
-    update_running_summary,
-)
+from autogpt.memory_management.summary_memory import get_newly_trimmed_messages
 
 cfg = Config()
 
@@ -34,6 +33,65 @@ def create_chat_message(role, content) -> Message:
     return {"role": role, "content": content}
 
 
+class ContextBuilder:
+    """
+    Keeps a running token count of the message history, so that the most recent
+    messages fitting in the context window are found without recounting them.
+
+    `prefix_tokens[i]` is the number of tokens of the first i messages. Messages
+    appended to the history are counted once, the next time it is synced.
+    """
+
+    def __init__(self) -> None:
+        self.full_message_history = None
+        self.model = None
+        self.prefix_tokens = [0]
+
+    def sync(self, full_message_history: List[Message], model: str) -> None:
+        """
+        Count the tokens of the messages appended since the last sync.
+
+        Args:
+        full_message_history (list): The list of all messages sent between the
+            user and the AI.
+        model (str): The model the tokens are counted for.
+        """
+        if (
+            full_message_history is not self.full_message_history
+            or model != self.model
+            or len(full_message_history) < len(self.prefix_tokens) - 1
+        ):
+            self.full_message_history = full_message_history
+            self.model = model
+            self.prefix_tokens = [0]
+
+        for message in full_message_history[len(self.prefix_tokens) - 1 :]:
+            self.prefix_tokens.append(
+                self.prefix_tokens[-1] + count_message_tokens([message], model)
+            )
+
+    def tokens(self, start: int, end: int) -> int:
+        """The number of tokens of the messages in history[start:end]."""
+        return self.prefix_tokens[end] - self.prefix_tokens[start]
+
+    def fit(self, token_budget: int) -> int:
+        """
+        Find the oldest message from which the rest of the history fits the budget.
+
+        Args:
+        token_budget (int): The number of tokens available for the history.
+
+        Returns:
+        int: The index of the first message to include in the context, the length
+            of the history when no message fits.
+        """
+        total = self.prefix_tokens[-1]
+        return min(
+            bisect_left(self.prefix_tokens, total - token_budget),
+            len(self.prefix_tokens) - 1,
+        )
+
+
 def generate_context(prompt, relevant_memory, full_message_history, model):
     current_context = [
         create_chat_message("system", prompt),
@@ -127,31 +185,20 @@ def chat_with_ai(
 
             current_tokens_used += 500  # Account for memory (appended later) TODO: The final memory may be less than 500 tokens
 
-            # Add Messages until the token limit is reached or there are no more messages to add.
-            while next_message_to_add_index >= 0:
-                # print (f"CURRENT TOKENS USED: {current_tokens_used}")
-                message_to_add = full_message_history[next_message_to_add_index]
-
-                tokens_to_add = count_message_tokens([message_to_add], model)
-                if current_tokens_used + tokens_to_add > send_token_limit:
-                    # save_memory_trimmed_from_context_window(
-                    #     full_message_history,
-                    #     next_message_to_add_index,
-                    #     permanent_memory,
-                    # )
-                    break
-
-                # Add the most recent message to the start of the current context,
-                #  after the two system prompts.
-                current_context.insert(
-                    insertion_index, full_message_history[next_message_to_add_index]
-                )
-
-                # Count the currently used tokens
-                current_tokens_used += tokens_to_add
-
-                # Move to the next most recent message in the full message history
-                next_message_to_add_index -= 1
+            # Add the most recent messages that fit in the token limit, after the
+            #  two system prompts.
+            context_builder = agent.context_builder
+            context_builder.sync(full_message_history, model)
+            first_message_index = context_builder.fit(
+                send_token_limit - current_tokens_used
+            )
+            current_context[insertion_index:insertion_index] = full_message_history[
+                first_message_index:
+            ]
+            current_tokens_used += context_builder.tokens(
+                first_message_index, len(full_message_history)
+            )
+            next_message_to_add_index = first_message_index - 1
 
             # Insert Memories
             if len(full_message_history) > 0:
@@ -160,14 +207,11 @@ def chat_with_ai(
                     agent.last_memory_index,
                 ) = get_newly_trimmed_messages(
                     full_message_history=full_message_history,
-                    current_context=current_context,
+                    first_message_index=first_message_index,
                     last_memory_index=agent.last_memory_index,
                 )
-                agent.summary_memory = update_running_summary(
-                    current_memory=agent.summary_memory,
-                    new_events=newly_trimmed_messages,
-                )
-                current_context.insert(insertion_index, agent.summary_memory)
+                agent.running_summary.update(newly_trimmed_messages)
+                current_context.insert(insertion_index, agent.running_summary.message())
 
             api_manager = ApiManager()
             # inform the AI about its remaining budget (if it has one)
@@ -0,0 +1,124 @@
+"""A persistent cache of embeddings keyed by model and text content."""
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import unicodedata
+from typing import List, Optional
+
+import numpy as np
+
+from autogpt.config import Config
+from autogpt.logs import logger
+from autogpt.singleton import Singleton
+from autogpt.sqlite_store import SQLiteStore, store_path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key TEXT PRIMARY KEY,
+    embedding BLOB NOT NULL,
+    last_used INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used);
+"""
+
+
+class EmbeddingCache(metaclass=Singleton):
+    """
+    Stores embeddings in SQLite, keyed by the model and the sha256 of the text.
+
+    The least recently used entries are evicted once the cache holds more than
+    `EMBEDDING_CACHE_MAX_ENTRIES` embeddings. The cache lives in
+    `EMBEDDING_CACHE_PATH`, or in the workspace if that is not set.
+    """
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self._store = SQLiteStore(SCHEMA, lru_table="embeddings")
+
+    @staticmethod
+    def key(model: str, text: str) -> str:
+        """The cache key of a text, insensitive to whitespace differences."""
+        normalized = " ".join(unicodedata.normalize("NFC", text).split())
+        return f"{model}:{hashlib.sha256(normalized.encode('utf-8')).hexdigest()}"
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        cfg = Config()
+        return self._store.connect(
+            store_path(
+                cfg.embedding_cache, cfg.embedding_cache_path, "embedding_cache.sqlite3"
+            )
+        )
+
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Look up the embeddings of several texts.
+
+        Args:
+            model (str): The embedding model
+            texts (List[str]): The texts to look up
+
+        Returns:
+            List[Optional[List[float]]]: The cached embedding of every text, or None
+        """
+        with self._store.lock:
+            connection = self._connect()
+            if connection is None:
+                return [None for _ in texts]
+
+            keys = [self.key(model, text) for text in texts]
+            found = {}
+            for key in set(keys):
+                row = connection.execute(
+                    "SELECT embedding FROM embeddings WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    found[key] = np.frombuffer(row[0], dtype=np.float32).tolist()
+                    self._store.touch(connection, key)
+            connection.commit()
+
+            embeddings = [found.get(key) for key in keys]
+            hits = sum(embedding is not None for embedding in embeddings)
+            self.hits += hits
+            self.misses += len(texts) - hits
+            return embeddings
+
+    def put_many(
+        self, model: str, texts: List[str], embeddings: List[List[float]]
+    ) -> None:
+        """
+        Store the embeddings of several texts, evicting the least recently used.
+
+        Args:
+            model (str): The embedding model
+            texts (List[str]): The embedded texts
+            embeddings (List[List[float]]): The embedding of every text
+        """
+        with self._store.lock:
+            connection = self._connect()
+            if connection is None:
+                return
+
+            for text, embedding in zip(texts, embeddings):
+                self._store.put(
+                    connection,
+                    self.key(model, text),
+                    np.asarray(embedding, dtype=np.float32).tobytes(),
+                )
+            self._store.evict(connection, Config().embedding_cache_max_entries)
+            connection.commit()
+        logger.debug(f"Embedding cache: {self.get_stats()}")
+
+    def get_stats(self) -> dict:
+        """
+        Get the hit and miss counters of the cache.
+
+        Returns:
+            dict: The number of hits, misses and stored entries.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": self._store.entries,
+        }
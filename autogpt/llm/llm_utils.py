@@ -6,7 +6,6 @@ from itertools import islice
 from typing import List, Optional
 
 import numpy as np
-import openai
 import tiktoken
 from colorama import Fore, Style
 from openai.error import APIError, RateLimitError, Timeout
@@ -14,6 +13,8 @@ from openai.error import APIError, RateLimitError, Timeout
 from autogpt.config import Config
 from autogpt.llm.api_manager import ApiManager
 from autogpt.llm.base import Message
+from autogpt.llm.embedding_cache import EmbeddingCache
+from autogpt.llm.providers.openai import OpenAIClient
 from autogpt.logs import logger
 
 
@@ -153,6 +154,7 @@ def create_chat_completion(
     response = None
     for attempt in range(num_retries):
         backoff = 2 ** (attempt + 2)
+        api_manager.wait_for_rate_limit()
         try:
             if cfg.use_azure:
                 response = api_manager.create_chat_completion(
@@ -180,6 +182,9 @@ def create_chat_completion(
                     + f"你可以从这里获取更多信息: {Fore.CYAN}https://docs.agpt.co/setup/#getting-an-api-key{Fore.RESET}"
                 )
                 warned_user = True
+            # Make the concurrent requests wait as well
+            api_manager.back_off(backoff)
+            continue
         except (APIError, Timeout) as e:
             if e.http_status != 502:
                 raise
@@ -227,6 +232,11 @@ def chunked_tokens(text, tokenizer_name, chunk_length):
     yield from chunks_iterator
 
 
+# Limits of a single request to the OpenAI embeddings endpoint
+EMBEDDING_MAX_BATCH_INPUTS = 2048
+EMBEDDING_MAX_BATCH_TOKENS = 100_000
+
+
 def get_ada_embedding(text: str) -> List[float]:
     """Get an embedding from the ada model.
 
@@ -245,16 +255,52 @@ def get_ada_embedding(text: str) -> List[float]:
     else:
         kwargs = {"model": model}
 
-    embedding = create_embedding(text, **kwargs)
+    cache = EmbeddingCache()
+    embedding = cache.get_many(model, [text])[0]
+    if embedding is None:
+        embedding = create_embedding(text, **kwargs)
+        cache.put_many(model, [text], [embedding])
     return embedding
 
 
-@retry_openai_api()
+def get_ada_embeddings(texts: List[str]) -> List[List[float]]:
+    """Get embeddings for several texts from the ada model.
+
+    The texts are sent together in as few requests as the API allows.
+
+    Args:
+        texts (List[str]): The texts to embed.
+
+    Returns:
+        List[List[float]]: The embeddings, in the order of the texts.
+    """
+    cfg = Config()
+    model = cfg.embedding_model
+    texts = [text.replace("\n", " ") for text in texts]
+
+    if cfg.use_azure:
+        kwargs = {"engine": cfg.get_azure_deployment_id_for_model(model)}
+    else:
+        kwargs = {"model": model}
+
+    cache = EmbeddingCache()
+    embeddings = cache.get_many(model, texts)
+    missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    if missing:
+        # Texts repeated within the batch are only embedded once
+        missing_texts = list(dict.fromkeys(texts[i] for i in missing))
+        created = dict(zip(missing_texts, create_embeddings(missing_texts, **kwargs)))
+        cache.put_many(model, missing_texts, list(created.values()))
+        for i in missing:
+            embeddings[i] = created[texts[i]]
+    return embeddings
+
+
 def create_embedding(
     text: str,
     *_,
     **kwargs,
-) -> openai.Embedding:
+) -> List[float]:
     """Create an embedding using the OpenAI API
 
     Args:
@@ -262,34 +308,93 @@ def create_embedding(
         kwargs: Other arguments to pass to the OpenAI API embedding creation call.
 
     Returns:
-        openai.Embedding: The embedding object.
+        List[float]: The embedding.
+    """
+    return create_embeddings([text], **kwargs)[0]
+
+
+def create_embeddings(
+    texts: List[str],
+    *_,
+    **kwargs,
+) -> List[List[float]]:
+    """Create embeddings for several texts using the OpenAI API
+
+    Texts longer than the embedding token limit are split into chunks. The chunks
+    of all texts are packed into as few requests as the API input limits allow,
+    at most AZURE_EMBEDDING_MAX_BATCH_INPUTS with Azure, and the embedding of a
+    text is the length-weighted average of its chunks.
+
+    Args:
+        texts (List[str]): The texts to embed.
+        kwargs: Other arguments to pass to the OpenAI API embedding creation call.
+
+    Returns:
+        List[List[float]]: The embeddings, in the order of the texts.
     """
     cfg = Config()
-    chunk_embeddings = []
-    chunk_lengths = []
-    for chunk in chunked_tokens(
-        text,
-        tokenizer_name=cfg.embedding_tokenizer,
-        chunk_length=cfg.embedding_token_limit,
-    ):
-        embedding = openai.Embedding.create(
-            input=[chunk],
-            api_key=cfg.openai_api_key,
-            **kwargs,
+    chunks = []
+    spans = []
+    for text in texts:
+        start = len(chunks)
+        chunks.extend(
+            chunked_tokens(
+                text,
+                tokenizer_name=cfg.embedding_tokenizer,
+                chunk_length=cfg.embedding_token_limit,
+            )
         )
-        api_manager = ApiManager()
-        api_manager.update_cost(
-            prompt_tokens=embedding.usage.prompt_tokens,
-            completion_tokens=0,
-            model=cfg.embedding_model,
+        spans.append((start, len(chunks)))
+
+    max_inputs = EMBEDDING_MAX_BATCH_INPUTS
+    if cfg.use_azure:
+        max_inputs = min(cfg.azure_embedding_max_batch_inputs, max_inputs)
+
+    chunk_embeddings = []
+    batch = []
+    batch_tokens = 0
+    for chunk in chunks:
+        if batch and (
+            len(batch) >= max_inputs
+            or batch_tokens + len(chunk) > EMBEDDING_MAX_BATCH_TOKENS
+        ):
+            chunk_embeddings.extend(_create_embedding_batch(batch, **kwargs))
+            batch = []
+            batch_tokens = 0
+        batch.append(chunk)
+        batch_tokens += len(chunk)
+    if batch:
+        chunk_embeddings.extend(_create_embedding_batch(batch, **kwargs))
+
+    embeddings = []
+    for start, end in spans:
+        # do weighted avg
+        embedding = np.average(
+            chunk_embeddings[start:end],
+            axis=0,
+            weights=[len(chunk) for chunk in chunks[start:end]],
         )
-        chunk_embeddings.append(embedding["data"][0]["embedding"])
-        chunk_lengths.append(len(chunk))
-
-    # do weighted avg
-    chunk_embeddings = np.average(chunk_embeddings, axis=0, weights=chunk_lengths)
-    chunk_embeddings = chunk_embeddings / np.linalg.norm(
-        chunk_embeddings
-    )  # normalize the length to one
-    chunk_embeddings = chunk_embeddings.tolist()
-    return chunk_embeddings
+        embedding = embedding / np.linalg.norm(embedding)  # normalize the length to one
+        embeddings.append(embedding.tolist())
+    return embeddings
+
+
+@retry_openai_api()
+def _create_embedding_batch(chunks: List[tuple], **kwargs) -> List[List[float]]:
+    """Send one request to the OpenAI embeddings endpoint for a batch of chunks."""
+    cfg = Config()
+    response = OpenAIClient().create_embedding(
+        input=list(chunks),
+        api_key=cfg.openai_api_key,
+        **kwargs,
+    )
+    api_manager = ApiManager()
+    api_manager.update_cost(
+        prompt_tokens=response.usage.prompt_tokens,
+        completion_tokens=0,
+        model=cfg.embedding_model,
+    )
+    return [
+        item["embedding"]
+        for item in sorted(response["data"], key=lambda item: item["index"])
+    ]
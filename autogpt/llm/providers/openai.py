@@ -1,4 +1,14 @@
+import asyncio
+import atexit
+import threading
+from typing import Any, Awaitable, Callable, Optional
+
+import aiohttp
+import openai
+
+from autogpt.config import Config
 from autogpt.llm.base import ChatModelInfo, EmbeddingModelInfo
+from autogpt.singleton import Singleton
 
 OPEN_AI_CHAT_MODELS = {
     "gpt-3.5-turbo": ChatModelInfo(
@@ -35,3 +45,75 @@ OPEN_AI_MODELS = {
     **OPEN_AI_CHAT_MODELS,
     **OPEN_AI_EMBEDDING_MODELS,
 }
+
+
+class OpenAIClient(metaclass=Singleton):
+    """
+    Sends OpenAI requests through a pooled, keep-alive aiohttp session.
+
+    The session lives on an event loop running in a background thread, so that
+    synchronous callers and coroutines on any event loop share the same pool of
+    at most `OPENAI_MAX_CONNECTIONS` connections, and independent requests are
+    sent concurrently.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever, name="openai-client", daemon=True
+                ).start()
+                atexit.register(self.close)
+            return self._loop
+
+    async def _request(self, create: Callable[..., Awaitable], **kwargs) -> Any:
+        # Runs on the client loop, which owns the session
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=Config().openai_max_connections)
+            self._session = aiohttp.ClientSession(connector=connector)
+        openai.aiosession.set(self._session)
+        return await create(**kwargs)
+
+    async def _run(self, create: Callable[..., Awaitable], **kwargs) -> Any:
+        future = asyncio.run_coroutine_threadsafe(
+            self._request(create, **kwargs), self._get_loop()
+        )
+        return await asyncio.wrap_future(future)
+
+    def _run_sync(self, create: Callable[..., Awaitable], **kwargs) -> Any:
+        return asyncio.run_coroutine_threadsafe(
+            self._request(create, **kwargs), self._get_loop()
+        ).result()
+
+    async def acreate_chat_completion(self, **kwargs) -> Any:
+        """Create a chat completion, see `openai.ChatCompletion.create`."""
+        return await self._run(openai.ChatCompletion.acreate, **kwargs)
+
+    async def acreate_embedding(self, **kwargs) -> Any:
+        """Create embeddings, see `openai.Embedding.create`."""
+        return await self._run(openai.Embedding.acreate, **kwargs)
+
+    def create_chat_completion(self, **kwargs) -> Any:
+        """Create a chat completion, blocking until the response is received."""
+        return self._run_sync(openai.ChatCompletion.acreate, **kwargs)
+
+    def create_embedding(self, **kwargs) -> Any:
+        """Create embeddings, blocking until the response is received."""
+        return self._run_sync(openai.Embedding.acreate, **kwargs)
+
+    def close(self) -> None:
+        """Close the pooled connections and stop the event loop."""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        if self._session is not None:
+            asyncio.run_coroutine_threadsafe(self._session.close(), loop).result()
+            self._session = None
+        loop.call_soon_threadsafe(loop.stop)
@@ -1,6 +1,10 @@
 """Functions for counting the number of tokens in a message or string."""
 from __future__ import annotations
 
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
 from typing import List
 
 import tiktoken
@@ -8,6 +12,53 @@ import tiktoken
 from autogpt.llm.base import Message
 from autogpt.logs import logger
 
+# Models whose message format may change over time, counted as a fixed snapshot
+MODEL_ALIASES = {
+    "gpt-3.5-turbo": "gpt-3.5-turbo-0301",
+    "gpt-4": "gpt-4-0314",
+}
+
+
+@functools.lru_cache(maxsize=None)
+def get_encoding(model: str) -> tiktoken.Encoding:
+    """
+    Returns the encoding of a model, loading it only once per process.
+
+    Args:
+        model (str): The name of the model.
+
+    Returns:
+        tiktoken.Encoding: The encoding of the model, cl100k_base if it is unknown.
+    """
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        logger.warn("警告: model没有找到. 使用cl100k_base编码.")
+        return tiktoken.get_encoding("cl100k_base")
+
+
+# The token counts memoized by _count_tokens, least recently used first
+TOKEN_COUNTS_MAX_ENTRIES = 16384
+_token_counts: OrderedDict[tuple[str, bytes], int] = OrderedDict()
+_token_counts_lock = threading.Lock()
+
+
+def _count_tokens(model: str, text: str) -> int:
+    # Memoized so that the messages of a long history are only tokenized once.
+    # Keyed by the sha256 of the text, so that the cache does not keep it alive.
+    key = (model, hashlib.sha256(text.encode("utf-8", "surrogatepass")).digest())
+    with _token_counts_lock:
+        if key in _token_counts:
+            _token_counts.move_to_end(key)
+            return _token_counts[key]
+
+    count = len(get_encoding(model).encode(text))
+    with _token_counts_lock:
+        _token_counts[key] = count
+        if len(_token_counts) > TOKEN_COUNTS_MAX_ENTRIES:
+            _token_counts.popitem(last=False)
+    return count
+
 
 def count_message_tokens(
     messages: List[Message], model: str = "gpt-3.5-turbo-0301"
@@ -24,19 +75,9 @@ def count_message_tokens(
     Returns:
         int: The number of tokens used by the list of messages.
     """
-    try:
-        encoding = tiktoken.encoding_for_model(model)
-    except KeyError:
-        logger.warn("警告: model没有找到. 使用cl100k_base编码.")
-        encoding = tiktoken.get_encoding("cl100k_base")
-    if model == "gpt-3.5-turbo":
-        # !Note: gpt-3.5-turbo may change over time.
-        # Returning num tokens assuming gpt-3.5-turbo-0301.")
-        return count_message_tokens(messages, model="gpt-3.5-turbo-0301")
-    elif model == "gpt-4":
-        # !Note: gpt-4 may change over time. Returning num tokens assuming gpt-4-0314.")
-        return count_message_tokens(messages, model="gpt-4-0314")
-    elif model == "gpt-3.5-turbo-0301":
+    # !Note: gpt-3.5-turbo and gpt-4 may change over time.
+    model = MODEL_ALIASES.get(model, model)
+    if model == "gpt-3.5-turbo-0301":
         tokens_per_message = (
             4  # every message follows <|start|>{role/name}\n{content}<|end|>\n
         )
@@ -54,7 +95,7 @@ def count_message_tokens(
     for message in messages:
         num_tokens += tokens_per_message
         for key, value in message.items():
-            num_tokens += len(encoding.encode(value))
+            num_tokens += _count_tokens(model, value)
             if key == "name":
                 num_tokens += tokens_per_name
     num_tokens += 3  # every reply is primed with <|start|>assistant<|message|>
@@ -72,5 +113,4 @@ def count_string_tokens(string: str, model_name: str) -> int:
     Returns:
         int: The number of tokens in the text string.
     """
-    encoding = tiktoken.encoding_for_model(model_name)
-    return len(encoding.encode(string))
+    return len(get_encoding(model_name).encode(string))
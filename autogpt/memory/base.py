@@ -10,6 +10,12 @@ class MemoryProviderSingleton(AbstractSingleton):
         """Adds to memory"""
         pass
 
+    @abc.abstractmethod
+    def add_many(self, data, embeddings=None):
+        """Adds several entries to memory, embedding them in batches unless their
+        embeddings are given"""
+        pass
+
     @abc.abstractmethod
     def get(self, data):
         """Gets from memory"""
@@ -1,18 +1,27 @@
 from __future__ import annotations
 
+import abc
 import dataclasses
+import os
+import threading
 from pathlib import Path
 from typing import Any, List
 
 import numpy as np
 import orjson
 
-from autogpt.llm import get_ada_embedding
+from autogpt.llm import get_ada_embedding, get_ada_embeddings
+from autogpt.logs import logger
 from autogpt.memory.base import MemoryProviderSingleton
 
 EMBED_DIM = 1536
 SAVE_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_SERIALIZE_DATACLASS
 
+# Smallest capacity of the embedding buffer once the first row is added
+MIN_BUFFER_ROWS = 16
+# Rows the segment must hold before it is folded into the snapshot
+MIN_COMPACTION_ROWS = 1024
+
 
 def create_default_embeddings():
     return np.zeros((0, EMBED_DIM)).astype(np.float32)
@@ -24,6 +33,187 @@ class CacheContent:
     embeddings: np.ndarray = dataclasses.field(
         default_factory=create_default_embeddings
     )
+    snapshot: np.ndarray = dataclasses.field(default_factory=create_default_embeddings)
+
+    def __post_init__(self) -> None:
+        # `snapshot` holds the rows of the on-disk snapshot (usually a read-only
+        # memmap), `embeddings` the rows added since. `embeddings` is always a view
+        # on the first rows of `_buffer`, which is over-allocated so that appending
+        # a row does not copy the whole matrix.
+        self._buffer = np.array(self.embeddings, dtype=np.float32, ndmin=2)
+        self.embeddings = self._buffer[: len(self._buffer)]
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        """The shape of the full embeddings matrix."""
+        return (len(self.snapshot) + len(self.embeddings), self._buffer.shape[1])
+
+    def blocks(self) -> list[np.ndarray]:
+        """The embeddings matrix as consecutive blocks of rows."""
+        return [self.snapshot, self.embeddings]
+
+    def append(self, text: str, vector: np.ndarray) -> None:
+        """
+        Append a text and its embedding, growing the buffer geometrically
+
+        Args:
+            text: str
+            vector: np.ndarray of shape (EMBED_DIM,)
+
+        Returns: None
+        """
+        size = len(self.embeddings)
+        if size == len(self._buffer):
+            capacity = max(MIN_BUFFER_ROWS, 2 * size)
+            buffer = np.empty((capacity, self._buffer.shape[1]), dtype=np.float32)
+            buffer[:size] = self._buffer[:size]
+            self._buffer = buffer
+        self._buffer[size] = vector
+        self.embeddings = self._buffer[: size + 1]
+        self.texts.append(text)
+
+    def rows(self, indices: np.ndarray) -> np.ndarray:
+        """Gather rows of the full embeddings matrix by index."""
+        snapshot_rows = len(self.snapshot)
+        in_snapshot = indices < snapshot_rows
+        rows = np.empty((len(indices), self._buffer.shape[1]), dtype=np.float32)
+        rows[in_snapshot] = self.snapshot[indices[in_snapshot]]
+        rows[~in_snapshot] = self.embeddings[indices[~in_snapshot] - snapshot_rows]
+        return rows
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k highest scores, best first."""
+    if k < len(scores):
+        candidates = np.argpartition(scores, -k)[-k:]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(scores[candidates])[::-1]]
+
+
+class VectorIndex(abc.ABC):
+    """Finds the rows of a CacheContent closest to a query embedding."""
+
+    @abc.abstractmethod
+    def search(self, data: CacheContent, query: np.ndarray, k: int) -> np.ndarray:
+        """Return the indices of the k best matching rows, best first."""
+        pass
+
+    def reset(self) -> None:
+        """Forget everything indexed so far."""
+        pass
+
+
+class BruteForceIndex(VectorIndex):
+    """Exact search scoring every row."""
+
+    def search(self, data: CacheContent, query: np.ndarray, k: int) -> np.ndarray:
+        scores = np.concatenate([np.dot(block, query) for block in data.blocks()])
+        return top_k(scores, k)
+
+
+class IVFIndex(VectorIndex):
+    """
+    Approximate search over an inverted file index.
+
+    The rows are clustered around `nlist` centroids with spherical k-means and a
+    query only scores the rows in its `nprobe` closest clusters. Raising `nprobe`
+    trades latency for recall; `nprobe >= nlist` is an exact search. Rows added
+    after training are assigned to their closest centroid when the next query
+    comes in, and the centroids are retrained once the memory has doubled.
+    """
+
+    def __init__(
+        self, nlist: int = 0, nprobe: int = 8, min_rows: int = 4096, seed: int = 0
+    ) -> None:
+        """
+        Args:
+            nlist: The number of clusters, 0 picks sqrt(rows)
+            nprobe: The number of clusters scanned per query
+            min_rows: Below this many rows searches are exact
+            seed: Seed of the k-means initialization
+        """
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_rows = min_rows
+        self.seed = seed
+        self.exact = BruteForceIndex()
+        self.reset()
+
+    def reset(self) -> None:
+        self.centroids = None
+        self.lists: list[np.ndarray] = []
+        self.indexed_rows = 0
+        self.trained_rows = 0
+
+    def search(self, data: CacheContent, query: np.ndarray, k: int) -> np.ndarray:
+        rows = data.shape[0]
+        if rows < self.indexed_rows:
+            self.reset()
+        if rows < self.min_rows:
+            return self.exact.search(data, query, k)
+        if self.centroids is None or rows >= 2 * self.trained_rows:
+            self.train(data)
+        elif rows > self.indexed_rows:
+            self._assign(data, self.indexed_rows, rows)
+
+        query = np.asarray(query, dtype=np.float32)
+        probes = top_k(np.dot(self.centroids, query), self.nprobe)
+        candidates = np.concatenate([self.lists[i] for i in probes])
+        scores = np.dot(data.rows(candidates), query)
+        return candidates[top_k(scores, k)]
+
+    def train(self, data: CacheContent, iterations: int = 10) -> None:
+        """
+        Cluster a sample of the rows with spherical k-means and assign all rows.
+
+        Args:
+            data: The cache content to index
+            iterations: The number of k-means iterations
+        """
+        rows = data.shape[0]
+        nlist = self.nlist or int(np.sqrt(rows))
+        nlist = max(1, min(nlist, rows))
+        rng = np.random.default_rng(self.seed)
+        sample = data.rows(
+            np.sort(rng.choice(rows, size=min(rows, 64 * nlist), replace=False))
+        )
+
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)]
+        for _ in range(iterations):
+            assignments = np.argmax(np.dot(sample, centroids.T), axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Keep the previous centroid of clusters that lost all their rows
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+
+        self.centroids = centroids
+        self.lists = [np.empty(0, dtype=np.int64) for _ in range(nlist)]
+        self.indexed_rows = 0
+        self._assign(data, 0, rows)
+        self.trained_rows = rows
+
+    def _assign(self, data: CacheContent, start: int, stop: int, batch: int = 8192):
+        new_ids = [[] for _ in self.lists]
+        for offset in range(start, stop, batch):
+            ids = np.arange(offset, min(offset + batch, stop))
+            assignments = np.argmax(np.dot(data.rows(ids), self.centroids.T), axis=1)
+            for cluster in np.unique(assignments):
+                new_ids[cluster].append(ids[assignments == cluster])
+        for cluster, ids in enumerate(new_ids):
+            if ids:
+                self.lists[cluster] = np.concatenate([self.lists[cluster], *ids])
+        self.indexed_rows = stop
+
+
+def create_index(cfg) -> VectorIndex:
+    """Create the vector index selected by LOCAL_CACHE_INDEX."""
+    if cfg.local_cache_index == "ivf":
+        return IVFIndex(
+            nlist=cfg.local_cache_ivf_nlist, nprobe=cfg.local_cache_ivf_nprobe
+        )
+    return BruteForceIndex()
 
 
 class LocalCache(MemoryProviderSingleton):
@@ -32,6 +222,18 @@ class LocalCache(MemoryProviderSingleton):
     def __init__(self, cfg) -> None:
         """Initialize a class instance
 
+        The memory is persisted as a snapshot plus an append-only segment holding
+        the rows added since the snapshot was taken. The snapshot is made of the
+        texts in `{memory_index}.json` and a `{memory_index}.npy` sidecar holding
+        the float32 embeddings, which is memory-mapped read-only when the cache is
+        loaded. The segment holds raw float32 vectors in `{memory_index}.vectors`
+        and one JSON encoded text per line in `{memory_index}.texts`.
+
+        Nothing is read until the data is first accessed. With
+        `LOCAL_CACHE_READ_ONLY=True` the files are never written, so several
+        processes can share one memory index. A lock serializes the reads and
+        writes of the data, which are made from the background memory thread too.
+
         Args:
             cfg: Config object
 
@@ -40,20 +242,102 @@ class LocalCache(MemoryProviderSingleton):
         """
         workspace_path = Path(cfg.workspace_path)
         self.filename = workspace_path / f"{cfg.memory_index}.json"
+        self.embeddings_filename = workspace_path / f"{cfg.memory_index}.npy"
+        self.vectors_filename = workspace_path / f"{cfg.memory_index}.vectors"
+        self.texts_filename = workspace_path / f"{cfg.memory_index}.texts"
+        self.read_only = cfg.local_cache_read_only
+        self.index = create_index(cfg)
+
+        if not self.read_only and (
+            not self.filename.exists() or self.filename.stat().st_size == 0
+        ):
+            with self.filename.open("wb") as f:
+                f.write(b"{}")
+
+        self._data = None
+        self._segment_rows = 0
+        # Reentrant, as compact() runs inside _append() and both read `data`
+        self._lock = threading.RLock()
+
+    @property
+    def data(self) -> CacheContent:
+        with self._lock:
+            if self._data is None:
+                self._data = self._load()
+            return self._data
+
+    def _load(self) -> CacheContent:
+        """
+        Load the snapshot and replay the segment on top of it.
 
-        self.filename.touch(exist_ok=True)
+        Returns: The cache content
+        """
+        try:
+            snapshot = orjson.loads(self.filename.read_bytes() or b"{}")
+        except (FileNotFoundError, orjson.JSONDecodeError):
+            snapshot = {}
+        texts = snapshot.get("texts", [])
+
+        if self.embeddings_filename.exists():
+            embeddings = np.load(self.embeddings_filename, mmap_mode="r")
+        else:
+            # Snapshots written before the sidecar existed keep vectors inline
+            embeddings = np.array(
+                snapshot.get("embeddings", create_default_embeddings()),
+                dtype=np.float32,
+                ndmin=2,
+            ).reshape(-1, EMBED_DIM)
+        rows = min(len(texts), len(embeddings))
+        data = CacheContent(texts=texts[:rows], snapshot=embeddings[:rows])
+
+        try:
+            # The last piece is empty, or a text line cut short by a torn write
+            segment_texts = self.texts_filename.read_bytes().split(b"\n")[:-1]
+            vectors = np.fromfile(self.vectors_filename, dtype=np.float32)
+        except FileNotFoundError:
+            segment_texts, vectors = [], create_default_embeddings()
+        vectors = vectors[: len(vectors) - len(vectors) % EMBED_DIM]
+        vectors = vectors.reshape(-1, EMBED_DIM)
+        self._segment_rows = min(len(segment_texts), len(vectors))
+        segment_texts = segment_texts[: self._segment_rows]
+        if not self.read_only:
+            self._repair_segment(segment_texts)
+        for line, vector in zip(segment_texts, vectors):
+            data.append(orjson.loads(line), vector)
+        return data
+
+    def _repair_segment(self, segment_texts: list[bytes]) -> None:
+        """
+        Cut the segment files back to the rows they both hold.
 
-        file_content = b"{}"
-        with self.filename.open("w+b") as f:
-            f.write(file_content)
+        A torn write may leave one of the files longer than the other, and rows
+        appended after it would then be paired with the wrong text on the next load.
 
-        self.data = CacheContent()
+        Args:
+            segment_texts: The complete text lines of the rows to keep
+
+        Returns: None
+        """
+        sizes = {
+            self.vectors_filename: len(segment_texts)
+            * EMBED_DIM
+            * np.float32().itemsize,
+            self.texts_filename: sum(len(line) + 1 for line in segment_texts),
+        }
+        for filename, size in sizes.items():
+            if filename.exists() and filename.stat().st_size > size:
+                logger.warn(f"Truncating torn segment file {filename} to {size} bytes")
+                os.truncate(filename, size)
 
     def add(self, text: str):
         """
         Add text to our list of texts, add embedding as row to our
             embeddings-matrix
 
+        The row is appended to the segment files; the snapshot is only rewritten
+        once the segment has grown as large as the snapshot, which keeps the
+        amortized cost of an add constant.
+
         Args:
             text: str
 
@@ -61,24 +345,110 @@ class LocalCache(MemoryProviderSingleton):
         """
         if "Command Error:" in text:
             return ""
-        self.data.texts.append(text)
+        if self.read_only:
+            logger.warn("LocalCache is read-only, not adding to memory.")
+            return ""
 
         embedding = get_ada_embedding(text)
+        self._append([text], [embedding])
+        return text
 
-        vector = np.array(embedding).astype(np.float32)
-        vector = vector[np.newaxis, :]
-        self.data.embeddings = np.concatenate(
-            [
-                self.data.embeddings,
-                vector,
-            ],
-            axis=0,
-        )
+    def add_many(
+        self, texts: list[str], embeddings: list[list[float]] | None = None
+    ) -> list[str]:
+        """
+        Add several texts to the memory, embedding them in batched requests
 
-        with open(self.filename, "wb") as f:
-            out = orjson.dumps(self.data, option=SAVE_OPTIONS)
-            f.write(out)
-        return text
+        Args:
+            texts: list[str]
+            embeddings: The embedding of every text, if already known
+
+        Returns: The result of `add` for every text
+        """
+        if self.read_only:
+            logger.warn("LocalCache is read-only, not adding to memory.")
+            return ["" for _ in texts]
+
+        to_add = [i for i, text in enumerate(texts) if "Command Error:" not in text]
+        if to_add:
+            add_texts = [texts[i] for i in to_add]
+            if embeddings is None:
+                add_embeddings = get_ada_embeddings(add_texts)
+            else:
+                add_embeddings = [embeddings[i] for i in to_add]
+            self._append(add_texts, add_embeddings)
+        return ["" if "Command Error:" in text else text for text in texts]
+
+    def _append(self, texts: list[str], embeddings: list[list[float]]) -> None:
+        """
+        Append rows to the data and the segment files, compacting if needed
+
+        Args:
+            texts: list[str]
+            embeddings: list[list[float]]
+
+        Returns: None
+        """
+        with self._lock:
+            vectors = np.array(embeddings).astype(np.float32)
+            for text, vector in zip(texts, vectors):
+                self.data.append(text, vector)
+
+            with open(self.vectors_filename, "ab") as f:
+                f.write(vectors.tobytes())
+            with open(self.texts_filename, "ab") as f:
+                f.write(b"".join(orjson.dumps(text) + b"\n" for text in texts))
+            self._segment_rows += len(texts)
+
+            snapshot_rows = len(self.data.texts) - self._segment_rows
+            if self._segment_rows >= max(MIN_COMPACTION_ROWS, snapshot_rows):
+                self.compact()
+
+    def compact(self) -> None:
+        """
+        Fold the segment into the snapshot and truncate the segment.
+
+        The new snapshot is written next to the old one and moved into place, so
+        processes that have the old snapshot mapped keep a consistent view.
+
+        Returns: None
+        """
+        with self._lock:
+            data = self.data
+            tmp_embeddings = self.embeddings_filename.with_suffix(".tmp.npy")
+            embeddings = np.lib.format.open_memmap(
+                tmp_embeddings, mode="w+", dtype=np.float32, shape=data.shape
+            )
+            offset = 0
+            for block in data.blocks():
+                embeddings[offset : offset + len(block)] = block
+                offset += len(block)
+            embeddings.flush()
+            del embeddings
+
+            tmp_filename = self.filename.with_suffix(".json.tmp")
+            with open(tmp_filename, "wb") as f:
+                f.write(orjson.dumps({"texts": data.texts}))
+
+            # Release the mapping of the old snapshot before it is replaced
+            texts = data.texts
+            self._data = None
+            del data
+
+            os.replace(tmp_embeddings, self.embeddings_filename)
+            os.replace(tmp_filename, self.filename)
+            self._truncate_segment()
+
+            self._data = CacheContent(
+                texts=texts,
+                snapshot=np.load(self.embeddings_filename, mmap_mode="r"),
+            )
+
+    def _truncate_segment(self) -> None:
+        for filename in (self.vectors_filename, self.texts_filename):
+            with open(filename, "wb"):
+                pass
+        self._segment_rows = 0
 
     def clear(self) -> str:
         """
@@ -86,8 +456,18 @@ class LocalCache(MemoryProviderSingleton):
 
         Returns: A message indicating that the memory has been cleared.
         """
-        self.data = CacheContent()
-        return "Obliviated"
+        if self.read_only:
+            logger.warn("LocalCache is read-only, not clearing the memory.")
+            return ""
+
+        with self._lock:
+            self._data = CacheContent()
+            self.index.reset()
+            with self.filename.open("wb") as f:
+                f.write(b"{}")
+            self.embeddings_filename.unlink(missing_ok=True)
+            self._truncate_segment()
+            return "Obliviated"
 
     def get(self, data: str) -> list[Any] | None:
         """
@@ -113,14 +493,13 @@ class LocalCache(MemoryProviderSingleton):
         """
         embedding = get_ada_embedding(text)
 
-        scores = np.dot(self.data.embeddings, embedding)
-
-        top_k_indices = np.argsort(scores)[-k:][::-1]
-
-        return [self.data.texts[i] for i in top_k_indices]
+        with self._lock:
+            top_k_indices = self.index.search(self.data, np.asarray(embedding), k)
+            return [self.data.texts[i] for i in top_k_indices]
 
     def get_stats(self) -> tuple[int, tuple[int, ...]]:
         """
         Returns: The stats of the local cache.
         """
-        return len(self.data.texts), self.data.embeddings.shape
+        with self._lock:
+            return len(self.data.texts), self.data.shape
@@ -4,7 +4,7 @@ import re
 from pymilvus import Collection, CollectionSchema, DataType, FieldSchema, connections
 
 from autogpt.config import Config
-from autogpt.llm import get_ada_embedding
+from autogpt.llm import get_ada_embedding, get_ada_embeddings
 from autogpt.memory.base import MemoryProviderSingleton
 
 
@@ -107,6 +107,29 @@ class MilvusMemory(MemoryProviderSingleton):
         )
         return _text
 
+    def add_many(
+        self, data: list[str], embeddings: list[list[float]] | None = None
+    ) -> list[str]:
+        """Add the embeddings of several texts into memory in one insert.
+
+        Args:
+            data (list[str]): The raw texts to construct embedding indexes.
+            embeddings (list[list[float]] | None): The embedding of every text, if
+                already known.
+
+        Returns:
+            list[str]: log for every text.
+        """
+        if not data:
+            return []
+        if embeddings is None:
+            embeddings = get_ada_embeddings(data)
+        result = self.collection.insert([embeddings, data])
+        return [
+            f"Inserting data into memory at primary key: {primary_key}:\n data: {item}"
+            for primary_key, item in zip(result.primary_keys, data)
+        ]
+
     def get(self, data):
         """Return the most relevant data in memory.
         Args:
@@ -33,6 +33,20 @@ class NoMemory(MemoryProviderSingleton):
         """
         return ""
 
+    def add_many(
+        self, data: list[str], embeddings: list[list[float]] | None = None
+    ) -> list[str]:
+        """
+        Adds several data points to the memory. No action is taken in NoMemory.
+
+        Args:
+            data: The data to add.
+            embeddings: The embedding of every data point, ignored.
+
+        Returns: An empty string for every data point.
+        """
+        return ["" for _ in data]
+
     def get(self, data: str) -> list[Any] | None:
         """
         Gets the data from the memory that is most relevant to the given data.
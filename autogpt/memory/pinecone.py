@@ -1,10 +1,13 @@
 import pinecone
 from colorama import Fore, Style
 
-from autogpt.llm import get_ada_embedding
+from autogpt.llm import get_ada_embedding, get_ada_embeddings
 from autogpt.logs import logger
 from autogpt.memory.base import MemoryProviderSingleton
 
+# Vectors per upsert request, Pinecone rejects requests larger than 2MB
+UPSERT_BATCH_SIZE = 100
+
 
 class PineconeMemory(MemoryProviderSingleton):
     def __init__(self, cfg):
@@ -54,6 +57,23 @@ class PineconeMemory(MemoryProviderSingleton):
         self.vec_num += 1
         return _text
 
+    def add_many(self, data, embeddings=None):
+        if embeddings is not None:
+            vectors = embeddings
+        else:
+            vectors = get_ada_embeddings(data) if data else []
+        items = []
+        messages = []
+        for item, vector in zip(data, vectors):
+            items.append((str(self.vec_num), vector, {"raw_text": item}))
+            messages.append(
+                f"Inserting data into memory at index: {self.vec_num}:\n data: {item}"
+            )
+            self.vec_num += 1
+        if items:
+            self.index.upsert(items, batch_size=UPSERT_BATCH_SIZE, show_progress=False)
+        return messages
+
     def get(self, data):
         return self.get_relevant(data, 1)
 
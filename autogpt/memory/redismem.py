@@ -10,7 +10,7 @@ from redis.commands.search.field import TextField, VectorField
 from redis.commands.search.indexDefinition import IndexDefinition, IndexType
 from redis.commands.search.query import Query
 
-from autogpt.llm import get_ada_embedding
+from autogpt.llm import get_ada_embedding, get_ada_embeddings
 from autogpt.logs import logger
 from autogpt.memory.base import MemoryProviderSingleton
 
@@ -101,6 +101,39 @@ class RedisMemory(MemoryProviderSingleton):
         pipe.execute()
         return _text
 
+    def add_many(
+        self, data: list[str], embeddings: list[list[float]] | None = None
+    ) -> list[str]:
+        """
+        Adds several data points to the memory in one pipeline.
+
+        Args:
+            data: The data to add.
+            embeddings: The embedding of every data point, if already known.
+
+        Returns: A message for every data point indicating that it has been added.
+        """
+        indices = [i for i, item in enumerate(data) if "Command Error:" not in item]
+        to_add = [data[i] for i in indices]
+        if embeddings is not None:
+            vectors = [embeddings[i] for i in indices]
+        else:
+            vectors = get_ada_embeddings(to_add) if to_add else []
+        messages = {}
+        pipe = self.redis.pipeline()
+        for item, vector in zip(to_add, vectors):
+            vector = np.array(vector).astype(np.float32).tobytes()
+            data_dict = {b"data": item, "embedding": vector}
+            pipe.hset(f"{self.cfg.memory_index}:{self.vec_num}", mapping=data_dict)
+            messages[item] = (
+                f"Inserting data into memory at index: {self.vec_num}:\n"
+                f"data: {item}"
+            )
+            self.vec_num += 1
+        pipe.set(f"{self.cfg.memory_index}-vec_num", self.vec_num)
+        pipe.execute()
+        return [messages.get(item, "") for item in data]
+
     def get(self, data: str) -> list[Any] | None:
         """
         Gets the data from the memory that is most relevant to the given data.
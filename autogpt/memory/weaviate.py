@@ -3,7 +3,7 @@ from weaviate import Client
 from weaviate.embedded import EmbeddedOptions
 from weaviate.util import generate_uuid5
 
-from autogpt.llm import get_ada_embedding
+from autogpt.llm import get_ada_embedding, get_ada_embeddings
 from autogpt.logs import logger
 from autogpt.memory.base import MemoryProviderSingleton
 
@@ -86,6 +86,28 @@ class WeaviateMemory(MemoryProviderSingleton):
 
         return f"Inserting data into memory at uuid: {doc_uuid}:\n data: {data}"
 
+    def add_many(self, data, embeddings=None):
+        if embeddings is not None:
+            vectors = embeddings
+        else:
+            vectors = get_ada_embeddings(data) if data else []
+        messages = []
+
+        with self.client.batch as batch:
+            for item, vector in zip(data, vectors):
+                doc_uuid = generate_uuid5(item, self.index)
+                batch.add_data_object(
+                    uuid=doc_uuid,
+                    data_object={"raw_text": item},
+                    class_name=self.index,
+                    vector=vector,
+                )
+                messages.append(
+                    f"Inserting data into memory at uuid: {doc_uuid}:\n data: {item}"
+                )
+
+        return messages
+
     def get(self, data):
         return self.get_relevant(data, 1)
 
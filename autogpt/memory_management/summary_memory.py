@@ -1,6 +1,9 @@
 import copy
 import json
-from typing import Dict, List, Tuple
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
+
 from autogpt.config import Config
 from autogpt.llm.llm_utils import create_chat_completion
 from autogpt.logs import logger
@@ -10,39 +13,35 @@ cfg = Config()
 
 def get_newly_trimmed_messages(
     full_message_history: List[Dict[str, str]],
-    current_context: List[Dict[str, str]],
+    first_message_index: int,
     last_memory_index: int,
 ) -> Tuple[List[Dict[str, str]], int]:
     """
-    This function returns a list of dictionaries contained in full_message_history
-    with an index higher than prev_index that are absent from current_context.
+    This function returns the messages of full_message_history with an index higher
+    than last_memory_index that were trimmed from the current context.
+
+    The context holds the messages from first_message_index onwards, so the newly
+    trimmed messages are the ones between last_memory_index and first_message_index.
 
     Args:
         full_message_history (list): A list of dictionaries representing the full message history.
-        current_context (list): A list of dictionaries representing the current context.
+        first_message_index (int): The index of the oldest message in the current context.
         last_memory_index (int): An integer representing the previous index.
 
     Returns:
         list: A list of dictionaries that are in full_message_history with an index higher than last_memory_index and absent from current_context.
         int: The new index value for use in the next loop.
     """
-    # Select messages in full_message_history with an index higher than last_memory_index
-    new_messages = [
-        copy.deepcopy(msg) for i, msg in enumerate(full_message_history) if i > last_memory_index
-    ]
-
-    # Remove messages that are already present in current_context
-    new_messages_not_in_context = [
-        msg for msg in new_messages if msg not in current_context
+    newly_trimmed_messages = full_message_history[
+        last_memory_index + 1 : first_message_index
     ]
 
     # Find the index of the last message processed
     new_index = last_memory_index
-    if new_messages_not_in_context:
-        last_message = new_messages_not_in_context[-1]
-        new_index = full_message_history.index(last_message)
+    if newly_trimmed_messages:
+        new_index = first_message_index - 1
 
-    return new_messages_not_in_context, new_index
+    return newly_trimmed_messages, new_index
 
 
 def update_running_summary(
@@ -123,3 +122,78 @@ Latest Development:
     }
 
     return message_to_return
+
+
+class RunningSummary:
+    """
+    The running summary of the messages trimmed from the context window.
+
+    In strict mode the summary is updated before `update` returns. In background
+    mode the trimmed messages are queued and summarized by a worker thread while
+    the agent sends its request, and the latest completed summary is used on the
+    next cycle. Messages queued while the worker is busy are summarized together.
+    """
+
+    def __init__(self, summary: Union[str, Dict[str, str]], mode: str = "strict"):
+        if mode not in ("strict", "background"):
+            raise ValueError(f"Unknown summary memory mode: {mode}")
+        self.summary = summary
+        self.mode = mode
+        self._pending: List[Dict[str, str]] = []
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._future: Optional[Future] = None
+        self._running = False
+
+    def update(self, new_events: List[Dict[str, str]]) -> None:
+        """
+        Add new events to the summary, or queue them in background mode.
+
+        Args:
+            new_events (List[Dict]): The messages trimmed from the context window.
+        """
+        if self.mode == "strict":
+            self.summary = update_running_summary(
+                current_memory=self.summary, new_events=new_events
+            )
+            return
+
+        with self._lock:
+            self._pending.extend(new_events)
+            if not self._running:
+                self._running = True
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=1, thread_name_prefix="running-summary"
+                    )
+                self._future = self._executor.submit(self._summarize_pending)
+
+    def _summarize_pending(self) -> None:
+        while True:
+            with self._lock:
+                new_events, self._pending = self._pending, []
+            try:
+                self.summary = update_running_summary(
+                    current_memory=self.summary, new_events=new_events
+                )
+            except Exception as e:
+                logger.error(f"Error updating the running summary: {e}")
+            with self._lock:
+                if not self._pending:
+                    self._running = False
+                    return
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Wait for the queued events to be summarized."""
+        future = self._future
+        if future is not None:
+            future.result(timeout)
+
+    def message(self) -> Dict[str, str]:
+        """The latest completed summary, as a message to add to the context."""
+        if isinstance(self.summary, dict):
+            return self.summary
+        return {
+            "role": "system",
+            "content": f"This reminds you of these events from your past: \n{self.summary}",
+        }
@@ -4,6 +4,12 @@ from __future__ import annotations
 from bs4 import BeautifulSoup
 from requests.compat import urljoin
 
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+
 
 def extract_hyperlinks(soup: BeautifulSoup, base_url: str) -> list[tuple[str, str]]:
     """Extract hyperlinks from a BeautifulSoup object
@@ -31,3 +37,59 @@ def format_hyperlinks(hyperlinks: list[tuple[str, str]]) -> list[str]:
         List[str]: The formatted hyperlinks
     """
     return [f"{link_text} ({link_url})" for link_text, link_url in hyperlinks]
+
+
+def extract_page(html: str, base_url: str) -> tuple[str, list[tuple[str, str]]]:
+    """Extract the text and the hyperlinks of a page, parsing it once
+
+    The page is parsed with lxml, or with BeautifulSoup and the slower html.parser
+    when lxml is not installed. Scripts and styles are left out of the text.
+
+    Args:
+        html (str): The HTML of the page
+        base_url (str): The base URL of the links
+
+    Returns:
+        tuple[str, list[tuple[str, str]]]: The text of the body of the page, and
+            its hyperlinks as extracted by extract_hyperlinks
+    """
+    if not html.strip():
+        return "", []
+
+    if lxml_html is None:
+        soup = BeautifulSoup(html, "html.parser")
+        for script in soup(["script", "style"]):
+            script.extract()
+        body = soup.body or soup
+        return format_text(body.get_text()), extract_hyperlinks(soup, base_url)
+
+    # Parse the encoded page, lxml refuses strings with an encoding declaration
+    parser = lxml_html.HTMLParser(encoding="utf-8")
+    try:
+        tree = lxml_html.document_fromstring(html.encode("utf-8"), parser=parser)
+    except etree.ParserError:
+        # The page has no element at all, e.g. only comments
+        return "", []
+    etree.strip_elements(tree, "script", "style", with_tail=False)
+    body = tree.find("body")
+    text = (body if body is not None else tree).text_content()
+    hyperlinks = [
+        (link.text_content(), urljoin(base_url, link.get("href")))
+        for link in tree.iter("a")
+        if link.get("href") is not None
+    ]
+    return format_text(text), hyperlinks
+
+
+def format_text(text: str) -> str:
+    """Strip the lines and phrases of a text and drop the empty ones
+
+    Args:
+        text (str): The text of a page
+
+    Returns:
+        str: The non-empty lines and phrases of the text, one per line
+    """
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return "\n".join(chunk for chunk in chunks if chunk)
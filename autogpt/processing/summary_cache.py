@@ -0,0 +1,109 @@
+"""A persistent cache of page summaries keyed by page, question and model."""
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+from typing import Optional
+
+from autogpt.config import Config
+from autogpt.logs import logger
+from autogpt.singleton import Singleton
+from autogpt.sqlite_store import SQLiteStore, store_path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    key TEXT PRIMARY KEY,
+    summary TEXT NOT NULL,
+    last_used INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS summaries_last_used ON summaries (last_used);
+"""
+
+
+class SummaryCache(metaclass=Singleton):
+    """
+    Stores the summaries of web pages in SQLite in the workspace.
+
+    A summary is keyed by the URL, the hash of the text of the page, the question,
+    insensitive to case, whitespace and final punctuation, and the model, so that a
+    page is summarized again when it changed. The least recently used summaries are
+    evicted once the cache holds more than `BROWSE_SUMMARY_CACHE_MAX_ENTRIES`.
+    `BROWSE_SUMMARY_CACHE` turns the cache off.
+    """
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self._store = SQLiteStore(SCHEMA, lru_table="summaries")
+
+    @staticmethod
+    def key(url: str, text: str, question: str, model: str) -> str:
+        """The cache key of the summary of a page for a question."""
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        normalized = " ".join(question.lower().split()).rstrip(" .?!。？！")
+        return hashlib.sha256(
+            "\0".join([url, text_hash, normalized, model]).encode("utf-8")
+        ).hexdigest()
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        cfg = Config()
+        return self._store.connect(
+            store_path(cfg.browse_summary_cache, None, "summary_cache.sqlite3")
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a summary.
+
+        Args:
+            key (str): The key of the summary
+
+        Returns:
+            Optional[str]: The summary, or None
+        """
+        with self._store.lock:
+            connection = self._connect()
+            if connection is None:
+                return None
+
+            row = connection.execute(
+                "SELECT summary FROM summaries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._store.touch(connection, key)
+            connection.commit()
+            return row[0]
+
+    def put(self, key: str, summary: str) -> None:
+        """
+        Store a summary, evicting the least recently used.
+
+        Args:
+            key (str): The key of the summary
+            summary (str): The summary
+        """
+        with self._store.lock:
+            connection = self._connect()
+            if connection is None:
+                return
+
+            self._store.put(connection, key, summary)
+            self._store.evict(connection, Config().browse_summary_cache_max_entries)
+            connection.commit()
+        logger.debug(f"Summary cache: {self.get_stats()}")
+
+    def get_stats(self) -> dict:
+        """
+        Get the hit and miss counters of the cache.
+
+        Returns:
+            dict: The number of hits, misses and stored entries.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": self._store.entries,
+        }
@@ -1,15 +1,77 @@
 """Text processing functions"""
-from typing import Dict, Generator, Optional
+import re
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Generator, Iterator, List, Optional
 
 import spacy
 from selenium.webdriver.remote.webdriver import WebDriver
+from spacy.language import Language
+from tiktoken import Encoding
 
 from autogpt.config import Config
-from autogpt.llm import count_message_tokens, create_chat_completion
+from autogpt.llm import (
+    count_message_tokens,
+    count_string_tokens,
+    create_chat_completion,
+)
+from autogpt.llm.token_counter import get_encoding
 from autogpt.logs import logger
 from autogpt.memory import get_memory
+from autogpt.processing.summary_cache import SummaryCache
 
 CFG = Config()
+memory_executor: Optional[ThreadPoolExecutor] = None
+
+
+# Sentences end with a punctuation mark followed by whitespace, or a full-width one
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|(?<=[。！？])")
+TRAINED_COMPONENTS = [
+    "tok2vec",
+    "transformer",
+    "tagger",
+    "morphologizer",
+    "parser",
+    "senter",
+    "attribute_ruler",
+    "lemmatizer",
+    "ner",
+]
+
+
+@lru_cache(maxsize=None)
+def get_sentencizer(language_model: str) -> Language:
+    """Load a spaCy pipeline that only splits sentences, once per process
+
+    Args:
+        language_model (str): The name of the spaCy language model
+
+    Returns:
+        Language: The tokenizer of the model, followed by a rule-based sentencizer
+    """
+    # Only the tokenizer is needed, skip loading the weights of the trained components
+    nlp = spacy.load(language_model, exclude=TRAINED_COMPONENTS)
+    for name in nlp.pipe_names:
+        nlp.remove_pipe(name)
+    nlp.add_pipe("sentencizer")
+    return nlp
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences, with spaCy or a regex depending on BROWSE_SENTENCE_SPLITTER
+
+    Args:
+        text (str): The text to split
+
+    Returns:
+        List[str]: The sentences of the text
+    """
+    if CFG.browse_sentence_splitter == "regex":
+        sentences = SENTENCE_BOUNDARY.split(text)
+    else:
+        doc = get_sentencizer(CFG.browse_spacy_language_model)(text)
+        sentences = [sent.text for sent in doc.sents]
+    return [sentence.strip() for sentence in sentences if sentence.strip()]
 
 
 def split_text(
@@ -25,49 +87,78 @@ def split_text(
         max_length (int, optional): The maximum length of each chunk. Defaults to 8192.
 
     Yields:
-        str: The next chunk of text
-
-    Raises:
-        ValueError: If the text is longer than the maximum length
+        str: The next chunk of text, sentences longer than a chunk are split
     """
     flatened_paragraphs = " ".join(text.split("\n"))
-    nlp = spacy.load(CFG.browse_spacy_language_model)
-    nlp.add_pipe("sentencizer")
-    doc = nlp(flatened_paragraphs)
-    sentences = [sent.text.strip() for sent in doc.sents]
+    sentences = split_sentences(flatened_paragraphs)
+
+    encoding = get_encoding(model)
+    # The tokens of the message around the chunk, and one for the separating spaces
+    #  joining the sentences
+    chunk_max_tokens = (
+        max_length - count_message_tokens([create_message("", question)], model) - 1
+    )
+    if chunk_max_tokens <= 0:
+        raise ValueError(f"The question does not fit in {max_length} tokens.")
 
     current_chunk = []
+    current_tokens = 0
 
     for sentence in sentences:
-        message_with_additional_sentence = [
-            create_message(" ".join(current_chunk) + " " + sentence, question)
-        ]
-
-        expected_token_usage = (
-            count_message_tokens(messages=message_with_additional_sentence, model=model)
-            + 1
-        )
-        if expected_token_usage <= max_length:
-            current_chunk.append(sentence)
-        else:
+        sentence_tokens = encoding.encode(sentence)
+        if len(sentence_tokens) > chunk_max_tokens:
+            if current_chunk:
+                yield " ".join(current_chunk)
+                current_chunk = []
+                current_tokens = 0
+            yield from split_tokens(encoding, sentence_tokens, chunk_max_tokens)
+            continue
+
+        if current_tokens + len(sentence_tokens) + 1 > chunk_max_tokens:
             yield " ".join(current_chunk)
-            current_chunk = [sentence]
-            message_this_sentence_only = [
-                create_message(" ".join(current_chunk), question)
-            ]
-            expected_token_usage = (
-                count_message_tokens(messages=message_this_sentence_only, model=model)
-                + 1
-            )
-            if expected_token_usage > max_length:
-                raise ValueError(
-                    f"Sentence is too long in webpage: {expected_token_usage} tokens."
-                )
+            current_chunk = []
+            current_tokens = 0
+        current_chunk.append(sentence)
+        current_tokens += len(sentence_tokens) + 1
 
     if current_chunk:
         yield " ".join(current_chunk)
 
 
+def split_tokens(
+    encoding: Encoding, tokens: List[int], max_tokens: int
+) -> Generator[str, None, None]:
+    """Decode tokens in pieces of at most max_tokens, without cutting a character
+
+    A token may hold only part of the bytes of a character, CJK characters often
+    span several tokens, so every cut is moved back to the nearest position where
+    the piece decodes as valid UTF-8.
+
+    Args:
+        encoding (Encoding): The encoding of the tokens
+        tokens (List[int]): The tokens to decode
+        max_tokens (int): The maximum number of tokens of a piece
+
+    Yields:
+        str: The next piece of text
+    """
+    start = 0
+    while start < len(tokens):
+        end = min(start + max_tokens, len(tokens))
+        # A character is at most 4 bytes, so at most 3 tokens are moved back
+        for cut in range(end, max(start, end - 4), -1):
+            try:
+                piece = encoding.decode_bytes(tokens[start:cut]).decode("utf-8")
+            except UnicodeDecodeError:
+                continue
+            end = cut
+            break
+        else:
+            piece = encoding.decode(tokens[start:end])
+        yield piece
+        start = end
+
+
 def summarize_text(
     url: str, text: str, question: str, driver: Optional[WebDriver] = None
 ) -> str:
@@ -86,10 +177,16 @@ def summarize_text(
         return "Error: No text to summarize"
 
     model = CFG.fast_llm_model
+    summary_cache = SummaryCache()
+    cache_key = summary_cache.key(url, text, question, model)
+    cached_summary = summary_cache.get(cache_key)
+    if cached_summary is not None:
+        logger.info(f"Using the summary of {url} from the summary cache")
+        return cached_summary
+
     text_length = len(text)
     logger.info(f"Text length: {text_length} characters")
 
-    summaries = []
     chunks = list(
         split_text(
             text, max_length=CFG.browse_chunk_max_length, model=model, question=question
@@ -97,16 +194,167 @@ def summarize_text(
     )
     scroll_ratio = 1 / len(chunks)
 
-    for i, chunk in enumerate(chunks):
+    summaries = []
+    for i, summary in enumerate(summarize_chunks(chunks, question, model)):
         if driver:
             scroll_to_percentage(driver, scroll_ratio * i)
-        logger.info(f"Adding chunk {i + 1} / {len(chunks)} to memory")
+        summaries.append(summary)
+    logger.info(f"Summarized {len(chunks)} chunks.")
+
+    logger.info(f"Adding {len(chunks)} chunks and their summaries to memory")
+    add_to_memory(
+        [
+            f"Source: {url}\n" f"Raw content part#{i + 1}: {chunk}"
+            for i, chunk in enumerate(chunks)
+        ]
+        + [
+            f"Source: {url}\n" f"Content summary part#{i + 1}: {summary}"
+            for i, summary in enumerate(summaries)
+        ]
+    )
+
+    summary = reduce_summaries(summaries, question, model)
+    summary_cache.put(cache_key, summary)
+    return summary
 
-        memory_to_add = f"Source: {url}\n" f"Raw content part#{i + 1}: {chunk}"
 
-        memory = get_memory(CFG)
-        memory.add(memory_to_add)
+def add_to_memory(texts: List[str]) -> None:
+    """Add texts to memory in one batch, in the background if BROWSE_MEMORY_BACKGROUND
 
+    Background batches are added one at a time, in order, so that the command
+    returns without waiting for the embeddings and the memory backend.
+
+    Args:
+        texts (List[str]): The texts to add to memory
+    """
+    global memory_executor
+
+    memory = get_memory(CFG)
+    if not CFG.browse_memory_background:
+        memory.add_many(texts)
+        return
+
+    if memory_executor is None:
+        memory_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="browse-memory"
+        )
+    future = memory_executor.submit(memory.add_many, texts)
+    future.add_done_callback(log_memory_error)
+
+
+def log_memory_error(future: Future) -> None:
+    """Log the error of a background memory batch, if it failed"""
+    error = future.exception()
+    if error is not None:
+        logger.error(f"Error adding the page to memory: {error}")
+
+
+def reduce_summaries(summaries: List[str], question: str, model: str) -> str:
+    """Combine summaries into one, a prompt of at most BROWSE_CHUNK_MAX_LENGTH at a time
+
+    The summaries are grouped into prompts that fit BROWSE_CHUNK_MAX_LENGTH, and the
+    groups are summarized in parallel, until a single group is left for the final
+    summary. Every level at least halves the number of summaries.
+
+    Args:
+        summaries (List[str]): The summaries of the chunks, in order
+        question (str): The question to ask the model
+        model (str): The model to summarize with
+
+    Returns:
+        str: The summary of the text
+    """
+    groups = group_summaries(summaries, question, model, CFG.browse_chunk_max_length)
+    while len(groups) > 1:
+        logger.info(f"Combining {len(summaries)} summaries in {len(groups)} groups")
+        summaries = list(summarize_chunks(groups, question, model))
+        groups = group_summaries(
+            summaries, question, model, CFG.browse_chunk_max_length
+        )
+
+    messages = [create_message(groups[0], question)]
+
+    return create_chat_completion(
+        model=model,
+        messages=messages,
+    )
+
+
+def group_summaries(
+    summaries: List[str], question: str, model: str, max_length: int
+) -> List[str]:
+    """Join consecutive summaries into groups that fit in one prompt
+
+    Args:
+        summaries (List[str]): The summaries to group
+        question (str): The question to ask the model
+        model (str): The model to count the tokens for
+        max_length (int): The maximum number of tokens of a prompt
+
+    Returns:
+        List[str]: The joined summaries of every group
+    """
+    prompt_tokens = count_message_tokens([create_message("", question)], model) + 1
+    # A summary may take the whole prompt if it is the only one, and half of it
+    #  otherwise, so that every level at least halves the number of summaries
+    summary_max_tokens = max_length - prompt_tokens - 1
+    if len(summaries) > 1:
+        summary_max_tokens = (max_length - prompt_tokens) // 2 - 1
+    if summary_max_tokens <= 0:
+        raise ValueError(f"The question does not fit in {max_length} tokens.")
+
+    groups = []
+    group = []
+    group_tokens = prompt_tokens
+    for summary in summaries:
+        if count_string_tokens(summary, model) > summary_max_tokens:
+            summary = shrink_summary(summary, model, summary_max_tokens)
+        # One more token for the separating newline
+        summary_tokens = count_string_tokens(summary, model) + 1
+        if group and group_tokens + summary_tokens > max_length:
+            groups.append("\n".join(group))
+            group = []
+            group_tokens = prompt_tokens
+        group.append(summary)
+        group_tokens += summary_tokens
+    if group:
+        groups.append("\n".join(group))
+    return groups
+
+
+def shrink_summary(summary: str, model: str, max_tokens: int) -> str:
+    """Cut a summary down to its first max_tokens tokens
+
+    Args:
+        summary (str): The summary to shrink
+        model (str): The model to count the tokens for
+        max_tokens (int): The maximum number of tokens of the summary
+
+    Returns:
+        str: The start of the summary
+    """
+    encoding = get_encoding(model)
+    tokens = encoding.encode(summary)
+    logger.warn(
+        f"Truncating a summary of {len(tokens)} tokens to {max_tokens} tokens to fit"
+        " the prompt"
+    )
+    return next(split_tokens(encoding, tokens, max_tokens))
+
+
+def summarize_chunks(chunks: List[str], question: str, model: str) -> Iterator[str]:
+    """Summarize chunks in parallel, at most BROWSE_SUMMARY_MAX_WORKERS at a time
+
+    Args:
+        chunks (List[str]): The chunks of text to summarize
+        question (str): The question to ask the model
+        model (str): The model to summarize with
+
+    Yields:
+        str: The summary of every chunk, in the order of the chunks
+    """
+
+    def summarize_chunk(i: int, chunk: str) -> str:
         messages = [create_message(chunk, question)]
         tokens_for_chunk = count_message_tokens(messages, model)
         logger.info(
@@ -117,24 +365,13 @@ def summarize_text(
             model=model,
             messages=messages,
         )
-        summaries.append(summary)
         logger.info(
-            f"Added chunk {i + 1} summary to memory, of length {len(summary)} characters"
+            f"Summarized chunk {i + 1}, summary of length {len(summary)} characters"
         )
+        return summary
 
-        memory_to_add = f"Source: {url}\n" f"Content summary part#{i + 1}: {summary}"
-
-        memory.add(memory_to_add)
-
-    logger.info(f"Summarized {len(chunks)} chunks.")
-
-    combined_summary = "\n".join(summaries)
-    messages = [create_message(combined_summary, question)]
-
-    return create_chat_completion(
-        model=model,
-        messages=messages,
-    )
+    with ThreadPoolExecutor(max_workers=CFG.browse_summary_max_workers) as executor:
+        yield from executor.map(summarize_chunk, range(len(chunks)), chunks)
 
 
 def scroll_to_percentage(driver: WebDriver, ratio: float) -> None:
@@ -0,0 +1,126 @@
+"""The SQLite database behind the persistent caches."""
+from __future__ import annotations
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+from autogpt.config import Config
+
+
+def store_path(enabled: bool, path: Optional[str], filename: str) -> Optional[Path]:
+    """
+    Resolve the file of a cache.
+
+    Args:
+        enabled (bool): Whether the cache is turned on
+        path (Optional[str]): The configured file of the cache, if any
+        filename (str): The name of the file in the workspace otherwise
+
+    Returns:
+        Optional[Path]: The file of the cache, or None if there is none
+    """
+    if not enabled:
+        return None
+    if path:
+        return Path(path)
+    workspace_path = Config().workspace_path
+    return Path(workspace_path) / filename if workspace_path else None
+
+
+class SQLiteStore:
+    """
+    A SQLite database shared by the threads of the process, guarded by `lock`.
+
+    The database is opened on first use and reopened when its path changes. When
+    `lru_table` is given, that table is kept as a least recently used cache: its
+    first column is the `key` and its last one the integer `last_used`, and the
+    store counts its entries so that it can evict the oldest ones.
+    """
+
+    def __init__(self, schema: str, lru_table: Optional[str] = None) -> None:
+        """
+        Args:
+            schema (str): The statements creating the tables, run on every open
+            lru_table (Optional[str]): The table evicted least recently used first
+        """
+        self.schema = schema
+        self.lru_table = lru_table
+        self.lock = threading.Lock()
+        self.entries = 0
+        self._clock = 0
+        self._connection: Optional[sqlite3.Connection] = None
+        self._path: Optional[Path] = None
+
+    def connect(self, path: Optional[Path]) -> Optional[sqlite3.Connection]:
+        """
+        Get the connection to the database at a path, opening it if needed.
+
+        Args:
+            path (Optional[Path]): The file of the database, None if disabled
+
+        Returns:
+            Optional[sqlite3.Connection]: The connection, or None
+        """
+        if path is None:
+            return None
+
+        if path != self._path:
+            if self._connection is not None:
+                self._connection.close()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(path, check_same_thread=False)
+            self._connection.executescript(self.schema)
+            if self.lru_table:
+                self._clock, self.entries = self._connection.execute(
+                    "SELECT COALESCE(MAX(last_used), 0), COUNT(*)"
+                    f" FROM {self.lru_table}"
+                ).fetchone()
+            self._path = path
+        return self._connection
+
+    def touch(self, connection: sqlite3.Connection, key: str) -> None:
+        """Mark an entry of the LRU table as the most recently used."""
+        self._clock += 1
+        connection.execute(
+            f"UPDATE {self.lru_table} SET last_used = ? WHERE key = ?",
+            (self._clock, key),
+        )
+
+    def put(self, connection: sqlite3.Connection, key: str, *values: Any) -> None:
+        """
+        Insert or replace an entry of the LRU table, as the most recently used.
+
+        Args:
+            connection (sqlite3.Connection): The connection to the database
+            key (str): The key of the entry
+            *values (Any): The columns between the key and last_used
+        """
+        exists = connection.execute(
+            f"SELECT 1 FROM {self.lru_table} WHERE key = ?", (key,)
+        ).fetchone()
+        self._clock += 1
+        placeholders = ", ".join("?" for _ in range(len(values) + 2))
+        connection.execute(
+            f"INSERT OR REPLACE INTO {self.lru_table} VALUES ({placeholders})",
+            (key, *values, self._clock),
+        )
+        if exists is None:
+            self.entries += 1
+
+    def evict(self, connection: sqlite3.Connection, max_entries: int) -> None:
+        """
+        Delete the least recently used entries of the LRU table beyond a maximum.
+
+        Args:
+            connection (sqlite3.Connection): The connection to the database
+            max_entries (int): The number of entries kept
+        """
+        if self.entries > max_entries:
+            cursor = connection.execute(
+                f"DELETE FROM {self.lru_table} WHERE key IN (SELECT key FROM"
+                f" {self.lru_table} ORDER BY last_used LIMIT ?)",
+                (self.entries - max_entries,),
+            )
+            self.entries -= cursor.rowcount
@@ -0,0 +1,390 @@
+"""A persistent HTTP cache for the web requests, with conditional revalidation."""
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import sqlite3
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import List, Optional, Tuple
+
+from requests import PreparedRequest, Response
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3 import HTTPResponse
+
+from autogpt.config import Config
+from autogpt.logs import logger
+from autogpt.singleton import Singleton
+from autogpt.sqlite_store import SQLiteStore, store_path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    content BLOB NOT NULL,
+    content_hash TEXT NOT NULL,
+    expires REAL NOT NULL,
+    last_used REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+CREATE TABLE IF NOT EXISTS extracts (
+    content_hash TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    hyperlinks TEXT NOT NULL
+);
+"""
+
+# The headers of a 304 response that replace the stored ones
+REVALIDATED_HEADERS = ["Cache-Control", "Date", "ETag", "Expires", "Last-Modified"]
+# The headers that describe the encoding of the body, which is stored decoded
+BODY_ENCODING_HEADERS = ["Content-Encoding", "Transfer-Encoding", "Content-Length"]
+
+
+@dataclass
+class CachedResponse:
+    """A response stored in the cache"""
+
+    url: str
+    status: int
+    headers: CaseInsensitiveDict
+    content: bytes
+    expires: float
+
+    def is_fresh(self) -> bool:
+        """Whether the response can be used without asking the server"""
+        return time.time() < self.expires
+
+
+def parse_cache_control(value: str) -> dict:
+    """Parse a Cache-Control header into its directives
+
+    Args:
+        value (str): The value of the header
+
+    Returns:
+        dict: The lowercase directives, with their value or None
+    """
+    directives = {}
+    for directive in value.split(","):
+        name, _, argument = directive.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+
+def freshness_lifetime(headers: CaseInsensitiveDict, max_lifetime: float) -> float:
+    """How long a response stays fresh after it was received, as per RFC 9111
+
+    Args:
+        headers (CaseInsensitiveDict): The headers of the response
+        max_lifetime (float): The upper bound of heuristic lifetimes
+
+    Returns:
+        float: The number of seconds the response is fresh for
+    """
+    directives = parse_cache_control(headers.get("Cache-Control", ""))
+    if "no-cache" in directives:
+        return 0
+    age = float(headers.get("Age", 0) or 0)
+    try:
+        if "max-age" in directives:
+            return int(directives["max-age"]) - age
+        date = parsedate_to_datetime(headers["Date"]) if "Date" in headers else None
+        if "Expires" in headers:
+            expires = parsedate_to_datetime(headers["Expires"])
+            return (expires - date).total_seconds() - age if date else 0
+        if "Last-Modified" in headers and date:
+            # Heuristic freshness, a tenth of the time since the last modification
+            last_modified = parsedate_to_datetime(headers["Last-Modified"])
+            return min((date - last_modified).total_seconds() / 10, max_lifetime)
+    except (TypeError, ValueError):
+        # Invalid dates mean that the response is already stale
+        return 0
+    return 0
+
+
+class HttpCache(metaclass=Singleton):
+    """
+    Stores responses to GET requests in SQLite, keyed by URL.
+
+    Responses are used without a request while they are fresh according to their
+    Cache-Control or Expires headers, and revalidated with their ETag or
+    Last-Modified header once stale. Responses unused for `HTTP_CACHE_TTL` seconds
+    are evicted, and then the least recently used ones while the cache holds more
+    than `HTTP_CACHE_MAX_SIZE_MB`. The text extracted from the pages is kept along,
+    keyed by the hash of their content. The cache lives in `HTTP_CACHE_PATH`, or in
+    the workspace if that is not set.
+    """
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+        self._store = SQLiteStore(SCHEMA)
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        cfg = Config()
+        return self._store.connect(
+            store_path(cfg.http_cache, cfg.http_cache_path, "http_cache.sqlite3")
+        )
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        """
+        Look up the response to a URL.
+
+        Args:
+            url (str): The requested URL
+
+        Returns:
+            Optional[CachedResponse]: The stored response, fresh or not, or None
+        """
+        with self._store.lock:
+            connection = self._connect()
+            if connection is None:
+                return None
+            row = connection.execute(
+                "SELECT status, headers, content, expires FROM responses WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            connection.execute(
+                "UPDATE responses SET last_used = ? WHERE url = ?", (time.time(), url)
+            )
+            connection.commit()
+
+        status, headers, content, expires = row
+        response = CachedResponse(
+            url, status, CaseInsensitiveDict(json.loads(headers)), content, expires
+        )
+        if response.is_fresh():
+            self.hits += 1
+        return response
+
+    def put(
+        self,
+        url: str,
+        status: int,
+        headers: CaseInsensitiveDict,
+        content: bytes,
+        content_hash: str,
+    ) -> None:
+        """
+        Store the response to a URL, if its headers allow it.
+
+        Args:
+            url (str): The requested URL
+            status (int): The status code of the response
+            headers (CaseInsensitiveDict): The headers of the response
+            content (bytes): The decoded body of the response
+            content_hash (str): The hash of the text of the response
+        """
+        directives = parse_cache_control(headers.get("Cache-Control", ""))
+        if "no-store" in directives or headers.get("Vary") == "*":
+            return
+
+        cfg = Config()
+        headers = CaseInsensitiveDict(headers)
+        for name in BODY_ENCODING_HEADERS:
+            headers.pop(name, None)
+        now = time.time()
+        expires = now + freshness_lifetime(headers, cfg.http_cache_ttl)
+        with self._store.lock:
+            connection = self._connect()
+            if connection is None:
+                return
+            connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    url,
+                    status,
+                    json.dumps(dict(headers)),
+                    content,
+                    content_hash,
+                    expires,
+                    now,
+                    len(content),
+                ),
+            )
+            self._evict(connection, now)
+            connection.commit()
+        logger.debug(f"HTTP cache: {self.get_stats()}")
+
+    def revalidate(self, cached: CachedResponse, headers: CaseInsensitiveDict) -> None:
+        """
+        Refresh a stored response with the headers of a 304 Not Modified response.
+
+        Args:
+            cached (CachedResponse): The stored response, which is updated
+            headers (CaseInsensitiveDict): The headers of the 304 response
+        """
+        for name in REVALIDATED_HEADERS:
+            if name in headers:
+                cached.headers[name] = headers[name]
+        cached.expires = time.time() + freshness_lifetime(
+            cached.headers, Config().http_cache_ttl
+        )
+        self.revalidations += 1
+        with self._store.lock:
+            connection = self._connect()
+            if connection is None:
+                return
+            connection.execute(
+                "UPDATE responses SET headers = ?, expires = ? WHERE url = ?",
+                (json.dumps(dict(cached.headers)), cached.expires, cached.url),
+            )
+            connection.commit()
+
+    def get_extract(
+        self, content_hash: str
+    ) -> Optional[Tuple[str, List[Tuple[str, str]]]]:
+        """
+        Look up the text and hyperlinks extracted from a page.
+
+        Args:
+            content_hash (str): The hash of the text of the page
+
+        Returns:
+            Optional[Tuple[str, List[Tuple[str, str]]]]: The text and unresolved
+                hyperlinks of the page, or None
+        """
+        with self._store.lock:
+            connection = self._connect()
+            if connection is None:
+                return None
+            row = connection.execute(
+                "SELECT text, hyperlinks FROM extracts WHERE content_hash = ?",
+                (content_hash,),
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], [tuple(link) for link in json.loads(row[1])]
+
+    def put_extract(
+        self, content_hash: str, text: str, hyperlinks: List[Tuple[str, str]]
+    ) -> None:
+        """
+        Store the text and hyperlinks extracted from a page, if the page is stored.
+
+        Args:
+            content_hash (str): The hash of the text of the page
+            text (str): The text of the page
+            hyperlinks (List[Tuple[str, str]]): The unresolved hyperlinks of the page
+        """
+        with self._store.lock:
+            connection = self._connect()
+            if connection is None:
+                return
+            connection.execute(
+                "INSERT OR REPLACE INTO extracts SELECT ?, ?, ? WHERE EXISTS"
+                " (SELECT 1 FROM responses WHERE content_hash = ?)",
+                (content_hash, text, json.dumps(hyperlinks), content_hash),
+            )
+            connection.commit()
+
+    def _evict(self, connection: sqlite3.Connection, now: float) -> None:
+        cfg = Config()
+        connection.execute(
+            "DELETE FROM responses WHERE last_used < ?", (now - cfg.http_cache_ttl,)
+        )
+        max_size = cfg.http_cache_max_size_mb * 1024 * 1024
+        (size,) = connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if size > max_size:
+            rows = connection.execute(
+                "SELECT url, size FROM responses ORDER BY last_used"
+            ).fetchall()
+            evicted = []
+            for url, entry_size in rows:
+                if size <= max_size:
+                    break
+                evicted.append((url,))
+                size -= entry_size
+            connection.executemany("DELETE FROM responses WHERE url = ?", evicted)
+        connection.execute(
+            "DELETE FROM extracts WHERE content_hash NOT IN"
+            " (SELECT content_hash FROM responses)"
+        )
+
+    def get_stats(self) -> dict:
+        """
+        Get the counters of the cache.
+
+        Returns:
+            dict: The number of fresh hits, revalidations and misses.
+        """
+        return {
+            "hits": self.hits,
+            "revalidations": self.revalidations,
+            "misses": self.misses,
+        }
+
+
+class CachingAdapter(HTTPAdapter):
+    """Transport adapter answering GET requests from the HttpCache when it can"""
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:
+        conditional = any(
+            name in request.headers
+            for name in ["If-None-Match", "If-Modified-Since", "Range"]
+        )
+        if request.method != "GET" or conditional:
+            return super().send(request, **kwargs)
+
+        cache = HttpCache()
+        cached = cache.get(request.url)
+        if cached is not None:
+            if cached.is_fresh():
+                return self.build_cached_response(request, cached)
+            if "ETag" in cached.headers:
+                request.headers["If-None-Match"] = cached.headers["ETag"]
+            if "Last-Modified" in cached.headers:
+                request.headers["If-Modified-Since"] = cached.headers["Last-Modified"]
+
+        response = super().send(request, **kwargs)
+        if cached is not None and response.status_code == 304:
+            cache.revalidate(cached, response.headers)
+            response.close()
+            return self.build_cached_response(request, cached)
+
+        # Streamed bodies are read by the caller, who can store them with put
+        if response.status_code == 200 and not kwargs.get("stream"):
+            max_size = Config().http_cache_max_size_mb * 1024 * 1024
+            if int(response.headers.get("Content-Length", 0)) <= max_size:
+                cache.put(
+                    request.url,
+                    response.status_code,
+                    response.headers,
+                    response.content,
+                    text_hash(response.text),
+                )
+        return response
+
+    def build_cached_response(
+        self, request: PreparedRequest, cached: CachedResponse
+    ) -> Response:
+        """Build the response to a request from a stored response"""
+        raw = HTTPResponse(
+            body=io.BytesIO(cached.content),
+            headers=dict(cached.headers),
+            status=cached.status,
+            preload_content=False,
+            decode_content=False,
+        )
+        response = self.build_response(request, raw)
+        response.from_cache = True
+        # Read the body now, like a request that is not streamed
+        response.content
+        return response
+
+
+def text_hash(text: str) -> str:
+    """The key of a page in the cache of extracted texts"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
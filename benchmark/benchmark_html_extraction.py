@@ -0,0 +1,69 @@
+"""Text and hyperlink extraction time of browse_website, over the HTML fixtures."""
+import re
+import time
+from pathlib import Path
+from unittest import mock
+
+from bs4 import BeautifulSoup
+
+from autogpt.processing import html
+
+FIXTURES_DIR = Path(__file__).parent.parent / "tests" / "unit" / "data" / "html"
+BASE_URL = "https://example.com/blog/post.html"
+LARGE_PAGE_REPEATS = 200
+REPEATS = 20
+
+
+def extract_page_twice(page, base_url):
+    """What browse_website did before: one html.parser parse for the text and one
+    for the links"""
+    soup = BeautifulSoup(page, "html.parser")
+    for script in soup(["script", "style"]):
+        script.extract()
+    text = html.format_text((soup.body or soup).get_text())
+
+    soup = BeautifulSoup(page, "html.parser")
+    for script in soup(["script", "style"]):
+        script.extract()
+    return text, html.extract_hyperlinks(soup, base_url)
+
+
+def extract_page_html_parser(page, base_url):
+    with mock.patch.object(html, "lxml_html", None):
+        return html.extract_page(page, base_url)
+
+
+def load_pages():
+    pages = {
+        path.name: path.read_text(encoding="utf-8")
+        for path in sorted(FIXTURES_DIR.glob("*.html"))
+    }
+    # A long page, the body of the article repeated
+    article = pages["article.html"]
+    body = re.search(r"<body>(.*)</body>", article, re.S)[1]
+    pages["article.html x200"] = article.replace(body, body * LARGE_PAGE_REPEATS)
+    return pages
+
+
+def benchmark_html_extraction():
+    extractors = {
+        "html.parser twice": extract_page_twice,
+        "html.parser once": extract_page_html_parser,
+        "lxml once": html.extract_page,
+    }
+    for name, page in load_pages().items():
+        megabytes = len(page.encode("utf-8")) / 1e6
+        print(f"{name} ({megabytes * 1000:.1f} KB)")
+        for extractor_name, extract in extractors.items():
+            start = time.perf_counter()
+            for _ in range(REPEATS):
+                extract(page, BASE_URL)
+            elapsed = (time.perf_counter() - start) / REPEATS
+            print(
+                f"  {extractor_name:>18}: {elapsed * 1000:8.2f} ms, "
+                f"{megabytes / elapsed:6.2f} MB/s"
+            )
+
+
+if __name__ == "__main__":
+    benchmark_html_extraction()
@@ -0,0 +1,52 @@
+"""Query latency and recall of the LocalCache vector indexes by memory size."""
+import time
+
+import numpy as np
+
+from autogpt.memory.local import EMBED_DIM, BruteForceIndex, CacheContent, IVFIndex
+
+SIZES = [1_000, 10_000, 50_000, 100_000]
+QUERIES = 50
+K = 10
+
+
+def random_embeddings(rng, rows):
+    # Clustered data is closer to real embeddings than uniform noise
+    centers = rng.standard_normal((64, EMBED_DIM)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), rows)]
+    vectors += 0.5 * rng.standard_normal((rows, EMBED_DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def time_queries(index, data, queries):
+    start = time.perf_counter()
+    results = [index.search(data, query, K) for query in queries]
+    return (time.perf_counter() - start) / len(queries), results
+
+
+def benchmark_local_cache_index():
+    rng = np.random.default_rng(0)
+    print(f"{'rows':>8} {'index':>12} {'ms/query':>10} {'recall@10':>10}")
+    for rows in SIZES:
+        data = CacheContent(snapshot=random_embeddings(rng, rows))
+        queries = random_embeddings(rng, QUERIES)
+
+        exact_latency, exact = time_queries(BruteForceIndex(), data, queries)
+        print(f"{rows:>8} {'brute_force':>12} {1000 * exact_latency:>10.2f} {1:>10.3f}")
+
+        for nprobe in (4, 16):
+            index = IVFIndex(nprobe=nprobe, min_rows=0)
+            index.search(data, queries[0], K)  # train outside of the timing
+            latency, approximate = time_queries(index, data, queries)
+            recall = np.mean(
+                [
+                    len(np.intersect1d(expected, found)) / K
+                    for expected, found in zip(exact, approximate)
+                ]
+            )
+            name = f"ivf/{nprobe}"
+            print(f"{rows:>8} {name:>12} {1000 * latency:>10.2f} {recall:>10.3f}")
+
+
+if __name__ == "__main__":
+    benchmark_local_cache_index()
@@ -0,0 +1,54 @@
+"""Sentence splitting throughput of split_text, with spaCy and with the regex."""
+import random
+import string
+import time
+
+from autogpt.config import Config
+from autogpt.processing.text import get_sentencizer, split_sentences
+
+TEXT_SIZE = 2_000_000
+REPEATS = 3
+
+
+def random_text(rng, size):
+    sentences = []
+    length = 0
+    while length < size:
+        words = [
+            "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 10)))
+            for _ in range(rng.randint(5, 30))
+        ]
+        sentence = " ".join(words).capitalize() + rng.choice(".!?")
+        sentences.append(sentence)
+        length += len(sentence) + 1
+    return " ".join(sentences)
+
+
+def benchmark_sentence_splitter():
+    cfg = Config()
+    text = random_text(random.Random(0), TEXT_SIZE)
+    megabytes = len(text.encode("utf-8")) / 1e6
+
+    for splitter in ("regex", "spacy"):
+        cfg.browse_sentence_splitter = splitter
+        if splitter == "spacy":
+            try:
+                start = time.perf_counter()
+                nlp = get_sentencizer(cfg.browse_spacy_language_model)
+            except OSError as e:
+                print(f"{splitter:>6}: skipped, {e}")
+                continue
+            nlp.max_length = len(text) + 1
+            print(f"{splitter:>6}: loaded once in {time.perf_counter() - start:.3f} s")
+
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            sentences = split_sentences(text)
+        elapsed = (time.perf_counter() - start) / REPEATS
+        print(
+            f"{splitter:>6}: {len(sentences)} sentences, {megabytes / elapsed:.2f} MB/s"
+        )
+
+
+if __name__ == "__main__":
+    benchmark_sentence_splitter()
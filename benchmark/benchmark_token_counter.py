@@ -0,0 +1,42 @@
+"""Per-cycle token counting cost of chat_with_ai as the message history grows."""
+import random
+import string
+import time
+
+from autogpt.llm.token_counter import count_message_tokens
+
+CYCLES = 200
+MODEL = "gpt-3.5-turbo"
+
+
+def random_message(rng):
+    words = (
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 10)))
+        for _ in range(rng.randint(20, 200))
+    )
+    return {
+        "role": rng.choice(["user", "assistant", "system"]),
+        "content": " ".join(words),
+    }
+
+
+def benchmark_token_counter():
+    rng = random.Random(0)
+    history = []
+    print(f"{'cycle':>6} {'history':>8} {'ms/cycle':>10}")
+    for cycle in range(1, CYCLES + 1):
+        # Every cycle adds the user input, the assistant reply and a command result
+        history.extend(random_message(rng) for _ in range(3))
+
+        start = time.perf_counter()
+        # chat_with_ai counts the tokens of every history message on every cycle
+        for message in reversed(history):
+            count_message_tokens([message], MODEL)
+        elapsed = time.perf_counter() - start
+
+        if cycle % 20 == 0:
+            print(f"{cycle:>6} {len(history):>8} {1000 * elapsed:>10.3f}")
+
+
+if __name__ == "__main__":
+    benchmark_token_counter()
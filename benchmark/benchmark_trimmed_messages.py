@@ -0,0 +1,53 @@
+"""Cost of finding the messages trimmed from the context of a 10k message history."""
+import copy
+import time
+
+from autogpt.llm import create_chat_message
+from autogpt.memory_management.summary_memory import get_newly_trimmed_messages
+
+HISTORY_LENGTHS = [1_000, 5_000, 10_000]
+CONTEXT_LENGTH = 20
+
+
+def get_newly_trimmed_messages_by_value(
+    full_message_history, current_context, last_memory_index
+):
+    # The previous implementation, comparing every new message to the context
+    new_messages = [
+        copy.deepcopy(msg)
+        for i, msg in enumerate(full_message_history)
+        if i > last_memory_index
+    ]
+    new_messages_not_in_context = [
+        msg for msg in new_messages if msg not in current_context
+    ]
+    new_index = last_memory_index
+    if new_messages_not_in_context:
+        new_index = full_message_history.index(new_messages_not_in_context[-1])
+    return new_messages_not_in_context, new_index
+
+
+def benchmark_trimmed_messages():
+    print(f"{'history':>8} {'by value ms':>12} {'by index ms':>12}")
+    for length in HISTORY_LENGTHS:
+        history = [
+            create_chat_message("assistant", f"message {i} " + "lorem ipsum " * 20)
+            for i in range(length)
+        ]
+        first_message_index = length - CONTEXT_LENGTH
+        current_context = history[first_message_index:]
+
+        start = time.perf_counter()
+        expected = get_newly_trimmed_messages_by_value(history, current_context, 0)
+        by_value = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = get_newly_trimmed_messages(history, first_message_index, 0)
+        by_index = time.perf_counter() - start
+
+        assert result == expected
+        print(f"{length:>8} {1000 * by_value:>12.3f} {1000 * by_index:>12.3f}")
+
+
+if __name__ == "__main__":
+    benchmark_trimmed_messages()
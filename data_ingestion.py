@@ -1,11 +1,28 @@
 import argparse
+import hashlib
+import json
 import logging
+import os
+import queue
+import threading
+import time
 
-from autogpt.commands.file_operations import ingest_file, list_files
+from autogpt.commands.file_operations import (
+    READ_BLOCK_SIZE,
+    count_chunks,
+    ingest_file,
+    list_files,
+    read_blocks,
+    split_stream,
+)
 from autogpt.config import Config
+from autogpt.llm import count_string_tokens, get_ada_embeddings
 from autogpt.memory import get_memory
 
 cfg = Config()
+logger = logging.getLogger("AutoGPT-Ingestion")
+
+MANIFEST_FILENAME = ".ingestion_manifest.json"
 
 
 def configure_logging():
@@ -21,20 +38,253 @@ def configure_logging():
     return logging.getLogger("AutoGPT-Ingestion")
 
 
+class IngestionManifest:
+    """
+    The files ingested so far, with their modification time, size and sha256.
+
+    A file is recorded once all its chunks are in memory, and the manifest is saved
+    after every file, so an interrupted ingestion resumes with the files it had not
+    finished. The manifest is only valid for the memory and the chunking it was
+    written with, which `key` identifies: a manifest with another key is discarded.
+    """
+
+    def __init__(self, path: str, key: dict, init: bool = False) -> None:
+        self.path = path
+        self.key = key
+        self.files = {}
+        self._lock = threading.Lock()
+        if not init and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("key") == key:
+                self.files = manifest["files"]
+            else:
+                logger.info(
+                    f"Discarding the manifest '{path}', it was written for another"
+                    " memory or chunking"
+                )
+
+    def is_unchanged(self, file: str, stat: os.stat_result) -> bool:
+        """Whether the file was ingested and has not been modified since."""
+        entry = self.files.get(file)
+        return (
+            entry is not None
+            and entry["mtime"] == stat.st_mtime
+            and entry["size"] == stat.st_size
+        )
+
+    def has_hash(self, file: str, sha256: str) -> bool:
+        """Whether the file was ingested with the same content."""
+        entry = self.files.get(file)
+        return entry is not None and entry["sha256"] == sha256
+
+    def record(self, file: str, stat: os.stat_result, sha256: str) -> None:
+        """Record an ingested file and save the manifest."""
+        with self._lock:
+            self.files[file] = {
+                "mtime": stat.st_mtime,
+                "size": stat.st_size,
+                "sha256": sha256,
+            }
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"key": self.key, "files": self.files}, f)
+            os.replace(tmp_path, self.path)
+
+
+def manifest_key(args) -> dict:
+    """The memory and chunking parameters the manifest of an ingestion is valid for."""
+    return {
+        "memory_backend": cfg.memory_backend,
+        "memory_index": cfg.memory_index,
+        "max_length": args.max_length,
+        "overlap": args.overlap,
+    }
+
+
+def memory_was_wiped(args) -> bool:
+    """Whether the memory was emptied when it was opened for this ingestion."""
+    # RedisMemory flushes the database on start unless WIPE_REDIS_ON_START=False
+    return args.init or (cfg.memory_backend == "redis" and cfg.wipe_redis_on_start)
+
+
+def file_sha256(file: str) -> str:
+    """The sha256 of the content of a file, read one block at a time."""
+    sha256 = hashlib.sha256()
+    with open(file, "rb") as f:
+        while block := f.read(READ_BLOCK_SIZE):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+class IngestionStats:
+    """Throughput counters of a directory ingestion."""
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.files = 0
+        self.skipped = 0
+        self.chunks = 0
+        self.tokens = 0
+
+    def __str__(self) -> str:
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        return (
+            f"{self.files} files ({self.skipped} unchanged skipped), {self.chunks}"
+            f" chunks, {self.tokens} tokens in {elapsed:.1f}s:"
+            f" {self.files / elapsed:.2f} files/s, {self.chunks / elapsed:.2f}"
+            f" chunks/s, {self.tokens / elapsed:.0f} tokens/s"
+        )
+
+
 def ingest_directory(directory, memory, args):
     """
-    Ingest all files in a directory by calling the ingest_file function for each file.
+    Ingest all files in a directory, skipping the files that were already ingested.
+
+    The files go through a pipeline of stages connected by bounded queues: a pool of
+    readers, a chunker, an embedding stage that embeds batches of chunks and a writer
+    that adds every batch to memory at once, along with its embeddings, so that the
+    memory does not embed the chunks again.
 
     :param directory: The directory containing the files to ingest
-    :param memory: An object with an add() method to store the chunks in memory
+    :param memory: An object with an add_many(texts, embeddings) method to store the
+        chunks in memory
+    :param args: The command line arguments: max_length, overlap, workers,
+        batch_size, manifest and init
+    :return: The throughput stats of the ingestion
     """
-    global logger
+    manifest = IngestionManifest(
+        args.manifest or os.path.join(directory, MANIFEST_FILENAME),
+        manifest_key(args),
+        memory_was_wiped(args),
+    )
+    stats = IngestionStats()
+    stop = threading.Event()
+    paths = queue.Queue()
+    contents = queue.Queue(maxsize=2 * args.workers)
+    chunks = queue.Queue(maxsize=2 * args.batch_size)
+    batches = queue.Queue(maxsize=2)
+
+    # Give up once another stage failed, instead of blocking on a queue
+    def put(q, item):
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def get(q):
+        while not stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return None
+
+    def read_files():
+        while not stop.is_set():
+            try:
+                file = paths.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                stat = os.stat(file)
+                if manifest.is_unchanged(file, stat):
+                    stats.skipped += 1
+                    continue
+                sha256 = file_sha256(file)
+                if manifest.has_hash(file, sha256):
+                    # Only touched, remember the new modification time
+                    manifest.record(file, stat, sha256)
+                    stats.skipped += 1
+                    continue
+                # Decoded like ingest_file, one block at a time
+                length = sum(len(block) for block in read_blocks(file))
+            except Exception as e:
+                logger.error(f"Error while reading file '{file}': {str(e)}")
+                continue
+            put(contents, (file, stat, sha256, length))
+        put(contents, None)
+
+    def split_files():
+        for _ in range(args.workers):
+            while (item := get(contents)) is not None:
+                file, stat, sha256, length = item
+                num_chunks = count_chunks(length, args.max_length, args.overlap)
+                put(chunks, (file, stat, sha256, num_chunks, None))
+                file_chunks = split_stream(
+                    read_blocks(file), args.max_length, args.overlap
+                )
+                try:
+                    for i, chunk in enumerate(file_chunks):
+                        text = f"文件名: {file}\n" f"内容块#{i + 1}/{num_chunks}: {chunk}"
+                        put(chunks, (file, stat, sha256, num_chunks, text))
+                except Exception as e:
+                    # The file is not recorded, as some of its chunks are missing
+                    logger.error(f"Error while reading file '{file}': {str(e)}")
+        put(chunks, None)
+
+    def embed_batches():
+        batch = []
+        while (item := get(chunks)) is not None:
+            batch.append(item)
+            if len(batch) >= args.batch_size:
+                put(batches, (batch, embed_batch(batch)))
+                batch = []
+        if batch:
+            put(batches, (batch, embed_batch(batch)))
+        put(batches, None)
+
+    def embed_batch(batch):
+        texts = [text for *_, text in batch if text is not None]
+        stats.tokens += sum(
+            count_string_tokens(text, cfg.embedding_model) for text in texts
+        )
+        return get_ada_embeddings(texts) if texts else []
+
+    def run(stage):
+        try:
+            stage()
+        except Exception as e:
+            logger.error(f"Error while ingesting directory '{directory}': {str(e)}")
+            stop.set()
+
+    for file in list_files(directory):
+        paths.put(file)
+    threads = [
+        threading.Thread(target=run, args=(stage,), daemon=True)
+        for stage in [read_files] * args.workers + [split_files, embed_batches]
+    ]
+    for thread in threads:
+        thread.start()
+
+    # Write the batches to memory, and record every file once all its chunks are in
+    remaining_chunks = {}
     try:
-        files = list_files(directory)
-        for file in files:
-            ingest_file(file, memory, args.max_length, args.overlap)
-    except Exception as e:
-        logger.error(f"Error while ingesting directory '{directory}': {str(e)}")
+        while (item := get(batches)) is not None:
+            batch, embeddings = item
+            texts = [text for *_, text in batch if text is not None]
+            if texts:
+                memory.add_many(texts, embeddings)
+            stats.chunks += len(texts)
+            for file, stat, sha256, num_chunks, text in batch:
+                if text is None:
+                    remaining_chunks[file] = num_chunks
+                else:
+                    remaining_chunks[file] -= 1
+                if remaining_chunks[file] == 0:
+                    del remaining_chunks[file]
+                    manifest.record(file, stat, sha256)
+                    stats.files += 1
+                    logger.info(f"Ingested '{file}', {stats}")
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    logger.info(f"Ingested directory '{directory}': {stats}")
+    return stats
 
 
 def main() -> None:
@@ -67,6 +317,25 @@ def main() -> None:
         help="The max_length of each chunk when ingesting files (default: 4000)",
         default=4000,
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="The number of files read at the same time (default: 4)",
+        default=4,
+    )
+    parser.add_argument(
+        "--batch_size",
+        type=int,
+        help="The number of chunks embedded and added to memory at once (default: 100)",
+        default=100,
+    )
+    parser.add_argument(
+        "--manifest",
+        type=str,
+        help="The manifest of the ingested files, unchanged files are skipped"
+        f" (default: {MANIFEST_FILENAME} in the directory)",
+        default=None,
+    )
     args = parser.parse_args()
 
     # Initialize memory
@@ -1,12 +1,22 @@
 # sourcery skip: snake-case-functions
 """Tests for LocalCache class"""
+import threading
 import unittest
 
+import numpy as np
 import orjson
 import pytest
 
-from autogpt.memory.local import EMBED_DIM, SAVE_OPTIONS
+from autogpt.memory.local import (
+    EMBED_DIM,
+    MIN_COMPACTION_ROWS,
+    SAVE_OPTIONS,
+    BruteForceIndex,
+    CacheContent,
+    IVFIndex,
+)
 from autogpt.memory.local import LocalCache as LocalCache_
+from autogpt.memory.local import top_k
 from tests.utils import requires_api_key
 
 
@@ -49,15 +59,55 @@ def test_init_with_backing_file(LocalCache, config, workspace):
     cache_file = workspace.root / f"{config.memory_index}.json"
     cache_file.touch()
 
-    raw_data = {"texts": ["test"]}
+    raw_data = {"texts": ["test"], "embeddings": [[0.1] * EMBED_DIM]}
     data = orjson.dumps(raw_data, option=SAVE_OPTIONS)
     with cache_file.open("wb") as f:
         f.write(data)
 
     assert cache_file.exists()
-    LocalCache(config)
-    assert cache_file.exists()
-    assert cache_file.read_text() == "{}"
+    cache = LocalCache(config)
+    assert cache.data.texts == ["test"]
+    assert cache.data.shape == (1, EMBED_DIM)
+
+
+def test_reopen_maps_snapshot(LocalCache, config, mock_embed_with_ada):
+    cache = LocalCache(config)
+    for i in range(MIN_COMPACTION_ROWS + 1):
+        cache.add(f"test {i}")
+
+    del LocalCache._instances[LocalCache]
+    cache = LocalCache(config)
+    assert cache.data.texts == [f"test {i}" for i in range(MIN_COMPACTION_ROWS + 1)]
+    assert isinstance(cache.data.snapshot, np.memmap)
+    assert cache.data.snapshot.shape == (MIN_COMPACTION_ROWS, EMBED_DIM)
+    assert cache.data.embeddings.shape == (1, EMBED_DIM)
+    assert cache.get_stats() == (
+        MIN_COMPACTION_ROWS + 1,
+        (MIN_COMPACTION_ROWS + 1, EMBED_DIM),
+    )
+
+
+def test_read_only(LocalCache, config, workspace, mocker, mock_embed_with_ada):
+    mocker.patch.object(config, "local_cache_read_only", True)
+    cache_file = workspace.root / f"{config.memory_index}.json"
+
+    cache = LocalCache(config)
+    assert not cache_file.exists()
+    assert cache.add("test") == ""
+    assert cache.data.texts == []
+    assert not cache.vectors_filename.exists()
+
+
+def test_read_only_clear_keeps_memory(LocalCache, config, mocker, mock_embed_with_ada):
+    cache = LocalCache(config)
+    cache.add("test")
+
+    del LocalCache._instances[LocalCache]
+    mocker.patch.object(config, "local_cache_read_only", True)
+    cache = LocalCache(config)
+    assert cache.clear() == ""
+    assert cache.data.texts == ["test"]
+    assert cache.vectors_filename.stat().st_size == EMBED_DIM * 4
 
 
 def test_add(LocalCache, config, mock_embed_with_ada):
@@ -67,6 +117,119 @@ def test_add(LocalCache, config, mock_embed_with_ada):
     assert cache.data.embeddings.shape == (1, EMBED_DIM)
 
 
+def test_add_many(LocalCache, config, mocker):
+    get_ada_embeddings = mocker.patch(
+        "autogpt.memory.local.get_ada_embeddings",
+        return_value=[[0.1] * EMBED_DIM, [0.2] * EMBED_DIM],
+    )
+    cache = LocalCache(config)
+
+    result = cache.add_many(["test", "Command Error: test", "test 2"])
+    assert result == ["test", "", "test 2"]
+    get_ada_embeddings.assert_called_once_with(["test", "test 2"])
+    assert cache.data.texts == ["test", "test 2"]
+    assert cache.data.embeddings.shape == (2, EMBED_DIM)
+    vectors = np.fromfile(cache.vectors_filename, dtype=np.float32)
+    assert vectors.shape == (2 * EMBED_DIM,)
+
+
+def test_add_many_with_embeddings(LocalCache, config, mocker):
+    get_ada_embeddings = mocker.patch("autogpt.memory.local.get_ada_embeddings")
+    cache = LocalCache(config)
+
+    result = cache.add_many(
+        ["test", "Command Error: test", "test 2"],
+        [[0.1] * EMBED_DIM, [0.3] * EMBED_DIM, [0.2] * EMBED_DIM],
+    )
+
+    assert result == ["test", "", "test 2"]
+    get_ada_embeddings.assert_not_called()
+    assert cache.data.texts == ["test", "test 2"]
+    np.testing.assert_allclose(cache.data.embeddings[:, 0], [0.1, 0.2])
+
+
+def test_add_appends_to_segment(LocalCache, config, mock_embed_with_ada):
+    cache = LocalCache(config)
+    cache.add("test")
+    cache.add("test 2")
+
+    vectors = np.fromfile(cache.vectors_filename, dtype=np.float32)
+    assert vectors.shape == (2 * EMBED_DIM,)
+    texts = [
+        orjson.loads(line) for line in cache.texts_filename.read_bytes().splitlines()
+    ]
+    assert texts == ["test", "test 2"]
+    assert cache.filename.read_text() == "{}"
+
+
+def test_reopen_repairs_torn_segment(LocalCache, config, mock_embed_with_ada):
+    cache = LocalCache(config)
+    cache.add("a")
+    cache.add("b")
+    with open(cache.vectors_filename, "ab") as f:
+        f.write(b"\0" * 100)
+    with open(cache.texts_filename, "ab") as f:
+        f.write(b'"tor')
+
+    del LocalCache._instances[LocalCache]
+    cache = LocalCache(config)
+    assert cache.data.texts == ["a", "b"]
+    cache.add("c")
+
+    del LocalCache._instances[LocalCache]
+    cache = LocalCache(config)
+    assert cache.data.texts == ["a", "b", "c"]
+    vectors = np.fromfile(cache.vectors_filename, dtype=np.float32)
+    assert vectors.shape == (3 * EMBED_DIM,)
+    np.testing.assert_allclose(cache.data.embeddings[2], [0.1] * EMBED_DIM)
+
+
+def test_add_compacts_segment(LocalCache, config, mock_embed_with_ada):
+    cache = LocalCache(config)
+    for i in range(MIN_COMPACTION_ROWS):
+        cache.add(f"test {i}")
+
+    assert cache.vectors_filename.stat().st_size == 0
+    assert cache.texts_filename.stat().st_size == 0
+    snapshot = orjson.loads(cache.filename.read_bytes())
+    assert len(snapshot["texts"]) == MIN_COMPACTION_ROWS
+    embeddings = np.load(cache.embeddings_filename)
+    assert embeddings.shape == (MIN_COMPACTION_ROWS, EMBED_DIM)
+    assert cache.data.shape == (MIN_COMPACTION_ROWS, EMBED_DIM)
+
+
+def test_concurrent_adds_keep_texts_with_their_vectors(LocalCache, config, mocker):
+    def embed(text):
+        return [float(text)] * EMBED_DIM
+
+    mocker.patch("autogpt.memory.local.get_ada_embedding", side_effect=embed)
+    mocker.patch(
+        "autogpt.memory.local.get_ada_embeddings",
+        side_effect=lambda texts: [embed(text) for text in texts],
+    )
+    cache = LocalCache(config)
+
+    def add_many():
+        for i in range(300):
+            cache.add_many([str(10000 + 2 * i), str(10001 + 2 * i)])
+
+    def add():
+        for i in range(600):
+            cache.add(str(i))
+
+    threads = [threading.Thread(target=add_many), threading.Thread(target=add)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    del LocalCache._instances[LocalCache]
+    cache = LocalCache(config)
+    assert cache.get_stats() == (1200, (1200, EMBED_DIM))
+    rows = cache.data.rows(np.arange(1200))
+    assert [float(text) for text in cache.data.texts] == rows[:, 0].tolist()
+
+
 def test_clear(LocalCache, config, mock_embed_with_ada):
     cache = LocalCache(config)
     assert cache.data.texts == []
@@ -108,3 +271,43 @@ def test_get_stats(LocalCache, config, mock_embed_with_ada) -> None:
     cache.add(text)
     stats = cache.get_stats()
     assert stats == (1, cache.data.embeddings.shape)
+
+
+def random_content(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((rows, EMBED_DIM)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return CacheContent(texts=[str(i) for i in range(rows)], snapshot=vectors)
+
+
+def test_top_k():
+    scores = np.array([0.1, 0.9, 0.5, 0.7])
+    assert top_k(scores, 2).tolist() == [1, 3]
+    assert top_k(scores, 10).tolist() == [1, 3, 2, 0]
+
+
+def test_brute_force_index_spans_blocks():
+    data = random_content(100)
+    data.append("new", data.snapshot[42] * 2)
+
+    result = BruteForceIndex().search(data, data.snapshot[42], 2)
+    assert result.tolist() == [100, 42]
+
+
+def test_ivf_index_full_probe_is_exact():
+    data = random_content(500)
+    query = data.snapshot[7]
+    index = IVFIndex(nlist=8, nprobe=8, min_rows=0)
+
+    expected = BruteForceIndex().search(data, query, 5)
+    assert index.search(data, query, 5).tolist() == expected.tolist()
+
+
+def test_ivf_index_assigns_new_rows():
+    data = random_content(500)
+    index = IVFIndex(nlist=8, nprobe=1, min_rows=0)
+    index.search(data, data.snapshot[0], 1)
+
+    data.append("new", data.snapshot[3])
+    assert index.search(data, data.snapshot[3], 2).tolist() in ([3, 500], [500, 3])
+    assert index.indexed_rows == 501
@@ -37,7 +37,7 @@ class TestApiManager:
         ]
         model = "gpt-3.5-turbo"
 
-        with patch("openai.ChatCompletion.create") as mock_create:
+        with patch("openai.ChatCompletion.acreate") as mock_create:
             mock_response = MagicMock()
             mock_response.usage.prompt_tokens = 10
             mock_response.usage.completion_tokens = 20
@@ -53,7 +53,7 @@ class TestApiManager:
         messages = []
         model = "gpt-3.5-turbo"
 
-        with patch("openai.ChatCompletion.create") as mock_create:
+        with patch("openai.ChatCompletion.acreate") as mock_create:
             mock_response = MagicMock()
             mock_response.usage.prompt_tokens = 0
             mock_response.usage.completion_tokens = 0
@@ -74,7 +74,7 @@ class TestApiManager:
         ]
         model = "gpt-3.5-turbo"
 
-        with patch("openai.ChatCompletion.create") as mock_create:
+        with patch("openai.ChatCompletion.acreate") as mock_create:
             mock_response = MagicMock()
             mock_response.usage.prompt_tokens = 10
             mock_response.usage.completion_tokens = 20
@@ -115,3 +115,16 @@ class TestApiManager:
         assert api_manager.get_total_prompt_tokens() == 50
         assert api_manager.get_total_completion_tokens() == 100
         assert api_manager.get_total_cost() == (50 * 0.002 + 100 * 0.002) / 1000
+
+    @staticmethod
+    def test_back_off_delays_next_requests(mocker):
+        """Test that a rate limit makes every caller wait before its next request."""
+        sleep = mocker.patch("time.sleep")
+        api_manager.back_off(10)
+        api_manager.wait_for_rate_limit()
+        assert 9 < sleep.call_args.args[0] <= 10
+
+        api_manager.reset()
+        sleep.reset_mock()
+        api_manager.wait_for_rate_limit()
+        sleep.assert_not_called()
@@ -70,3 +70,67 @@ def test_count_string_tokens_gpt_4():
 
     string = "Hello, world!"
     assert count_string_tokens(string, model_name="gpt-4-0314") == 4
+
+
+@pytest.fixture
+def fake_encoding(mocker):
+    from autogpt.llm import token_counter
+
+    token_counter.get_encoding.cache_clear()
+    token_counter._token_counts.clear()
+    encoding = mocker.MagicMock()
+    encoding.encode.side_effect = str.split
+    encoding_for_model = mocker.patch(
+        "tiktoken.encoding_for_model", return_value=encoding
+    )
+    yield encoding_for_model, encoding
+    token_counter.get_encoding.cache_clear()
+    token_counter._token_counts.clear()
+
+
+def test_count_message_tokens_loads_encoding_once(fake_encoding):
+    encoding_for_model, _ = fake_encoding
+    messages = [{"role": "user", "content": "Hello there"}]
+
+    assert count_message_tokens(messages, model="gpt-3.5-turbo") == 10
+    assert count_message_tokens(messages, model="gpt-3.5-turbo") == 10
+    encoding_for_model.assert_called_once_with("gpt-3.5-turbo-0301")
+
+
+def test_count_message_tokens_memoizes_content(fake_encoding):
+    _, encoding = fake_encoding
+    history = [{"role": "user", "content": f"message {i}"} for i in range(3)]
+
+    count_message_tokens(history)
+    count_message_tokens(history + [{"role": "user", "content": "new message"}])
+    encoded = [call.args[0] for call in encoding.encode.call_args_list]
+    assert sorted(encoded) == sorted(
+        ["user", "message 0", "message 1", "message 2", "new message"]
+    )
+
+
+def test_count_message_tokens_does_not_keep_texts(fake_encoding, mocker):
+    from autogpt.llm import token_counter
+
+    mocker.patch.object(token_counter, "TOKEN_COUNTS_MAX_ENTRIES", 2)
+    content = "word " * 10000
+
+    assert count_message_tokens([{"role": "user", "content": content}]) == 10008
+    assert len(token_counter._token_counts) == 2
+    for model, digest in token_counter._token_counts:
+        assert model == "gpt-3.5-turbo-0301" and len(digest) == 32
+
+    # The count of the content is evicted first, then tokenized again
+    count_message_tokens([{"role": "system", "content": "short"}])
+    assert len(token_counter._token_counts) == 2
+    count_message_tokens([{"role": "user", "content": content}])
+    encoded = [call.args[0] for call in fake_encoding[1].encode.call_args_list]
+    assert encoded.count(content) == 2
+
+
+def test_count_string_tokens_loads_encoding_once(fake_encoding):
+    encoding_for_model, _ = fake_encoding
+
+    assert count_string_tokens("Hello there", model_name="gpt-4") == 2
+    assert count_string_tokens("Hello again", model_name="gpt-4") == 2
+    encoding_for_model.assert_called_once_with("gpt-4")
@@ -0,0 +1,141 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from autogpt.commands import web_requests
+from autogpt.url_utils.http_cache import HttpCache
+
+
+class PagesHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+            server.paths.append(self.path)
+        time.sleep(server.delays.get(self.path, 0.05))
+        with server.lock:
+            server.active -= 1
+
+        if self.path == "/missing":
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = (
+            server.pages.get(self.path)
+            or (
+                f"<html><body><p>Page {self.path}</p>\n"
+                f"<a href='{self.path}/more'>More</a></body></html>"
+            ).encode()
+        )
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "max-age=60")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server(mocker):
+    mocker.patch(
+        "autogpt.url_utils.validators.check_local_file_access", return_value=False
+    )
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PagesHandler)
+    server.lock = threading.Lock()
+    server.active = server.max_active = 0
+    server.paths = []
+    server.pages = {}
+    server.delays = {}
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    mocker.patch.object(web_requests, "host_semaphores", {})
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def cache(config, workspace):
+    HttpCache._instances.pop(HttpCache, None)
+    yield HttpCache()
+    HttpCache._instances.pop(HttpCache, None)
+
+
+def test_scrape_urls_limits_connections_per_host(server, mocker, config):
+    mocker.patch.object(config, "batch_scrape_max_connections_per_host", 2)
+    urls = [f"{server.url}/{i}" for i in range(6)]
+
+    result = web_requests.scrape_urls(", ".join(urls))
+
+    assert server.max_active == 2
+    extracts = result.split("\n\n")
+    assert [extract.splitlines()[0] for extract in extracts] == [
+        f"URL: {url}" for url in urls
+    ]
+    assert extracts[0] == (
+        f"URL: {server.url}/0\nText: Page /0\nMore\nLinks: ['More ({server.url}/0/more)']"
+    )
+
+
+def test_scrape_urls_reports_errors_per_url(server):
+    result = web_requests.scrape_urls(
+        [f"{server.url}/missing", "not a url", f"{server.url}/ok"]
+    )
+
+    missing, invalid, ok = result.split("\n\n")
+    assert "404" in missing
+    assert invalid == "URL: not a url\nError: Invalid URL format"
+    assert ok.startswith(f"URL: {server.url}/ok\nText: Page /ok")
+
+
+def test_scrape_urls_truncates_large_pages(server, mocker, config):
+    mocker.patch.object(config, "batch_scrape_max_size_kb", 1)
+    server.pages["/large"] = (
+        b"<html><body><p>" + b"word " * 1000 + b"</p></body></html>"
+    )
+
+    result = web_requests.scrape_urls([f"{server.url}/large"])
+
+    assert result.startswith(f"URL: {server.url}/large\nText: word word")
+    assert result.count("word") < 205
+    # Truncated pages are not cached
+    web_requests.scrape_urls([f"{server.url}/large"])
+    assert server.paths == ["/large", "/large"]
+
+
+def test_scrape_urls_times_out(server, mocker, config):
+    mocker.patch.object(config, "batch_scrape_timeout", 0.2)
+    server.delays["/slow"] = 1
+
+    start = time.monotonic()
+    result = web_requests.scrape_urls([f"{server.url}/slow", f"{server.url}/fast"])
+
+    assert time.monotonic() - start < 1
+    slow, fast = result.split("\n\n")
+    assert "timed out" in slow
+    assert "Page /fast" in fast
+
+
+def test_scrape_urls_caches_pages(server):
+    web_requests.scrape_urls([f"{server.url}/a"])
+    web_requests.scrape_urls([f"{server.url}/a"])
+
+    assert server.paths == ["/a"]
+
+
+def test_scrape_urls_limits_number_of_urls(server):
+    urls = [f"{server.url}/{i}" for i in range(web_requests.BATCH_SCRAPE_MAX_URLS + 2)]
+
+    result = web_requests.scrape_urls(urls)
+
+    assert len(server.paths) == web_requests.BATCH_SCRAPE_MAX_URLS
+    assert result.endswith("Skipped the last 2 URLs, scrape at most 10 at once")
@@ -0,0 +1,155 @@
+import threading
+import time
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+from autogpt.commands import web_selenium
+from autogpt.commands.web_selenium import BrowserPool
+
+
+class FakeDriver:
+    def __init__(self):
+        self.window_handles = ["main"]
+        self.alive = True
+        self.quit_called = False
+        self.cookies_deleted = 0
+
+    def __getattribute__(self, name):
+        if name == "window_handles" and not object.__getattribute__(self, "alive"):
+            raise WebDriverException("browser crashed")
+        return object.__getattribute__(self, name)
+
+    @property
+    def switch_to(self):
+        return self
+
+    def window(self, handle):
+        self.current = handle
+
+    def close(self):
+        self.window_handles.remove(self.current)
+
+    def execute_script(self, script):
+        pass
+
+    def delete_all_cookies(self):
+        self.cookies_deleted += 1
+
+    def get(self, url):
+        self.url = url
+
+    def quit(self):
+        self.quit_called = True
+
+
+@pytest.fixture
+def pool(mocker, config):
+    mocker.patch.object(config, "selenium_pool_size", 2)
+    mocker.patch.object(config, "selenium_pages_per_browser", 3)
+    mocker.patch.object(config, "selenium_pool_idle_timeout", 60)
+    created = []
+
+    def create_browser(slot):
+        created.append(FakeDriver())
+        return created[-1]
+
+    mocker.patch.object(web_selenium, "create_browser", side_effect=create_browser)
+    BrowserPool._instances.pop(BrowserPool, None)
+    pool = BrowserPool()
+    pool.created = created
+    yield pool
+    pool.close()
+    BrowserPool._instances.pop(BrowserPool, None)
+
+
+def test_browser_is_reused_and_reset(pool):
+    with pool.browser() as driver:
+        driver.window_handles.append("popup")
+    with pool.browser() as again:
+        pass
+
+    assert again is driver
+    assert len(pool.created) == 1
+    assert driver.window_handles == ["main"]
+    assert driver.cookies_deleted == 2
+    assert driver.url == "about:blank"
+
+
+def test_browser_is_recycled_after_max_pages(pool):
+    for _ in range(4):
+        with pool.browser():
+            pass
+
+    assert len(pool.created) == 2
+    assert pool.created[0].quit_called
+
+
+def test_dead_browser_is_replaced(pool):
+    with pool.browser() as driver:
+        pass
+    driver.alive = False
+
+    with pool.browser() as replacement:
+        pass
+
+    assert replacement is not driver
+    assert driver.quit_called
+
+
+def test_browser_is_closed_after_webdriver_error(pool):
+    with pytest.raises(WebDriverException):
+        with pool.browser() as driver:
+            raise WebDriverException("page crashed")
+
+    assert driver.quit_called
+    with pool.browser() as replacement:
+        assert replacement is not driver
+
+
+def test_browser_is_reset_after_other_error(pool):
+    with pytest.raises(ValueError):
+        with pool.browser() as driver:
+            driver.window_handles.append("popup")
+            raise ValueError("parsing failed")
+
+    assert not driver.quit_called
+    assert driver.window_handles == ["main"]
+    assert driver.cookies_deleted == 1
+    with pool.browser() as again:
+        assert again is driver
+
+
+def test_pool_size_bounds_concurrent_browsers(pool):
+    lock = threading.Lock()
+    in_use = []
+    max_in_use = []
+
+    def browse():
+        with pool.browser() as driver:
+            with lock:
+                in_use.append(driver)
+                max_in_use.append(len(in_use))
+            time.sleep(0.05)
+            with lock:
+                in_use.remove(driver)
+
+    threads = [threading.Thread(target=browse) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max(max_in_use) == 2
+    assert len(pool.created) <= 3
+
+
+def test_idle_browser_is_closed(pool, mocker, config):
+    mocker.patch.object(config, "selenium_pool_idle_timeout", 0.05)
+    with pool.browser() as driver:
+        pass
+
+    deadline = time.monotonic() + 2
+    while not driver.quit_called and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert driver.quit_called
@@ -2,7 +2,7 @@
 import time
 from unittest.mock import patch
 
-from autogpt.llm import create_chat_message, generate_context
+from autogpt.llm import ContextBuilder, create_chat_message, generate_context
 
 
 def test_happy_path_role_content():
@@ -76,3 +76,44 @@ def test_generate_context_valid_inputs():
     assert result[1] >= 0
     assert len(result[3]) >= 2  # current_context should have at least 2 messages
     assert result[1] <= 2048  # token limit for GPT-3.5-turbo-0301 is 2048 tokens
+
+
+def test_context_builder_fits_most_recent_messages(mocker):
+    """Test that the context builder keeps the most recent messages within the budget."""
+    count_message_tokens = mocker.patch(
+        "autogpt.llm.chat.count_message_tokens",
+        side_effect=lambda messages, model: len(messages[0]["content"]),
+    )
+    full_message_history = [
+        create_chat_message("user", "a" * length) for length in (5, 3, 4, 2)
+    ]
+    builder = ContextBuilder()
+    builder.sync(full_message_history, "gpt-3.5-turbo-0301")
+
+    assert builder.fit(6) == 2
+    assert builder.fit(5) == 3
+    assert builder.fit(1) == 4
+    assert builder.fit(100) == 0
+    assert builder.fit(0) == 4
+    assert builder.fit(-3) == 4
+    assert builder.tokens(builder.fit(-3), 4) == 0
+    assert builder.tokens(2, 4) == 6
+
+    full_message_history.append(create_chat_message("assistant", "a"))
+    builder.sync(full_message_history, "gpt-3.5-turbo-0301")
+    assert builder.fit(7) == 2
+    # Only the appended message is counted again
+    assert count_message_tokens.call_count == 5
+
+
+def test_context_builder_resets_on_new_history(mocker):
+    """Test that the context builder recounts a history that was replaced or trimmed."""
+    mocker.patch(
+        "autogpt.llm.chat.count_message_tokens",
+        side_effect=lambda messages, model: len(messages[0]["content"]),
+    )
+    builder = ContextBuilder()
+    builder.sync([create_chat_message("user", "aaaa")] * 3, "gpt-3.5-turbo-0301")
+    builder.sync([create_chat_message("user", "aa")], "gpt-3.5-turbo-0301")
+
+    assert builder.prefix_tokens == [0, 2]
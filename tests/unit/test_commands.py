@@ -13,7 +13,7 @@ from tests.utils import requires_api_key
 def test_make_agent() -> None:
     """Test that an agent can be created"""
     # Use the mock agent manager to avoid creating a real agent
-    with patch("openai.ChatCompletion.create") as mock:
+    with patch("openai.ChatCompletion.acreate") as mock:
         response = MagicMock()
         response.choices[0].messages[0].content = "Test message"
         response.usage.prompt_tokens = 1
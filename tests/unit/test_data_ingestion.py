@@ -0,0 +1,168 @@
+import argparse
+import os
+
+import pytest
+
+import data_ingestion
+from autogpt.commands import file_operations
+
+
+@pytest.fixture
+def documents(tmp_path):
+    directory = tmp_path / "documents"
+    directory.mkdir()
+    for name, content in [("a.txt", "aaaa"), ("b.txt", "bbbbbbbb"), ("c.txt", "")]:
+        (directory / name).write_text(content)
+    return directory
+
+
+@pytest.fixture
+def args():
+    return argparse.Namespace(
+        max_length=4, overlap=0, workers=2, batch_size=2, manifest=None, init=False
+    )
+
+
+@pytest.fixture(autouse=True)
+def fake_embeddings(mocker):
+    mocker.patch.object(data_ingestion, "count_string_tokens", return_value=1)
+    return mocker.patch.object(
+        data_ingestion,
+        "get_ada_embeddings",
+        side_effect=lambda texts: [[float(len(text))] for text in texts],
+    )
+
+
+def relative_path(path):
+    # The paths of list_files
+    return os.path.relpath(path, data_ingestion.cfg.workspace_path)
+
+
+def expected_texts(documents, names, args):
+    texts = []
+    for name in names:
+        path = relative_path(documents / name)
+        content = (documents / name).read_text()
+        chunks = list(
+            file_operations.split_file(content, args.max_length, args.overlap)
+        )
+        texts += [
+            f"文件名: {path}\n内容块#{i + 1}/{len(chunks)}: {chunk}"
+            for i, chunk in enumerate(chunks)
+        ]
+    return sorted(texts)
+
+
+def ingested_texts(memory):
+    return sorted(
+        text for call in memory.add_many.call_args_list for text in call.args[0]
+    )
+
+
+def test_ingest_directory(mocker, documents, args, fake_embeddings):
+    memory = mocker.MagicMock()
+
+    stats = data_ingestion.ingest_directory(str(documents), memory, args)
+
+    assert ingested_texts(memory) == expected_texts(
+        documents, ["a.txt", "b.txt", "c.txt"], args
+    )
+    assert all(len(call.args[0]) <= 2 for call in memory.add_many.call_args_list)
+    assert (stats.files, stats.chunks, stats.tokens) == (3, 3, 3)
+    assert os.path.exists(documents / data_ingestion.MANIFEST_FILENAME)
+
+
+def test_ingest_directory_passes_embeddings_to_memory(
+    mocker, config, documents, args, fake_embeddings
+):
+    mocker.patch.object(config, "embedding_cache", False)
+    memory = mocker.MagicMock()
+
+    data_ingestion.ingest_directory(str(documents), memory, args)
+
+    for call in memory.add_many.call_args_list:
+        texts, embeddings = call.args
+        assert embeddings == [[float(len(text))] for text in texts]
+    assert fake_embeddings.call_count == memory.add_many.call_count
+
+
+def test_ingest_directory_skips_unchanged_files(mocker, documents, args):
+    data_ingestion.ingest_directory(str(documents), mocker.MagicMock(), args)
+    (documents / "b.txt").write_text("bbbbcccc")
+    os.utime(documents / "a.txt", ns=(0, 0))
+    memory = mocker.MagicMock()
+
+    stats = data_ingestion.ingest_directory(str(documents), memory, args)
+
+    assert ingested_texts(memory) == expected_texts(documents, ["b.txt"], args)
+    assert (stats.files, stats.skipped) == (1, 2)
+
+
+def test_ingest_directory_resumes_after_failure(mocker, documents, args):
+    args.batch_size = 1
+    memory = mocker.MagicMock()
+    memory.add_many.side_effect = [None, None, RuntimeError("backend down")]
+    with pytest.raises(RuntimeError):
+        data_ingestion.ingest_directory(str(documents), memory, args)
+    manifest_path = str(documents / data_ingestion.MANIFEST_FILENAME)
+    key = data_ingestion.manifest_key(args)
+    ingested = data_ingestion.IngestionManifest(manifest_path, key).files
+
+    memory = mocker.MagicMock()
+    data_ingestion.ingest_directory(str(documents), memory, args)
+
+    remaining = [
+        name
+        for name in ["a.txt", "b.txt", "c.txt"]
+        if relative_path(documents / name) not in ingested
+    ]
+    assert 0 < len(remaining) < 3
+    assert ingested_texts(memory) == expected_texts(documents, remaining, args)
+    assert len(data_ingestion.IngestionManifest(manifest_path, key).files) == 3
+
+
+def test_ingest_directory_discards_manifest_of_other_chunking(mocker, documents, args):
+    data_ingestion.ingest_directory(str(documents), mocker.MagicMock(), args)
+    args.max_length = 8
+    memory = mocker.MagicMock()
+
+    stats = data_ingestion.ingest_directory(str(documents), memory, args)
+
+    assert ingested_texts(memory) == expected_texts(
+        documents, ["a.txt", "b.txt", "c.txt"], args
+    )
+    assert (stats.files, stats.skipped) == (3, 0)
+
+
+def test_ingest_directory_discards_manifest_of_wiped_redis(mocker, documents, args):
+    data_ingestion.ingest_directory(str(documents), mocker.MagicMock(), args)
+    mocker.patch.object(data_ingestion.cfg, "memory_backend", "redis")
+    mocker.patch.object(data_ingestion.cfg, "wipe_redis_on_start", True)
+    memory = mocker.MagicMock()
+
+    stats = data_ingestion.ingest_directory(str(documents), memory, args)
+
+    assert (stats.files, stats.skipped) == (3, 0)
+
+    mocker.patch.object(data_ingestion.cfg, "wipe_redis_on_start", False)
+    stats = data_ingestion.ingest_directory(str(documents), memory, args)
+
+    assert (stats.files, stats.skipped) == (0, 3)
+
+
+def test_ingest_directory_streams_files_like_ingest_file(mocker, documents, args):
+    mocker.patch.object(file_operations, "ENCODING_SAMPLE_SIZE", 8)
+    mocker.patch.object(file_operations, "READ_BLOCK_SIZE", 3)
+    for name in ["a.txt", "b.txt", "c.txt"]:
+        (documents / name).unlink()
+    (documents / "d.txt").write_text("ascii at first, 然后是中文", encoding="utf-8")
+    memory = mocker.MagicMock()
+
+    data_ingestion.ingest_directory(str(documents), memory, args)
+
+    file_memory = mocker.MagicMock()
+    file_operations.ingest_file(
+        relative_path(documents / "d.txt"), file_memory, args.max_length, args.overlap
+    )
+    assert ingested_texts(memory) == ingested_texts(file_memory)
+    assert any(text.endswith(": 然后是") for text in ingested_texts(memory))
@@ -0,0 +1,172 @@
+import gzip
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import autogpt.commands.file_operations as file_ops
+
+CONTENT = bytes(range(256)) * (3 * 1024 * 1024 // 256 + 7)
+GZIP_CONTENT = gzip.compress(CONTENT)
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def send_headers(self, status, length, content_range=None):
+        self.send_response(status)
+        self.send_header("Content-Length", str(length))
+        self.send_header("ETag", '"v1"')
+        if self.server.ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        if content_range:
+            self.send_header("Content-Range", content_range)
+        self.end_headers()
+
+    def gzipped(self):
+        # "negotiate" follows the Accept-Encoding of the request, "always" ignores it
+        return self.server.gzip == "always" or (
+            self.server.gzip == "negotiate"
+            and "gzip" in self.headers.get("Accept-Encoding", "")
+        )
+
+    def send_gzipped(self, body=True):
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(GZIP_CONTENT)))
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+        if body:
+            self.wfile.write(GZIP_CONTENT)
+
+    def do_HEAD(self):
+        if self.gzipped():
+            self.send_gzipped(body=False)
+            return
+        self.send_headers(200, len(CONTENT))
+
+    def do_GET(self):
+        server = self.server
+        if self.gzipped():
+            with server.lock:
+                server.ranges_requested.append(self.headers.get("Range"))
+            self.send_gzipped()
+            return
+        start, end = 0, len(CONTENT) - 1
+        match = re.fullmatch(r"bytes=(\d+)-(\d+)?", self.headers.get("Range", ""))
+        with server.lock:
+            server.client_ports.add(self.client_address[1])
+            server.ranges_requested.append(self.headers.get("Range"))
+        if server.ranges and match:
+            start = int(match[1])
+            end = int(match[2]) if match[2] else end
+            self.send_headers(
+                206, end - start + 1, f"bytes {start}-{end}/{len(CONTENT)}"
+            )
+        else:
+            self.send_headers(200, len(CONTENT))
+        body = CONTENT[start : end + 1]
+        if server.fail_after is not None and start == 0:
+            # Drop the connection halfway through the first segment
+            self.wfile.write(body[: server.fail_after])
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server(mocker):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+    server.lock = threading.Lock()
+    server.client_ports = set()
+    server.ranges_requested = []
+    server.ranges = True
+    server.fail_after = None
+    server.gzip = None
+    server.url = f"http://127.0.0.1:{server.server_port}/file.bin"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    mocker.patch.object(file_ops, "download_session", None)
+    mocker.patch.object(file_ops, "DOWNLOAD_SEGMENT_MIN_SIZE", 512 * 1024)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_download_file_in_segments(server, workspace):
+    path = str(workspace.get_path("file.bin"))
+
+    assert "文件下载到本地成功" in file_ops.download_file(server.url, path)
+
+    with open(path, "rb") as f:
+        assert f.read() == CONTENT
+    assert len(server.ranges_requested) == file_ops.DOWNLOAD_SEGMENTS
+    assert not os.path.exists(f"{path}.part")
+    assert not os.path.exists(f"{path}.part.json")
+
+
+def test_download_file_resumes(server, workspace, mocker):
+    path = str(workspace.get_path("file.bin"))
+    mocker.patch.object(file_ops, "DOWNLOAD_PROGRESS_INTERVAL", 0)
+    server.fail_after = 256 * 1024
+
+    assert file_ops.download_file(server.url, path).startswith("错误")
+    assert os.path.exists(f"{path}.part.json")
+
+    server.fail_after = None
+    server.ranges_requested.clear()
+    assert "文件下载到本地成功" in file_ops.download_file(server.url, path)
+
+    with open(path, "rb") as f:
+        assert f.read() == CONTENT
+    # The first segment continues after the bytes it had already written
+    first_start = int(re.match(r"bytes=(\d+)-", sorted(server.ranges_requested)[0])[1])
+    assert first_start >= 256 * 1024 - 64 * 1024
+    assert len(server.ranges_requested) <= file_ops.DOWNLOAD_SEGMENTS
+
+
+def test_download_file_without_ranges(server, workspace):
+    server.ranges = False
+    path = str(workspace.get_path("file.bin"))
+
+    assert "文件下载到本地成功" in file_ops.download_file(server.url, path)
+
+    with open(path, "rb") as f:
+        assert f.read() == CONTENT
+    assert server.ranges_requested == [None]
+
+
+def test_download_session_is_reused(server, workspace):
+    server.ranges = False
+    for name in ["a.bin", "b.bin"]:
+        file_ops.download_file(server.url, str(workspace.get_path(name)))
+
+    assert len(server.client_ports) == 1
+
+
+@pytest.mark.parametrize("mode", ["negotiate", "always"])
+def test_download_file_with_encoded_response(server, workspace, mode):
+    server.gzip = mode
+    path = str(workspace.get_path("file.bin"))
+
+    assert "文件下载到本地成功" in file_ops.download_file(server.url, path)
+
+    with open(path, "rb") as f:
+        assert f.read() == CONTENT
+    assert not os.path.exists(f"{path}.part")
+    if mode == "always":
+        # The encoded body cannot be fetched in ranges
+        assert server.ranges_requested == [None]
+
+
+def test_download_file_without_ranges_removes_part_on_failure(server, workspace):
+    server.ranges = False
+    server.fail_after = 256 * 1024
+    path = str(workspace.get_path("file.bin"))
+
+    assert file_ops.download_file(server.url, path).startswith("错误")
+    assert not os.path.exists(f"{path}.part")
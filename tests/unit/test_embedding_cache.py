@@ -0,0 +1,65 @@
+import pytest
+
+from autogpt.llm import llm_utils
+from autogpt.llm.embedding_cache import EmbeddingCache
+
+MODEL = "text-embedding-ada-002"
+
+
+@pytest.fixture
+def cache(config):
+    if EmbeddingCache in EmbeddingCache._instances:
+        del EmbeddingCache._instances[EmbeddingCache]
+    return EmbeddingCache()
+
+
+def test_get_many_counts_hits_and_misses(cache):
+    assert cache.get_many(MODEL, ["a", "b"]) == [None, None]
+
+    cache.put_many(MODEL, ["a"], [[0.5, 0.25]])
+    assert cache.get_many(MODEL, ["a", "b"]) == [[0.5, 0.25], None]
+    assert cache.get_stats() == {"hits": 1, "misses": 3, "entries": 1}
+
+
+def test_key_ignores_whitespace_and_depends_on_model(cache):
+    cache.put_many(MODEL, ["hello  world\n"], [[1.0]])
+    assert cache.get_many(MODEL, [" hello world"]) == [[1.0]]
+    assert cache.get_many("other-model", ["hello world"]) == [None]
+
+
+def test_evicts_least_recently_used(cache, config, mocker):
+    mocker.patch.object(config, "embedding_cache_max_entries", 2)
+    cache.put_many(MODEL, ["a", "b"], [[1.0], [2.0]])
+    cache.get_many(MODEL, ["a"])
+    cache.put_many(MODEL, ["c"], [[3.0]])
+
+    assert cache.get_many(MODEL, ["a", "b", "c"]) == [[1.0], None, [3.0]]
+    assert cache.get_stats()["entries"] == 2
+
+
+def test_persists_across_instances(cache, workspace):
+    cache.put_many(MODEL, ["a"], [[1.0]])
+    assert (workspace.root / "embedding_cache.sqlite3").exists()
+
+    del EmbeddingCache._instances[EmbeddingCache]
+    assert EmbeddingCache().get_many(MODEL, ["a"]) == [[1.0]]
+
+
+def test_disabled(cache, config, mocker):
+    mocker.patch.object(config, "embedding_cache", False)
+    cache.put_many(MODEL, ["a"], [[1.0]])
+    assert cache.get_many(MODEL, ["a"]) == [None]
+
+
+def test_get_ada_embeddings_only_embeds_misses(cache, mocker):
+    create_embeddings = mocker.patch.object(
+        llm_utils,
+        "create_embeddings",
+        side_effect=lambda texts, **_: [[2.0]] * len(texts),
+    )
+    cache.put_many(MODEL, ["a"], [[1.0]])
+
+    assert llm_utils.get_ada_embeddings(["a", "b", "b"]) == [[1.0], [2.0], [2.0]]
+    create_embeddings.assert_called_once_with(["b"], model=MODEL)
+    assert llm_utils.get_ada_embeddings(["b"]) == [[2.0]]
+    assert create_embeddings.call_count == 1
@@ -98,6 +98,44 @@ def test_file_operations_state(test_file: TextIOWrapper):
     assert file_ops.file_operations_state(test_file.name) == expected_state
 
 
+def test_file_operations_state_reads_appended_operations(test_file: TextIOWrapper):
+    test_file.write("File Operation Logger\nwrite: path/to/file1.txt #checksum1\n")
+    test_file.flush()
+    assert file_ops.file_operations_state(test_file.name) == {
+        "path/to/file1.txt": "checksum1"
+    }
+
+    test_file.write("delete: path/to/file1.txt\nwrite: path/to/file2.txt")
+    test_file.flush()
+    # The last line is not complete yet
+    assert file_ops.file_operations_state(test_file.name) == {}
+    test_file.write(" #checksum2\n")
+    test_file.close()
+    assert file_ops.file_operations_state(test_file.name) == {
+        "path/to/file2.txt": "checksum2"
+    }
+    assert file_ops.operations_state.operations == 3
+
+
+def test_log_operation_compacts_log(config, mocker: MockerFixture):
+    mocker.patch.object(file_ops, "COMPACTION_MIN_OPERATIONS", 4)
+    for i in range(4):
+        file_ops.log_operation("write", "path/to/file1.txt", f"checksum{i}")
+    # 5 operations for 2 files
+    file_ops.log_operation("write", "path/to/file2.txt", "checksum4")
+
+    with open(config.file_logger_path, "r", encoding="utf-8") as f:
+        assert f.read() == (
+            "File Operation Logger\n"
+            "write: path/to/file1.txt #checksum3\n"
+            "write: path/to/file2.txt #checksum4\n"
+        )
+    file_ops.log_operation("delete", "path/to/file1.txt")
+    assert file_ops.file_operations_state(config.file_logger_path) == {
+        "path/to/file2.txt": "checksum4"
+    }
+
+
 def test_is_duplicate_operation(config, mocker: MockerFixture):
     # Prepare a fake state dictionary for the function to use
     state = {
@@ -159,11 +197,65 @@ def test_split_file():
     assert chunks == expected
 
 
+@pytest.mark.parametrize("max_length, overlap", [(4, 1), (4, 0), (5, 3)])
+@pytest.mark.parametrize("length", [0, 1, 3, 10, 23])
+def test_split_stream_matches_split_file(length, max_length, overlap):
+    content = "".join(chr(ord("a") + i % 26) for i in range(length))
+    chunks = list(file_ops.split_file(content, max_length=max_length, overlap=overlap))
+    for block_size in (1, 3, 100):
+        blocks = [content[i : i + block_size] for i in range(0, length, block_size)]
+        assert list(file_ops.split_stream(blocks, max_length, overlap)) == chunks
+    assert file_ops.count_chunks(length, max_length, overlap) == len(chunks)
+
+
 def test_read_file(test_file_with_content_path: Path, file_content):
     content = file_ops.read_file(test_file_with_content_path)
     assert content == file_content
 
 
+def test_read_file_detects_encoding_from_sample(mocker, test_file_path: Path):
+    mocker.patch.object(file_ops, "ENCODING_SAMPLE_SIZE", 64)
+    content = "Ceci est un fichier écrit en français.\r\n" * 100
+    test_file_path.write_bytes(content.encode("cp1252"))
+    from_bytes = mocker.spy(file_ops.charset_normalizer, "from_bytes")
+
+    assert file_ops.read_file(str(test_file_path)) == content
+    assert len(from_bytes.call_args.args[0]) == 64
+
+
+def test_read_file_with_utf8_sample(mocker, test_file_path: Path):
+    mocker.patch.object(file_ops, "ENCODING_SAMPLE_SIZE", 64)
+    # The sample ends with the BOM and the first bytes of a character
+    content = "A" * 60 + "é" + "Ceci est un fichier très long.\r\n" * 100
+    test_file_path.write_bytes(content.encode("utf-8-sig"))
+
+    assert file_ops.read_file(str(test_file_path)) == content
+
+
+def test_read_file_with_ascii_sample(mocker, test_file_path: Path):
+    mocker.patch.object(file_ops, "ENCODING_SAMPLE_SIZE", 64)
+    content = "This sample is plain ASCII.\n" * 10 + "但后面的文本不是。"
+    test_file_path.write_bytes(content.encode("utf-8"))
+
+    assert file_ops.read_file(str(test_file_path)) == content
+
+
+def test_ingest_file_streams_chunks(mocker, test_file_path: Path):
+    mocker.patch.object(file_ops, "READ_BLOCK_SIZE", 7)
+    mocker.patch.object(file_ops, "INGEST_BATCH_SIZE", 2)
+    test_file_path.write_text("abcdefghij", encoding="utf-8")
+    memory = mocker.MagicMock()
+
+    file_ops.ingest_file(str(test_file_path), memory, max_length=4, overlap=1)
+
+    assert [len(call.args[0]) for call in memory.add_many.call_args_list] == [2, 1]
+    texts = [text for call in memory.add_many.call_args_list for text in call.args[0]]
+    assert texts == [
+        f"文件名: {test_file_path}\n内容块#{i + 1}/3: {chunk}"
+        for i, chunk in enumerate(["abcd", "defg", "ghij"])
+    ]
+
+
 def test_write_to_file(test_file_path: Path):
     new_content = "This is new content.\n"
     file_ops.write_to_file(str(test_file_path), new_content)
@@ -230,6 +322,23 @@ def test_append_to_file_uses_checksum_from_appended_file(
     )
 
 
+def test_append_to_file_hashes_only_appended_text(
+    mocker: MockerFixture, test_file_path: Path
+):
+    file_ops.write_to_file(str(test_file_path), "This is written text.\n")
+    test_file_path.write_text("Modified outside of the agent.\n", encoding="utf-8")
+    log_operation = mocker.patch.object(file_ops, "log_operation")
+    read = mocker.patch.object(file_ops, "open", wraps=open, create=True)
+
+    for _ in range(3):
+        file_ops.append_to_file(str(test_file_path), "This is appended text.\n")
+
+    content = test_file_path.read_text(encoding="utf-8")
+    assert log_operation.call_args.kwargs["checksum"] == file_ops.text_checksum(content)
+    # The file is read once, after it was modified outside of the agent
+    assert [call.args[1] for call in read.call_args_list].count("r") == 1
+
+
 def test_delete_file(test_file_with_content_path: Path):
     result = file_ops.delete_file(str(test_file_with_content_path))
     assert result == "File deleted successfully."
@@ -0,0 +1,51 @@
+from pathlib import Path
+
+import pytest
+from bs4 import BeautifulSoup
+
+from autogpt.processing import html
+
+FIXTURES = sorted((Path(__file__).parent / "data" / "html").glob("*.html"))
+BASE_URL = "https://example.com/blog/post.html"
+
+
+def extract_with_beautifulsoup(page):
+    soup = BeautifulSoup(page, "html.parser")
+    for script in soup(["script", "style"]):
+        script.extract()
+    return html.format_text(soup.body.get_text()), html.extract_hyperlinks(
+        soup, BASE_URL
+    )
+
+
+@pytest.fixture(params=["lxml", "html.parser"])
+def backend(request, mocker):
+    if request.param == "html.parser":
+        mocker.patch.object(html, "lxml_html", None)
+    return request.param
+
+
+@pytest.mark.parametrize("fixture", FIXTURES, ids=lambda path: path.name)
+def test_extract_page_matches_beautifulsoup(fixture, backend):
+    page = fixture.read_text(encoding="utf-8")
+
+    assert html.extract_page(page, BASE_URL) == extract_with_beautifulsoup(page)
+
+
+def test_extract_page(backend):
+    page = (
+        "<html><head><title>Title</title></head><body>"
+        "<p>Hello  <b>world</b></p><script>var x = 1;</script>"
+        "<a href='/a'>A</a><a name='b'>B</a><style>p {}</style>"
+        "</body></html>"
+    )
+
+    text, hyperlinks = html.extract_page(page, BASE_URL)
+
+    assert text == "Hello\nworldAB"
+    assert hyperlinks == [("A", "https://example.com/a")]
+
+
+@pytest.mark.parametrize("page", ["  ", "<!-- comment -->", '<?xml version="1.0"?>'])
+def test_extract_page_empty(page, backend):
+    assert html.extract_page(page, BASE_URL) == ("", [])
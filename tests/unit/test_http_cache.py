@@ -0,0 +1,137 @@
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from autogpt.commands import web_requests
+from autogpt.url_utils.http_cache import HttpCache
+
+PAGE = b"<html><body><p>Hello</p><a href='/next'>Next</a></body></html>"
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        server.paths.append(self.path)
+        headers = dict(server.page_headers.get(self.path, {}))
+        if "ETag" in headers and self.headers.get("If-None-Match") == headers["ETag"]:
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            return
+
+        body = server.pages.get(self.path, PAGE)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Date", formatdate(usegmt=True))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+    server.requests = []
+    server.paths = []
+    server.pages = {}
+    server.page_headers = {}
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def cache(config, workspace):
+    HttpCache._instances.pop(HttpCache, None)
+    yield HttpCache()
+    HttpCache._instances.pop(HttpCache, None)
+
+
+def get(url):
+    return web_requests.session.get(url, timeout=10)
+
+
+def test_fresh_response_is_not_requested_again(server, cache):
+    server.page_headers["/"] = {"Cache-Control": "max-age=60"}
+
+    assert get(server.url).content == PAGE
+    response = get(server.url)
+
+    assert response.content == PAGE
+    assert response.text == PAGE.decode()
+    assert len(server.requests) == 1
+    assert cache.get_stats()["hits"] == 1
+
+
+def test_stale_response_is_revalidated(server, cache):
+    server.page_headers["/"] = {"Cache-Control": "no-cache", "ETag": '"v1"'}
+
+    get(server.url)
+    response = get(server.url)
+
+    assert response.status_code == 200
+    assert response.content == PAGE
+    assert server.requests[1]["If-None-Match"] == '"v1"'
+    assert cache.get_stats()["revalidations"] == 1
+
+
+def test_no_store_response_is_not_cached(server, cache):
+    server.page_headers["/"] = {"Cache-Control": "no-store, max-age=60"}
+
+    get(server.url)
+    get(server.url)
+
+    assert len(server.requests) == 2
+    assert "If-None-Match" not in server.requests[1]
+
+
+def test_least_recently_used_responses_are_evicted(server, cache, mocker, config):
+    # Room for two pages
+    mocker.patch.object(config, "http_cache_max_size_mb", 2.5 * 1000 / 1024 / 1024)
+    for path in ["/a", "/b", "/c"]:
+        server.pages[path] = b"x" * 1000
+        server.page_headers[path] = {"Cache-Control": "max-age=60"}
+    for path in ["/a", "/b", "/a", "/c", "/a", "/b"]:
+        get(server.url + path)
+
+    assert server.paths == ["/a", "/b", "/c", "/b"]
+
+
+def test_unused_responses_expire(server, cache, mocker, config):
+    server.page_headers["/"] = {"Cache-Control": "max-age=60"}
+    get(server.url)
+    mocker.patch.object(config, "http_cache_ttl", -1)
+    server.pages["/other"] = PAGE
+    get(server.url + "/other")
+
+    get(server.url)
+
+    assert len(server.requests) == 3
+
+
+def test_scraped_page_is_fetched_and_extracted_once(server, cache, mocker):
+    mocker.patch(
+        "autogpt.url_utils.validators.check_local_file_access", return_value=False
+    )
+    server.page_headers["/"] = {"Cache-Control": "max-age=60"}
+    extract_page = mocker.spy(web_requests, "extract_page")
+
+    assert web_requests.scrape_text(server.url) == "HelloNext"
+    assert web_requests.scrape_links(server.url) == [f"Next ({server.url}/next)"]
+
+    assert len(server.requests) == 1
+    extract_page.assert_called_once()
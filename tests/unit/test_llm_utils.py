@@ -1,3 +1,5 @@
+from unittest.mock import MagicMock
+
 import pytest
 from openai.error import APIError, RateLimitError
 
@@ -131,3 +133,63 @@ def test_chunked_tokens():
     ]
     output = list(llm_utils.chunked_tokens(text, "cl100k_base", 8191))
     assert output == expected_output
+
+
+def fake_chunked_tokens(text, tokenizer_name, chunk_length):
+    tokens = [ord(c) for c in text]
+    yield from llm_utils.batched(tokens, chunk_length)
+
+
+def fake_embedding_response(input, **kwargs):
+    # Embed every chunk as a one-hot vector on the value of its first token
+    data = []
+    for i, chunk in enumerate(input):
+        embedding = [0.0] * 4
+        embedding[chunk[0] % 4] = 1.0
+        data.append({"index": i, "embedding": embedding})
+    response = MagicMock(usage=MagicMock(prompt_tokens=sum(map(len, input))))
+    response.__getitem__.side_effect = {"data": data[::-1]}.__getitem__
+    return response
+
+
+def test_create_embeddings_batches_chunks(mocker, config, api_manager):
+    mocker.patch.object(llm_utils, "chunked_tokens", fake_chunked_tokens)
+    mocker.patch.object(llm_utils, "EMBEDDING_MAX_BATCH_INPUTS", 2)
+    mocker.patch.object(config, "embedding_token_limit", 2)
+    create = mocker.patch(
+        "openai.Embedding.acreate", side_effect=fake_embedding_response
+    )
+
+    # "a" is 97 and "b" is 98: "aabb" is chunked into two distinct embeddings
+    embeddings = llm_utils.create_embeddings(["aabb", "a", "b"], model="model")
+
+    assert create.call_count == 2
+    assert [len(call.kwargs["input"]) for call in create.call_args_list] == [2, 2]
+    assert embeddings[1] == [0.0, 1.0, 0.0, 0.0]
+    assert embeddings[2] == [0.0, 0.0, 1.0, 0.0]
+    assert embeddings[0] == pytest.approx([0.0, 2**-0.5, 2**-0.5, 0.0])
+    assert api_manager.get_total_prompt_tokens() == 6
+
+
+def test_create_embeddings_azure_batch_limit(mocker, config, api_manager):
+    mocker.patch.object(llm_utils, "chunked_tokens", fake_chunked_tokens)
+    mocker.patch.object(config, "embedding_token_limit", 2)
+    mocker.patch.object(config, "use_azure", True)
+    mocker.patch.object(config, "azure_embedding_max_batch_inputs", 1)
+    create = mocker.patch(
+        "openai.Embedding.acreate", side_effect=fake_embedding_response
+    )
+
+    embeddings = llm_utils.create_embeddings(["aabb", "a", "b"], engine="deployment")
+
+    assert [len(call.kwargs["input"]) for call in create.call_args_list] == [1] * 4
+    assert all(call.kwargs["engine"] == "deployment" for call in create.call_args_list)
+    assert embeddings[1] == [0.0, 1.0, 0.0, 0.0]
+
+
+def test_create_embedding_uses_batch(mocker):
+    create_embeddings = mocker.patch.object(
+        llm_utils, "create_embeddings", return_value=[[1.0]]
+    )
+    assert llm_utils.create_embedding("test", model="model") == [1.0]
+    create_embeddings.assert_called_once_with(["test"], model="model")
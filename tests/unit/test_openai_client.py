@@ -0,0 +1,103 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import openai
+import pytest
+
+from autogpt.llm import ApiManager
+from autogpt.llm.providers.openai import OpenAIClient
+
+MESSAGES = [{"role": "user", "content": "Hello"}]
+
+
+class StubOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        self.rfile.read(int(self.headers["Content-Length"]))
+        with server.lock:
+            server.client_ports.add(self.client_address[1])
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        time.sleep(server.delay)
+        with server.lock:
+            server.active -= 1
+
+        body = json.dumps(
+            {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": "Hi"},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {"prompt_tokens": 3, "completion_tokens": 1},
+            }
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server(mocker):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOpenAIHandler)
+    server.lock = threading.Lock()
+    server.client_ports = set()
+    server.active = server.max_active = 0
+    server.delay = 0.0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    mocker.patch.object(openai, "api_base", f"http://127.0.0.1:{server.server_port}/v1")
+    yield server
+    OpenAIClient().close()
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(config, mocker):
+    mocker.patch.object(config, "openai_api_key", "sk-test")
+    OpenAIClient().close()
+    return OpenAIClient()
+
+
+def test_create_chat_completion_reuses_connection(stub_server, client, api_manager):
+    for _ in range(3):
+        response = ApiManager().create_chat_completion(MESSAGES, "gpt-3.5-turbo")
+        assert response.choices[0].message["content"] == "Hi"
+
+    assert len(stub_server.client_ports) == 1
+    assert ApiManager().get_total_prompt_tokens() == 9
+
+
+def test_acreate_chat_completion_is_concurrent(stub_server, client, config, mocker):
+    mocker.patch.object(config, "openai_max_connections", 2)
+    stub_server.delay = 0.2
+
+    async def create_all():
+        return await asyncio.gather(
+            *(
+                client.acreate_chat_completion(
+                    model="gpt-3.5-turbo", messages=MESSAGES, api_key="sk-test"
+                )
+                for _ in range(4)
+            )
+        )
+
+    responses = asyncio.run(create_all())
+
+    assert len(responses) == 4
+    assert stub_server.max_active == 2
+    assert len(stub_server.client_ports) == 2
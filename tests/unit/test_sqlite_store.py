@@ -0,0 +1,55 @@
+from autogpt.sqlite_store import SQLiteStore, store_path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    last_used INTEGER NOT NULL
+);
+"""
+
+
+def keys(connection):
+    return [row[0] for row in connection.execute("SELECT key FROM entries")]
+
+
+def test_store_path(config, workspace, mocker):
+    assert store_path(False, None, "cache.sqlite3") is None
+    other_path = workspace.root / "other.sqlite3"
+    assert store_path(True, str(other_path), "cache.sqlite3") == other_path
+    assert store_path(True, None, "cache.sqlite3") == workspace.root / "cache.sqlite3"
+    mocker.patch.object(config, "workspace_path", None)
+    assert store_path(True, None, "cache.sqlite3") is None
+
+
+def test_evicts_least_recently_used(tmp_path):
+    store = SQLiteStore(SCHEMA, lru_table="entries")
+    connection = store.connect(tmp_path / "cache.sqlite3")
+    store.put(connection, "a", "1")
+    store.put(connection, "b", "2")
+    store.put(connection, "a", "3")
+    store.touch(connection, "b")
+    store.put(connection, "c", "4")
+    store.evict(connection, 2)
+
+    assert sorted(keys(connection)) == ["b", "c"]
+    assert store.entries == 2
+
+
+def test_reopens_when_path_changes(tmp_path):
+    store = SQLiteStore(SCHEMA, lru_table="entries")
+    connection = store.connect(tmp_path / "a.sqlite3")
+    store.put(connection, "a", "1")
+    connection.commit()
+
+    assert store.connect(tmp_path / "a.sqlite3") is connection
+    assert keys(store.connect(tmp_path / "b.sqlite3")) == []
+    assert store.entries == 0
+
+    # The entries and the clock are read back from the database
+    connection = store.connect(tmp_path / "a.sqlite3")
+    assert store.entries == 1
+    store.put(connection, "b", "2")
+    store.evict(connection, 1)
+    assert keys(connection) == ["b"]
+    assert store.connect(None) is None
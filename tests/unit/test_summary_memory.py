@@ -0,0 +1,78 @@
+import threading
+
+import pytest
+
+from autogpt.memory_management.summary_memory import (
+    RunningSummary,
+    get_newly_trimmed_messages,
+)
+
+
+def fake_summary(current_memory, new_events):
+    if isinstance(current_memory, dict):
+        current_memory = current_memory["content"]
+    contents = [event["content"] for event in new_events]
+    return {"role": "system", "content": f"{current_memory}|{','.join(contents)}"}
+
+
+def test_running_summary_strict(mocker):
+    mocker.patch(
+        "autogpt.memory_management.summary_memory.update_running_summary",
+        side_effect=fake_summary,
+    )
+    running_summary = RunningSummary("start")
+
+    running_summary.update([{"role": "system", "content": "a"}])
+
+    assert running_summary.message() == {"role": "system", "content": "start|a"}
+
+
+def test_running_summary_background_batches_queued_events(mocker):
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_summary(current_memory, new_events):
+        started.set()
+        release.wait(5)
+        return fake_summary(current_memory, new_events)
+
+    update = mocker.patch(
+        "autogpt.memory_management.summary_memory.update_running_summary",
+        side_effect=slow_summary,
+    )
+    running_summary = RunningSummary("start", mode="background")
+
+    running_summary.update([{"role": "system", "content": "a"}])
+    assert started.wait(5)
+    # The previous summary is used while the worker is busy
+    assert running_summary.message()["content"].endswith("start")
+
+    running_summary.update([{"role": "system", "content": "b"}])
+    running_summary.update([{"role": "system", "content": "c"}])
+    release.set()
+    running_summary.wait(5)
+
+    assert running_summary.summary["content"] == "start|a|b,c"
+    assert update.call_count == 2
+
+
+def test_running_summary_unknown_mode():
+    with pytest.raises(ValueError):
+        RunningSummary("start", mode="eventually")
+
+
+def test_get_newly_trimmed_messages_with_duplicates():
+    message = {"role": "system", "content": "无法执行命令"}
+    full_message_history = [message] * 6
+
+    trimmed, last_memory_index = get_newly_trimmed_messages(
+        full_message_history, first_message_index=4, last_memory_index=0
+    )
+    assert trimmed == [message] * 3
+    assert last_memory_index == 3
+
+    trimmed, last_memory_index = get_newly_trimmed_messages(
+        full_message_history, first_message_index=4, last_memory_index=3
+    )
+    assert trimmed == []
+    assert last_memory_index == 3
@@ -0,0 +1,237 @@
+import threading
+import time
+
+from autogpt.processing import text
+from autogpt.processing.summary_cache import SummaryCache
+
+
+def test_summarize_chunks_keeps_order_and_bounds_concurrency(mocker, config):
+    mocker.patch.object(config, "browse_summary_max_workers", 2)
+    mocker.patch.object(text, "count_message_tokens", return_value=1)
+    lock = threading.Lock()
+    in_flight = []
+    max_in_flight = []
+
+    def fake_completion(model, messages):
+        with lock:
+            in_flight.append(1)
+            max_in_flight.append(len(in_flight))
+        # The first chunks take longest, so they finish last
+        chunk = messages[0]["content"].split('"""')[1]
+        time.sleep(0.01 * (5 - int(chunk)))
+        with lock:
+            in_flight.pop()
+        return f"summary {chunk}"
+
+    mocker.patch.object(text, "create_chat_completion", side_effect=fake_completion)
+
+    summaries = list(text.summarize_chunks([str(i) for i in range(5)], "", "model"))
+
+    assert summaries == [f"summary {i}" for i in range(5)]
+    assert max(max_in_flight) == 2
+
+
+def test_reduce_summaries_fits_every_prompt(mocker, config):
+    mocker.patch.object(config, "browse_chunk_max_length", 10)
+    # Every word is a token and the prompt itself takes 2 tokens
+    mocker.patch.object(text, "count_message_tokens", return_value=1)
+    mocker.patch.object(
+        text,
+        "count_string_tokens",
+        side_effect=lambda string, model: len(string.split()),
+    )
+    prompts = []
+
+    def fake_completion(model, messages):
+        chunk = messages[0]["content"].split('"""')[1]
+        prompts.append(chunk)
+        return chunk.split()[0]
+
+    mocker.patch.object(text, "create_chat_completion", side_effect=fake_completion)
+
+    summaries = [f"s{i} a b" for i in range(8)]
+    summary = text.reduce_summaries(summaries, "", "model")
+
+    # 8 summaries of 4 tokens fit 2 per prompt: 4 groups, then 1 group of the 4
+    #  one word summaries
+    assert len(prompts) == 5
+    assert summary == "s0"
+    assert all(
+        2 + sum(len(line.split()) + 1 for line in p.splitlines()) <= 10 for p in prompts
+    )
+
+
+def test_reduce_summaries_shrinks_oversized_summaries(mocker, config):
+    mocker.patch.object(config, "browse_chunk_max_length", 10)
+    # Every word is a token and the prompt itself takes 2 tokens
+    mocker.patch.object(text, "count_message_tokens", return_value=1)
+    mocker.patch.object(
+        text,
+        "count_string_tokens",
+        side_effect=lambda string, model: len(string.split()),
+    )
+    encoding = mocker.MagicMock()
+    encoding.encode.side_effect = str.split
+    encoding.decode_bytes.side_effect = lambda tokens: " ".join(tokens).encode()
+    mocker.patch.object(text, "get_encoding", return_value=encoding)
+    prompts = []
+
+    def fake_completion(model, messages):
+        chunk = messages[0]["content"].split('"""')[1]
+        prompts.append(chunk)
+        return chunk
+
+    mocker.patch.object(text, "create_chat_completion", side_effect=fake_completion)
+
+    summaries = [f"s{i} a b c d e f g h" for i in range(3)]
+    text.reduce_summaries(summaries, "", "model")
+
+    # Each summary is cut to 3 tokens so that two of them fit in a prompt
+    assert prompts[:2] == ["s0 a b\ns1 a b", "s2 a b"]
+    assert all(
+        2 + sum(len(line.split()) + 1 for line in p.splitlines()) <= 10 for p in prompts
+    )
+
+
+def test_split_sentences_regex(mocker, config):
+    mocker.patch.object(config, "browse_sentence_splitter", "regex")
+    sentences = text.split_sentences("Hello world.  How are you? 很好。谢谢！ Bye")
+    assert sentences == ["Hello world.", "How are you?", "很好。", "谢谢！", "Bye"]
+
+
+def test_split_sentences_loads_spacy_once(mocker, config):
+    import spacy
+
+    mocker.patch.object(config, "browse_sentence_splitter", "spacy")
+    text.get_sentencizer.cache_clear()
+    load = mocker.patch(
+        "spacy.load", side_effect=lambda *args, **kwargs: spacy.blank("en")
+    )
+
+    assert text.split_sentences("Hello world. How are you?") == [
+        "Hello world.",
+        "How are you?",
+    ]
+    text.split_sentences("Bye.")
+    load.assert_called_once()
+    text.get_sentencizer.cache_clear()
+
+
+def test_split_text_fits_budget_and_splits_long_sentences(mocker, config):
+    mocker.patch.object(config, "browse_sentence_splitter", "regex")
+    # Every word is a token and the message around the chunk takes 3 tokens
+    encoding = mocker.MagicMock()
+    encoding.encode.side_effect = str.split
+    encoding.decode.side_effect = " ".join
+    encoding.decode_bytes.side_effect = lambda tokens: " ".join(tokens).encode()
+    mocker.patch.object(text, "get_encoding", return_value=encoding)
+    mocker.patch.object(text, "count_message_tokens", return_value=3)
+
+    page = "One two. Three four five. Six.\nA b c d e f g h i j k l m n. End."
+    chunks = list(text.split_text(page, max_length=11, model="model"))
+
+    assert chunks == [
+        "One two. Three four five.",
+        "Six.",
+        "A b c d e f g",
+        "h i j k l m n.",
+        "End.",
+    ]
+    assert encoding.encode.call_count == 5
+
+
+def test_split_text_cuts_long_sentences_between_characters(mocker, config):
+    mocker.patch.object(config, "browse_sentence_splitter", "regex")
+    # Every byte is a token, so a CJK character spans 3 tokens
+    encoding = mocker.MagicMock()
+    encoding.encode.side_effect = lambda string: list(string.encode())
+    encoding.decode.side_effect = lambda tokens: bytes(tokens).decode(errors="replace")
+    encoding.decode_bytes.side_effect = bytes
+    mocker.patch.object(text, "get_encoding", return_value=encoding)
+    mocker.patch.object(text, "count_message_tokens", return_value=3)
+
+    sentence = "这是一个很长的句子没有标点符号"
+    chunks = list(text.split_text(sentence, max_length=12, model="model"))
+
+    assert "".join(chunks) == sentence
+    assert all("\ufffd" not in chunk for chunk in chunks)
+    assert all(len(chunk.encode()) <= 8 for chunk in chunks)
+
+
+def test_summarize_text_adds_page_to_memory_once(mocker, config):
+    mocker.patch.object(config, "browse_memory_background", False)
+    memory = mocker.patch.object(text, "get_memory").return_value
+    mocker.patch.object(text, "split_text", return_value=["a", "b"])
+    mocker.patch.object(text, "summarize_chunks", side_effect=lambda c, q, m: iter(c))
+    mocker.patch.object(text, "reduce_summaries", return_value="summary")
+
+    assert text.summarize_text("url", "ab", "question") == "summary"
+    memory.add_many.assert_called_once_with(
+        [
+            "Source: url\nRaw content part#1: a",
+            "Source: url\nRaw content part#2: b",
+            "Source: url\nContent summary part#1: a",
+            "Source: url\nContent summary part#2: b",
+        ]
+    )
+
+
+def test_add_to_memory_in_background(mocker, config):
+    mocker.patch.object(config, "browse_memory_background", True)
+    memory = mocker.patch.object(text, "get_memory").return_value
+    memory.add_many.side_effect = [None, RuntimeError("backend down")]
+    error = mocker.patch.object(text.logger, "error")
+
+    text.add_to_memory(["a"])
+    text.add_to_memory(["b"])
+    # Wait for the queued batches
+    text.memory_executor.submit(lambda: None).result()
+
+    assert memory.add_many.call_args_list == [mocker.call(["a"]), mocker.call(["b"])]
+    error.assert_called_once()
+
+
+def test_summarize_text_reuses_cached_summary(mocker, config, workspace):
+    mocker.patch.object(config, "browse_memory_background", False)
+    mocker.patch.object(text, "get_memory")
+    mocker.patch.object(text, "split_text", return_value=["a"])
+    mocker.patch.object(text, "summarize_chunks", side_effect=lambda c, q, m: iter(c))
+    reduce_summaries = mocker.patch.object(
+        text, "reduce_summaries", side_effect=["summary", "other", "changed"]
+    )
+
+    assert text.summarize_text("url", "page", "What is it?") == "summary"
+    assert text.summarize_text("url", "page", "  what is  it") == "summary"
+    assert text.summarize_text("url", "page", "Who wrote it?") == "other"
+    assert text.summarize_text("url", "new page", "What is it?") == "changed"
+    assert reduce_summaries.call_count == 3
+    assert (workspace.root / "summary_cache.sqlite3").exists()
+
+
+def test_summary_cache_evicts_least_recently_used(mocker, config, workspace):
+    mocker.patch.object(config, "browse_summary_cache_max_entries", 2)
+    SummaryCache._instances.pop(SummaryCache, None)
+    cache = SummaryCache()
+    cache.put("a", "summary a")
+    cache.put("b", "summary b")
+    cache.get("a")
+    cache.put("c", "summary c")
+
+    assert [cache.get(key) for key in "abc"] == ["summary a", None, "summary c"]
+    assert cache.get_stats()["entries"] == 2
+
+
+def test_summarize_text_without_summary_cache(mocker, config):
+    mocker.patch.object(config, "browse_summary_cache", False)
+    mocker.patch.object(config, "browse_memory_background", False)
+    mocker.patch.object(text, "get_memory")
+    mocker.patch.object(text, "split_text", return_value=["a"])
+    mocker.patch.object(text, "summarize_chunks", side_effect=lambda c, q, m: iter(c))
+    reduce_summaries = mocker.patch.object(
+        text, "reduce_summaries", return_value="summary"
+    )
+
+    text.summarize_text("url", "page", "question")
+    text.summarize_text("url", "page", "question")
+
+    assert reduce_summaries.call_count == 2